@@ -1,11 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from db import DB
+from db import DB, PAGE_SORTS, format_money, parse_date, to_paisa
+from db_worker import PagedLoader
+from widgets.scrollable_treeview import ScrollableTreeview
+from widgets.date_range import DateRangeBar
 
 class AccountsFrame(tk.Frame):
-    def __init__(self, master, db: DB, *args, **kwargs):
+    def __init__(self, master, db: DB, worker=None, *args, **kwargs):
         super().__init__(master, *args, **kwargs)
         self.db = db
+        self.worker = worker
         self.build()
 
     def build(self):
@@ -24,36 +28,93 @@ class AccountsFrame(tk.Frame):
         self.credit = ttk.Entry(frm)
         self.credit.grid(row=2, column=3)
 
-        ttk.Button(frm, text='Add Entry', command=self.add_entry).grid(row=3, column=0, columnspan=4, pady=8)
+        ttk.Label(frm, text='Date').grid(row=3, column=0)
+        self.entry_date = ttk.Entry(frm)
+        self.entry_date.grid(row=3, column=1)
+        ttk.Label(frm, text='YYYY-MM-DD, blank for now').grid(row=3, column=2, sticky='w')
 
-        cols = ('id','entry_date','description','debit','credit')
-        self.tree = ttk.Treeview(frm, columns=cols, show='headings')
+        ttk.Button(frm, text='Add Entry', command=self.add_entry).grid(row=4, column=0, columnspan=4, pady=8)
+
+        # entry_date range: filters the list, period totals from the running balances
+        period = ttk.Frame(frm)
+        period.grid(row=5, column=0, columnspan=4, sticky='w', pady=(0, 6))
+        self._dates = (None, None)
+        DateRangeBar(period, on_change=self.set_dates).pack(side='left')
+        self.summary = ttk.Label(period, text='')
+        self.summary.pack(side='left', padx=8)
+
+        self.page_info = ttk.Label(frm, text='')
+        self.page_info.grid(row=7, column=0, columnspan=4, sticky='e')
+
+        cols = ('id','entry_date','description','debit','credit','balance')
+        # virtual mode: the ledger only grows, only visible lines are Tk items;
+        # older entries are paged in as the list is scrolled to the bottom
+        self.scroll = ScrollableTreeview(frm, columns=cols, show='headings', virtual=True,
+                                         on_end=lambda: self.pager.more())
+        self.tree = self.scroll.get_tree()
         for c in cols:
             self.tree.heading(c, text=c.replace('_', ' ').title())
             self.tree.column(c, width=100)
-        self.tree.grid(row=4, column=0, columnspan=4, sticky='nsew')
-        frm.rowconfigure(4, weight=1)
+        self.scroll.grid(row=6, column=0, columnspan=4, sticky='nsew')
+        # only some pages are loaded: headings re-query, ordered by an indexed column
+        self._sort = ()
+        self.scroll.enable_sorting(server=(PAGE_SORTS["accounts"], self.set_sort))
+        frm.rowconfigure(6, weight=1)
         frm.columnconfigure(2, weight=1)
+        self.pager = PagedLoader(self.worker, self.db, self._fetch, self._show_rows, scroll=self.scroll)
         self.load()
 
     def add_entry(self):
         desc = self.desc.get().strip()
         try:
-            debit = float(self.debit.get().strip() or 0)
-            credit = float(self.credit.get().strip() or 0)
+            debit = to_paisa(self.debit.get())
+            credit = to_paisa(self.credit.get())
         except ValueError:
             messagebox.showwarning('Validation', 'Debit/Credit must be numbers')
             return
-        self.db.add_account_entry(desc, debit, credit)
+        entry_date = self.entry_date.get().strip() or None
+        if entry_date is not None and parse_date(entry_date) is None:
+            messagebox.showwarning('Validation', 'Date must be YYYY-MM-DD')
+            return
+        self.db.add_account_entry(desc, debit, credit, entry_date)
         self.desc.delete(0, 'end')
         self.debit.delete(0, 'end')
         self.credit.delete(0, 'end')
-        self.load()
+        self.entry_date.delete(0, 'end')
+
+    def _fetch(self, db, after, limit):
+        return db.page_accounts(after, limit, *self._dates, order=self._sort[0] if self._sort else None)
 
     def load(self):
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        c = self.db.conn.cursor()
-        c.execute('SELECT * FROM accounts ORDER BY id DESC')
-        for row in c.fetchall():
-            self.tree.insert('', 'end', values=(row['id'], row['entry_date'], row['description'], row['debit'], row['credit']))
\ No newline at end of file
+        self.pager.reset(keep=True)
+        self.load_summary()
+
+    def set_dates(self, date_from, date_to):
+        self._dates = (date_from, date_to)
+        self.pager.reset()
+        self.load_summary()
+
+    def set_sort(self, sort):
+        self._sort = sort
+        self.pager.reset()
+
+    def load_summary(self):
+        date_from, date_to = self._dates
+        fetch = lambda db: db.ledger_summary(date_from, date_to)
+        if self.worker is None:
+            self._show_summary(fetch(self.db))
+        else:
+            self.worker.read(fetch, on_done=self._show_summary, key=self.summary)
+
+    def _show_summary(self, s):
+        self.summary.configure(
+            text=f"Opening {format_money(s['opening'])}   Debit {format_money(s['debit'])}   "
+                 f"Credit {format_money(s['credit'])}   Closing {format_money(s['closing'])}")
+
+    def _show_rows(self, rows):
+        self.scroll.set_rows([
+            (row['id'], (row['id'], row['entry_date'], row['description'], format_money(row['debit']),
+                         format_money(row['credit']), format_money(row['balance'])))
+            for row in rows
+        ])
+        self.page_info.configure(text=f'{len(rows)} entries' + (' (scroll for older)' if self.pager.has_more else ''))
@@ -1,13 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from db import DB
+from tkinter import ttk, messagebox, filedialog
+from db import DB, to_paisa
+from importer import import_manifest
 
 
 class AddBikeFrame(tk.Frame):
-    def __init__(self, master, db: DB, on_added=None, *args, **kwargs):
+    def __init__(self, master, db: DB, on_added=None, worker=None, *args, **kwargs):
         super().__init__(master, *args, **kwargs)
         self.db = db
         self.on_added = on_added
+        self.worker = worker
+        self._import_progress = None
         self.entries = {}
         self.build()
 
@@ -34,6 +37,16 @@ class AddBikeFrame(tk.Frame):
             row=len(labels), column=0, columnspan=2, pady=10
         )
 
+        # Bulk import from a supplier manifest
+        imp = ttk.LabelFrame(self, text="Import shipment manifest (CSV / JSON lines)")
+        imp.pack(padx=20, pady=(0, 20), fill="x")
+        self.import_btn = ttk.Button(imp, text="Import manifest…", command=self.import_manifest)
+        self.import_btn.pack(side="left", padx=6, pady=6)
+        self.import_bar = ttk.Progressbar(imp, mode="determinate", maximum=1.0)
+        self.import_bar.pack(side="left", fill="x", expand=True, padx=6)
+        self.import_status = ttk.Label(imp, text="")
+        self.import_status.pack(side="left", padx=6)
+
     def add_bike(self):
         # Collect values
         data = {k: v.get().strip() for k, v in self.entries.items()}
@@ -44,8 +57,8 @@ class AddBikeFrame(tk.Frame):
             return
 
         try:
-            # Convert listed_price safely
-            data["listed_price"] = float(data["listed_price"]) if data["listed_price"] else 0.0
+            # Convert listed_price safely (stored in paisa)
+            data["listed_price"] = to_paisa(data["listed_price"])
 
             self.db.add_bike(
                 data["brand"],
@@ -72,3 +85,59 @@ class AddBikeFrame(tk.Frame):
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add bike:\n{e}")
+
+    def import_manifest(self):
+        path = filedialog.askopenfilename(
+            title="Select shipment manifest",
+            filetypes=[("Manifests", "*.csv *.jsonl *.ndjson *.json"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        # written by the import thread, read by the Tk poller below
+        self._import_progress = (0, 0.0)
+
+        def progress(rows, fraction):
+            self._import_progress = (rows, fraction)
+
+        def done(report):
+            self._finish_import()
+            self.import_status.configure(text=f"{report.inserted} imported")
+            text = report.summary()
+            if report.conflicts or report.errors:
+                text += "\n\n" + report.details()
+            messagebox.showinfo("Import finished", text)
+            if self.on_added and report.inserted:
+                self.on_added()
+
+        def failed(e):
+            self._finish_import()
+            self.import_status.configure(text="")
+            messagebox.showerror("Error", f"Import failed, nothing was added:\n{e}")
+
+        self.import_btn.configure(state="disabled")
+        self.import_bar["value"] = 0
+        if self.worker is None:
+            try:
+                report = import_manifest(self.db, path, progress)
+            except Exception as e:
+                failed(e)
+                return
+            done(report)
+            return
+
+        self.worker.write(import_manifest, path, progress, on_done=done, on_error=failed)
+        self._poll_import()
+
+    def _poll_import(self):
+        if self._import_progress is None:
+            return
+        rows, fraction = self._import_progress
+        self.import_bar["value"] = fraction
+        self.import_status.configure(text=f"{rows} rows read…")
+        self.after(100, self._poll_import)
+
+    def _finish_import(self):
+        self._import_progress = None
+        self.import_bar["value"] = 1.0
+        self.import_btn.configure(state="normal")
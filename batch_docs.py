@@ -0,0 +1,186 @@
+# batch_docs.py
+import datetime
+import os
+import webbrowser
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+import stamping
+
+
+class BatchDocsDialog(tk.Toplevel):
+    """
+    "Generate documents" window shared by the sold bikes and bookings screens.
+
+    kinds: {label: make_jobs(rows) -> [(template_id, data, out_path), ...]}
+    selected_rows(): the rows currently selected in the calling list (mappings: dicts or RowViews)
+    rows_between(db, date_from, date_to): rows for a date range (YYYY-MM-DD)
+    out_dir: where the combined PDF is offered to be saved
+
+    Rows are fetched on the worker's reader thread and documents rendered with
+    stamping.render_batch on its task thread, so the app stays responsive; a
+    progress bar polls the batch while it runs.
+    """
+
+    def __init__(self, parent, db, worker, kinds, selected_rows, rows_between, out_dir):
+        super().__init__(parent)
+        self.title("Generate documents")
+        self.resizable(False, False)
+        self.db = db
+        self.worker = worker
+        self.kinds = kinds
+        self.selected_rows = selected_rows
+        self.rows_between = rows_between
+        self.out_dir = out_dir
+        self._progress = None
+        self.build()
+
+    def build(self):
+        frm = ttk.Frame(self, padding=12)
+        frm.pack(fill="both", expand=True)
+
+        ttk.Label(frm, text="Documents").grid(row=0, column=0, sticky="nw", pady=4)
+        self.kind_vars = {}
+        kinds = ttk.Frame(frm)
+        kinds.grid(row=0, column=1, columnspan=3, sticky="w")
+        for i, label in enumerate(self.kinds):
+            var = tk.BooleanVar(value=(i == 0))
+            ttk.Checkbutton(kinds, text=label, variable=var).pack(side="left", padx=(0, 10))
+            self.kind_vars[label] = var
+
+        self.scope = tk.StringVar(value="selection" if self.selected_rows() else "range")
+        n = len(self.selected_rows())
+        ttk.Radiobutton(frm, text=f"Selected rows ({n})", variable=self.scope, value="selection").grid(
+            row=1, column=0, columnspan=4, sticky="w", pady=(8, 2))
+        ttk.Radiobutton(frm, text="Date range (YYYY-MM-DD)", variable=self.scope, value="range").grid(
+            row=2, column=0, columnspan=4, sticky="w")
+
+        first_of_month = datetime.date.today().replace(day=1)
+        ttk.Label(frm, text="From").grid(row=3, column=0, sticky="e", padx=4)
+        self.date_from = ttk.Entry(frm, width=12)
+        self.date_from.insert(0, first_of_month.isoformat())
+        self.date_from.grid(row=3, column=1, sticky="w")
+        ttk.Label(frm, text="To").grid(row=3, column=2, sticky="e", padx=4)
+        self.date_to = ttk.Entry(frm, width=12)
+        self.date_to.insert(0, datetime.date.today().isoformat())
+        self.date_to.grid(row=3, column=3, sticky="w")
+
+        self.combine_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frm, text="Also combine into one PDF for printing", variable=self.combine_var).grid(
+            row=4, column=0, columnspan=4, sticky="w", pady=(8, 4))
+
+        self.bar = ttk.Progressbar(frm, mode="determinate", length=320)
+        self.bar.grid(row=5, column=0, columnspan=4, sticky="ew", pady=4)
+        self.status = ttk.Label(frm, text="")
+        self.status.grid(row=6, column=0, columnspan=4, sticky="w")
+
+        self.start_btn = ttk.Button(frm, text="Generate", command=self.start)
+        self.start_btn.grid(row=7, column=0, columnspan=4, pady=(8, 0))
+
+    # ---------- run ----------
+    def start(self):
+        labels = [label for label, var in self.kind_vars.items() if var.get()]
+        if not labels:
+            messagebox.showwarning("Generate", "Pick at least one kind of document", parent=self)
+            return
+
+        combine_path = None
+        if self.combine_var.get():
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            combine_path = filedialog.asksaveasfilename(
+                parent=self, title="Save combined PDF", defaultextension=".pdf",
+                initialdir=self.out_dir, initialfile=f"batch_{stamp}.pdf",
+                filetypes=[("PDF", "*.pdf")])
+            if not combine_path:
+                return
+
+        if self.scope.get() == "selection":
+            rows = self.selected_rows()
+            if not rows:
+                messagebox.showwarning("Generate", "No rows are selected", parent=self)
+                return
+            self._render(rows, labels, combine_path)
+            return
+
+        try:
+            date_from = datetime.date.fromisoformat(self.date_from.get().strip()).isoformat()
+            date_to = datetime.date.fromisoformat(self.date_to.get().strip()).isoformat()
+        except ValueError:
+            messagebox.showwarning("Generate", "Dates must be YYYY-MM-DD", parent=self)
+            return
+
+        def got_rows(rows):
+            rows = [dict(r) for r in rows]
+            if not rows:
+                self._finish()
+                messagebox.showinfo("Generate", "Nothing in that date range", parent=self)
+                return
+            self._render(rows, labels, combine_path)
+
+        self._begin("Fetching rows…")
+        if self.worker is None:
+            got_rows(self.rows_between(self.db, date_from, date_to))
+        else:
+            self.worker.read(self.rows_between, date_from, date_to, on_done=got_rows, on_error=self._failed)
+
+    def _render(self, rows, labels, combine_path):
+        jobs = []
+        for label in labels:
+            jobs.extend(self.kinds[label](rows))
+        self._begin(f"Rendering {len(jobs)} documents…")
+        self._progress = (0, len(jobs))
+
+        # written by the render thread, read by the Tk poller below
+        def progress(done, total):
+            self._progress = (done, total)
+
+        if self.worker is None:
+            try:
+                result = stamping.render_batch(jobs, combine_path, progress)
+            except Exception as e:
+                self._failed(e)
+                return
+            self._done(result, combine_path)
+            return
+        self.worker.run(stamping.render_batch, jobs, combine_path, progress,
+                        on_done=lambda result: self._done(result, combine_path), on_error=self._failed)
+        self._poll()
+
+    def _poll(self):
+        if self._progress is None:
+            return
+        done, total = self._progress
+        self.bar["maximum"] = max(total, 1)
+        self.bar["value"] = done
+        self.status.configure(text=f"{done} of {total} documents")
+        self.after(100, self._poll)
+
+    def _begin(self, text):
+        self.start_btn.configure(state="disabled")
+        self.status.configure(text=text)
+
+    def _finish(self):
+        self._progress = None
+        self.start_btn.configure(state="normal")
+
+    def _done(self, result, combine_path):
+        paths, failed = result
+        self._finish()
+        self.bar["value"] = self.bar["maximum"]
+        summary = f"{len(paths)} documents saved" + (f", {len(failed)} failed" if failed else "")
+        self.status.configure(text=summary)
+        text = summary
+        if failed:
+            text += "\n" + "\n".join(f"{os.path.basename(p)}: {msg}" for p, msg in failed[:10])
+        if combine_path and paths:
+            text += f"\nCombined PDF: {combine_path}"
+            try:
+                webbrowser.open("file://" + os.path.abspath(combine_path))
+            except Exception:
+                pass
+        messagebox.showinfo("Documents generated", text, parent=self)
+
+    def _failed(self, e):
+        self._finish()
+        self.status.configure(text="")
+        messagebox.showerror("Error", f"Failed to generate documents: {e}", parent=self)
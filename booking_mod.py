@@ -1,83 +1,42 @@
 # booking_mod.py
 from widgets.scrollable_treeview import ScrollableTreeview
+from widgets.date_range import DateRangeBar
 import os
 import datetime
-import tempfile
 import webbrowser
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas as pdfcanvas
-from PyPDF2 import PdfReader, PdfWriter
-import json
 
-from db import DB
+from db import DB, MONEY_COLUMNS, PAGE_SORTS, format_money, iso_date, money_text, to_paisa
+from db_worker import PagedLoader, load_async
+from changes import patchable_ids
+from row_cache import RowCache
+import stamping
+from batch_docs import BatchDocsDialog
 
 HERE = os.path.dirname(__file__)
-ASSETS_DIR = os.path.join(HERE, "assets")
-TEMPLATE_PDF_PATH = os.path.join(ASSETS_DIR, "booking_letter.pdf")
-COORDS_PATH = os.path.join(ASSETS_DIR, "booking_coords.json")
 BOOKINGS_DIR = os.path.join(HERE, "bookings")
 os.makedirs(BOOKINGS_DIR, exist_ok=True)
 
 
-# -------------------------------------------------------
-# Unified PDF writer used by both the Frame and the Form
-# -------------------------------------------------------
-def _write_pdf_on_template(out_path, data, template_path=TEMPLATE_PDF_PATH, coords_path=COORDS_PATH):
-    """Write values from `data` onto the booking template PDF using coords json."""
-    # Load coords
-    coords = {}
-    if os.path.exists(coords_path):
-        with open(coords_path, "r", encoding="utf-8") as f:
-            coords = json.load(f)
-
-    # Create overlay PDF
-    overlay_fd, overlay_path = tempfile.mkstemp(suffix=".pdf")
-    os.close(overlay_fd)
-    c = pdfcanvas.Canvas(overlay_path, pagesize=A4)
-    c.setFont("Helvetica", 10)
-
-    for key, xy in coords.items():
-        if not isinstance(xy, (list, tuple)) or len(xy) != 2:
-            continue
-        x, y = xy
-        val = data.get(key, "")
-        # nice number formatting for amounts, but don't crash if strings are passed
-        if key in ("total_amount", "advance", "balance"):
-            try:
-                val = f"{float(val):,.0f}"
-            except Exception:
-                val = str(val)
-        else:
-            val = str(val) if val is not None else ""
-        c.drawString(float(x), float(y), val)
-
-    c.save()
-
-    # Merge overlay with template
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Template PDF not found: {template_path}")
-
-    reader = PdfReader(template_path)
-    overlay = PdfReader(overlay_path)
-    writer = PdfWriter()
-    page = reader.pages[0]
-    page.merge_page(overlay.pages[0])
-    writer.add_page(page)
-
-    with open(out_path, "wb") as f:
-        writer.write(f)
-
-    os.remove(overlay_path)
-    return out_path
+def booking_jobs(rows) -> list:
+    """Batch render jobs (see stamping.render_batch) for booking letters."""
+    jobs = []
+    for r in rows:
+        data = dict(r)
+        jobs.append(("booking", data, os.path.join(BOOKINGS_DIR, f"booking_{data.get('booking_no')}.pdf")))
+    return jobs
 
 
 class BookingFrame(tk.Frame):
-    def __init__(self, master, db: DB, *args, **kwargs):
+    def __init__(self, master, db: DB, worker=None, *args, **kwargs):
         super().__init__(master, *args, **kwargs)
         self.db = db
-        self._rows = {}
+        self.worker = worker
+        self._rows = RowCache()
+        # shown values; the cache keeps paisa and the DB's delivered flag
+        self._formats = {c: format_money for c in MONEY_COLUMNS["bookings"]}
+        self._formats["delivered"] = lambda flag: "Yes" if int(flag or 0) else "No"
         self.build()
 
     def build(self):
@@ -87,9 +46,22 @@ class BookingFrame(tk.Frame):
         ttk.Button(toolbar, text="Refresh", command=self.load).pack(side="left")
         ttk.Button(toolbar, text="New Booking", command=self.new_booking).pack(side="left", padx=(6, 0))
         ttk.Button(toolbar, text="Generate PDF", command=self.generate_pdf).pack(side="left", padx=(6, 0))
+        ttk.Button(toolbar, text="Generate Documents…", command=self.generate_documents).pack(side="left", padx=(6, 0))
         ttk.Button(toolbar, text="Edit", command=self.edit_booking).pack(side="left", padx=(6, 0))
         ttk.Button(toolbar, text="Delete", command=self.delete_booking).pack(side="left", padx=(6, 0))
         ttk.Button(toolbar, text="Toggle Delivered", command=self.toggle_delivered).pack(side="left", padx=(6, 0))
+        self.more_btn = ttk.Button(toolbar, text="Load more", command=lambda: self.pager.more())
+        self.more_btn.pack(side="right", padx=6)
+        self.page_info = ttk.Label(toolbar, text="")
+        self.page_info.pack(side="right", padx=6)
+
+        # booking_date range, with the money totals of every booking in it
+        self._dates = (None, None)
+        period = ttk.Frame(self)
+        period.pack(fill="x", padx=6)
+        DateRangeBar(period, on_change=self.set_dates).pack(side="left")
+        self.totals = ttk.Label(period, text="")
+        self.totals.pack(side="right")
 
         # Added 'delivered' column at the end
         self.cols = (
@@ -99,7 +71,10 @@ class BookingFrame(tk.Frame):
         )
 
         # Use scrollable wrapper instead of raw Treeview
-        scroll = ScrollableTreeview(self, columns=self.cols, show="headings", selectmode="browse")
+        # older bookings are paged in as the list is scrolled to the bottom
+        scroll = ScrollableTreeview(self, columns=self.cols, show="headings", selectmode="extended",
+                                    on_end=lambda: self.pager.more())
+        self.scroll = scroll
         self.tree = scroll.get_tree()
 
         for c in self.cols:
@@ -114,26 +89,96 @@ class BookingFrame(tk.Frame):
         # Pack wrapper (not tree directly)
         scroll.pack(fill="both", expand=True)
 
+        # only some pages are loaded: headings re-query, ordered by an indexed column
+        self._sort = ()
+        scroll.enable_sorting(server=(PAGE_SORTS["bookings"], self.set_sort))
+
         # Double click to edit (same as Edit button)
         self.tree.bind("<Double-1>", lambda e: self.edit_booking())
 
+        self.pager = PagedLoader(self.worker, self.db, self._fetch, self._show_rows, scroll=self.scroll)
         self.load()
 
+    def _fetch(self, db, after, limit):
+        return db.page_bookings(after, limit, *self._dates, order=self._sort[0] if self._sort else None)
+
     def load(self):
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        self._rows.clear()
-
-        rows = self.db.list_bookings()
-        for row in rows:
-            d = dict(row)
-            # normalize delivered display
-            delivered_flag = d.get("delivered", 0)
-            d["delivered"] = "Yes" if int(delivered_flag or 0) else "No"
-            self._rows[d["id"]] = d
-            # ensure tuple order matches self.cols
-            values = tuple(d.get(c, "") for c in self.cols)
-            self.tree.insert("", "end", iid=str(d["id"]), values=values)
+        # keeps the pages already scrolled in
+        self.pager.reset(keep=True)
+        self.load_totals()
+
+    def set_dates(self, date_from, date_to):
+        self._dates = (date_from, date_to)
+        self.pager.reset()
+        self.load_totals()
+
+    def set_sort(self, sort):
+        self._sort = sort
+        self.pager.reset()
+
+    def load_totals(self):
+        date_from, date_to = self._dates
+        fetch = lambda db: db.period_totals("bookings", date_from, date_to)
+        if self.worker is None:
+            self._show_totals(fetch(self.db))
+        else:
+            self.worker.read(fetch, on_done=self._show_totals, key=self.totals)
+
+    def _show_totals(self, t):
+        self.totals.configure(
+            text=f"{t['count']} bookings   Total {format_money(t['total_amount'])}   "
+                 f"Advance {format_money(t['advance'])}   Balance {format_money(t['balance'])}")
+
+    def _show_rows(self, rows):
+        self._rows.replace(rows)
+        self.scroll.sync_rows(self._rows.tree_rows(self.cols, self._formats))
+        more = self.pager.has_more
+        self.page_info.configure(text=f"{len(self._rows)} bookings" + (" (scroll for older)" if more else ""))
+        self.more_btn.configure(state="normal" if more else "disabled")
+
+    def reveal(self, row_id):
+        """Select booking `row_id` (a search hit), reading it in if the pages loaded lack it."""
+        self.scroll.reveal(row_id, on_missing=self._load_row)
+
+    def _load_row(self, iid):
+        # older than the pages loaded, or outside the dates: listed after them until the next load
+        columns = self._rows.columns
+        load_async(self.worker, self.db, lambda db: db.get_rows("bookings", [int(iid)], columns),
+                   self._add_row)
+
+    def _add_row(self, rows):
+        if not rows:
+            messagebox.showinfo("Not found", "This booking no longer exists.")
+            return
+        self._rows.extend(rows)
+        self.scroll.sync_rows(self._rows.tree_rows(self.cols, self._formats))
+        self.scroll.select(rows[0]["id"])
+
+    def apply_changes(self, changes):
+        """
+        Patch the loaded bookings that `changes` (FrameRegistry.notify)
+        updated or deleted, re-reading just those, and the period totals;
+        False when the screen must reload.
+        """
+        ids = patchable_ids(changes, "bookings", self._rows)
+        if ids is None:
+            return False
+        columns = self._rows.columns
+        load_async(self.worker, self.db, lambda db: db.get_rows("bookings", ids, columns),
+                   lambda rows: self._patch_rows(rows, ids))
+        self.load_totals()
+        return True
+
+    def _patch_rows(self, rows, ids):
+        # booking_date places a row in the pages and the date range
+        keys = {"booking_date", self._sort[0][0] if self._sort else "booking_date"}
+        if any(row[k] != self._rows[row["id"]][k] for row in rows if row["id"] in self._rows for k in keys):
+            self.load()
+            return
+        self.pager.patch(rows, ids)
+        dropped = self._rows.patch(rows, ids)
+        self.scroll.patch_rows(self._rows.tree_rows(self.cols, self._formats, ids), dropped)
+        self.page_info.configure(text=f"{len(self._rows)} bookings" + (" (scroll for older)" if self.pager.has_more else ""))
 
     # -------------------
     # Toolbar actions
@@ -151,55 +196,55 @@ class BookingFrame(tk.Frame):
         if not row:
             return
         try:
-            # ensure we pass raw delivered numeric form to writer (DB value)
-            db_row_cur = self.db.conn.cursor()
-            db_row_cur.execute("SELECT * FROM bookings WHERE id = ?", (row["id"],))
-            db_row = db_row_cur.fetchone()
-            data = dict(db_row) if db_row else row
-            out_pdf = os.path.join(BOOKINGS_DIR, f"booking_{data.get('booking_no', row.get('booking_no'))}.pdf")
-            _write_pdf_on_template(out_pdf, data)
+            # the cached row holds the DB values (delivered as 0/1)
+            data = dict(row)
+            out_pdf = os.path.join(BOOKINGS_DIR, f"booking_{data.get('booking_no')}.pdf")
+            stamping.render_to_file("booking", data, out_pdf)
             webbrowser.open("file://" + os.path.abspath(out_pdf))
             messagebox.showinfo("PDF Generated", f"Saved: {out_pdf}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate PDF: {e}")
 
+    def generate_documents(self):
+        """Booking letters for the selected bookings or a date range, in one go."""
+        def selected_rows():
+            return [self._rows[int(i)] for i in self.tree.selection() if int(i) in self._rows]
+
+        BatchDocsDialog(
+            self, self.db, self.worker,
+            kinds={"Booking letters": booking_jobs},
+            selected_rows=selected_rows,
+            rows_between=lambda db, date_from, date_to: db.list_bookings_between(date_from, date_to),
+            out_dir=BOOKINGS_DIR,
+        )
+
     def edit_booking(self):
         row = self.get_selected()
         if not row:
             return
-        # fetch full DB row (to get numeric delivered etc)
-        cur = self.db.conn.cursor()
-        cur.execute("SELECT * FROM bookings WHERE id = ?", (row["id"],))
-        dbrow = cur.fetchone()
-        BookingForm(self, self.db, on_saved=self.load, existing=dict(dbrow) if dbrow else row)
+        BookingForm(self, self.db, existing=dict(row))
 
     def delete_booking(self):
         row = self.get_selected()
         if not row:
             return
         if messagebox.askyesno("Confirm", "Delete this booking?"):
-            cur = self.db.conn.cursor()
-            cur.execute("DELETE FROM bookings WHERE id=?", (row["id"],))
-            self.db.conn.commit()
-            self.load()
+            with self.db.transaction() as cur:
+                cur.execute("DELETE FROM bookings WHERE id=?", (row["id"],))
+                self.db.changed("bookings", row["id"], "delete")
 
     def new_booking(self):
-        BookingForm(self, self.db, on_saved=self.load)
+        BookingForm(self, self.db)
 
     def toggle_delivered(self):
         """Toggle delivered flag for the selected booking (0/1)."""
         row = self.get_selected()
         if not row:
             return
-        # fetch numeric delivered from DB (in case displayed 'Yes'/'No')
-        cur = self.db.conn.cursor()
-        cur.execute("SELECT delivered FROM bookings WHERE id = ?", (row["id"],))
-        r = cur.fetchone()
-        current = int(r["delivered"]) if r and r["delivered"] is not None else 0
-        new_val = 0 if current else 1
+        # the cached row holds the DB value (0/1), not the displayed Yes/No
+        new_val = 0 if row["delivered"] else 1
         try:
             self.db.toggle_booking_delivered(row["id"], new_val)
-            self.load()
             messagebox.showinfo("Updated", f"Booking marked as {'delivered' if new_val else 'not delivered'}.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update delivered status: {e}")
@@ -278,9 +323,9 @@ class BookingForm(tk.Toplevel):
         self.vars["model_var"].set(row.get("model") or "")
         self.vars["colour_var"].set(row.get("colour") or "")
         self.vars["specs_var"].set(row.get("specifications") or "")
-        self.vars["total_amount_var"].set(row.get("total_amount") or "")
-        self.vars["advance_var"].set(row.get("advance") or "")
-        self.vars["balance_var"].set(row.get("balance") or "")
+        self.vars["total_amount_var"].set(money_text(row.get("total_amount")))
+        self.vars["advance_var"].set(money_text(row.get("advance")))
+        self.vars["balance_var"].set(money_text(row.get("balance")))
         self.vars["delivery_var"].set(row.get("delivery_date") or "")
         self.delivered_var.set(int(row.get("delivered") or 0))
 
@@ -295,9 +340,9 @@ class BookingForm(tk.Toplevel):
             "model": self.vars["model_var"].get().strip(),
             "colour": self.vars["colour_var"].get().strip(),
             "specifications": self.vars["specs_var"].get().strip(),
-            "total_amount": float(self.vars["total_amount_var"].get() or 0),
-            "advance": float(self.vars["advance_var"].get() or 0),
-            "balance": float(self.vars["balance_var"].get() or 0),
+            "total_amount": to_paisa(self.vars["total_amount_var"].get()),
+            "advance": to_paisa(self.vars["advance_var"].get()),
+            "balance": to_paisa(self.vars["balance_var"].get()),
             "delivery_date": self.vars["delivery_var"].get().strip(),
             "delivered": int(self.delivered_var.get() or 0),
         }
@@ -307,20 +352,20 @@ class BookingForm(tk.Toplevel):
         try:
             if self.existing:
                 # Update existing record
-                cur = self.db.conn.cursor()
-                cur.execute("""
-                    UPDATE bookings
-                    SET booking_date=?, name=?, so=?, cnic=?, phone=?, brand=?, model=?, colour=?,
-                        specifications=?, total_amount=?, advance=?, balance=?, delivery_date=?, delivered=?
-                    WHERE id=?
-                """, (
-                    data["booking_date"], data["name"], data["so"], data["cnic"], data["phone"],
-                    data["brand"], data["model"], data["colour"], data["specifications"],
-                    data["total_amount"], data["advance"], data["balance"], data["delivery_date"],
-                    data["delivered"],
-                    self.existing["id"]
-                ))
-                self.db.conn.commit()
+                with self.db.transaction() as cur:
+                    cur.execute("""
+                        UPDATE bookings
+                        SET booking_date=?, name=?, so=?, cnic=?, phone=?, brand=?, model=?, colour=?,
+                            specifications=?, total_amount=?, advance=?, balance=?, delivery_date=?, delivered=?
+                        WHERE id=?
+                    """, (
+                        iso_date(data["booking_date"]), data["name"], data["so"], data["cnic"], data["phone"],
+                        data["brand"], data["model"], data["colour"], data["specifications"],
+                        data["total_amount"], data["advance"], data["balance"], iso_date(data["delivery_date"]),
+                        data["delivered"],
+                        self.existing["id"]
+                    ))
+                    self.db.changed("bookings", self.existing["id"])
                 booking_no = self.existing["booking_no"]
             else:
                 # Insert new record; DB.add_booking returns booking_no
@@ -331,7 +376,7 @@ class BookingForm(tk.Toplevel):
 
             # Auto-save PDF
             out_pdf = os.path.join(BOOKINGS_DIR, f"booking_{booking_no}.pdf")
-            _write_pdf_on_template(out_pdf, data)
+            stamping.render_to_file("booking", data, out_pdf)
 
             messagebox.showinfo("Saved", f"Booking saved!\nBooking No: {booking_no}")
             if self.on_saved:
@@ -357,7 +402,7 @@ class BookingForm(tk.Toplevel):
                 filetypes=[("PDF files", "*.pdf")]
             )
             if save_path:
-                _write_pdf_on_template(save_path, data)
+                stamping.render_to_file("booking", data, save_path)
                 webbrowser.open("file://" + os.path.abspath(save_path))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save/generate PDF: {e}")
@@ -0,0 +1,115 @@
+# changes.py
+"""
+Change bus: DB write methods publish what they changed, screens subscribe.
+
+A Change is (entity, id, op): entity is a table name, op "insert", "update"
+or "delete", and id None when a write touched rows it cannot name (a whole
+table rewritten, say). DB.changed() records changes inside a transaction and
+publishes them once it commits; a rollback drops them.
+
+Subscribers get lists of Changes, never one call per row: everything
+published before delivery is coalesced per (entity, id). With a Tk root
+attached, delivery happens on the Tk thread, once per idle cycle for changes
+published there; changes published on DBWorker's threads go out with the
+worker's next poll (DBWorker calls deliver()).
+"""
+import threading
+import traceback
+from typing import NamedTuple, Optional
+
+OPS = ("insert", "update", "delete")
+
+
+class Change(NamedTuple):
+    entity: str
+    id: Optional[int]
+    op: str
+
+
+def coalesce(changes) -> list:
+    """One Change per (entity, id), in first-seen order: the net effect of the ops."""
+    net = {}
+    for change in changes:
+        key = (change.entity, change.id)
+        first = net.get(key)
+        if first is None:
+            net[key] = change
+        elif first.op == "insert" and change.op == "delete":
+            net[key] = None                   # never seen by anyone
+        elif first.op == "insert":
+            continue                          # still a new row
+        elif first.op == "delete" and change.op == "insert":
+            net[key] = change._replace(op="update")
+        else:
+            net[key] = change
+    return [c for c in net.values() if c is not None]
+
+
+def patchable_ids(changes, entity: str, shown):
+    """
+    Ids of the `entity` rows that `changes` updated or deleted, when all of
+    them are among `shown` (the ids a screen has loaded), so the screen can
+    patch those rows in place. None when it should reload instead: an
+    insert (where it goes is the query's business), a change without an id,
+    or a row the screen does not have (it may match the screen's filters now).
+    """
+    ids = set()
+    for change in changes:
+        if change.entity != entity:
+            continue
+        if change.id is None or change.op == "insert" or change.id not in shown:
+            return None
+        ids.add(change.id)
+    return ids
+
+
+class ChangeBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._subscribers = []   # (entities or None for all, fn)
+        self._root = None
+        self._scheduled = False
+
+    def attach(self, tk_root):
+        """Deliver on `tk_root`'s thread (see the module docstring). Without a root, publish() delivers at once."""
+        self._root = tk_root
+
+    def subscribe(self, fn, entities=None):
+        """Call fn(changes) with the changes to `entities` (all when None). Returns an unsubscribe function."""
+        entry = (frozenset(entities) if entities is not None else None, fn)
+        self._subscribers.append(entry)
+        return lambda: self._subscribers.remove(entry)
+
+    def publish(self, changes):
+        changes = list(changes)
+        if not changes:
+            return
+        with self._lock:
+            self._pending.extend(changes)
+            if self._root is None:
+                schedule = False
+            elif threading.current_thread() is threading.main_thread():
+                schedule, self._scheduled = not self._scheduled, True
+            else:
+                return   # DBWorker's poll delivers
+        if self._root is None:
+            self.deliver()
+        elif schedule:
+            self._root.after_idle(self.deliver)
+
+    def deliver(self):
+        """Hand everything published so far to the subscribers (as one coalesced batch)."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._scheduled = False
+        if not pending:
+            return
+        batch = coalesce(pending)
+        for entities, fn in list(self._subscribers):
+            mine = batch if entities is None else [c for c in batch if c.entity in entities]
+            if mine:
+                try:
+                    fn(mine)
+                except Exception:
+                    traceback.print_exc()
@@ -0,0 +1,69 @@
+# column_cache_bench.py
+"""
+Booking hot path check: one statement per call, no schema introspection.
+
+Traces every statement the writer connection runs (in-memory database, so
+reads use it too) while add_booking, list_bookings, page_bookings and
+toggle_booking_delivered are called repeatedly, and reports statements per
+call (BEGIN/COMMIT aside) and microseconds per call. Exits non-zero if a
+call runs more than one statement or any PRAGMA table_info: the column set
+is introspected once per DB (DB.table_columns) and only migrations clear it.
+
+Usage:  python column_cache_bench.py [--calls 2000]
+"""
+import argparse
+import sys
+import time
+
+from db import DB
+
+TX = ("BEGIN", "COMMIT", "ROLLBACK")
+
+
+def traced(db, fn, calls):
+    """(statements per call, PRAGMA statements, microseconds per call) for `calls` runs of fn(i)."""
+    work = pragmas = 0
+    for i in range(calls):
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        try:
+            fn(i)
+        finally:
+            db.conn.set_trace_callback(None)
+        # "-- ..." lines are SQLite's own (FTS/trigger internals), and a
+        # statement is traced again each time it enters a trigger
+        mine = {s for s in statements if not s.startswith("--") and not s.lstrip().upper().startswith(TX)}
+        work += len(mine)
+        pragmas += sum(s.lstrip().upper().startswith("PRAGMA") for s in mine)
+    t = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return work / calls, pragmas, (time.perf_counter() - t) / calls * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--calls", type=int, default=2000)
+    args = ap.parse_args()
+
+    db = DB(":memory:")
+    db.add_booking(name="warm-up")
+    paths = {
+        "add_booking": lambda i: db.add_booking(name=f"Customer {i}", cnic=f"{i:013d}"),
+        "list_bookings": lambda i: db.list_bookings(limit=20),
+        "page_bookings": lambda i: db.page_bookings(limit=20),
+        "toggle_booking_delivered": lambda i: db.toggle_booking_delivered(i % 100 + 1, i % 2),
+    }
+    failed = False
+    for name, fn in paths.items():
+        per_call, pragmas, us = traced(db, fn, args.calls)
+        ok = per_call <= 1 and pragmas == 0
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:26} {per_call:.2f} statements/call  "
+              f"{pragmas} PRAGMA  {us:7.1f} us/call")
+    print("FAIL: a booking path runs extra statements" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
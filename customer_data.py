@@ -3,13 +3,17 @@ from widgets.scrollable_treeview import ScrollableTreeview
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
-from db import DB
+from db import DB, PAGE_SORTS
+from db_worker import PagedLoader, load_async
+from changes import patchable_ids
+from row_cache import RowCache
 
 class CustomerFrame(tk.Frame):
-    def __init__(self, master, db: DB, *args, **kwargs):
+    def __init__(self, master, db: DB, worker=None, *args, **kwargs):
         super().__init__(master, *args, **kwargs)
         self.db = db
-        self._rows = {}
+        self.worker = worker
+        self._rows = RowCache()
         self.build()
 
     def build(self):
@@ -20,12 +24,18 @@ class CustomerFrame(tk.Frame):
         ttk.Button(toolbar, text="Refresh", command=self.load).pack(side="left")
         ttk.Button(toolbar, text="Edit", command=self.edit_selected).pack(side="left", padx=6)
         ttk.Button(toolbar, text="Delete", command=self.delete_selected).pack(side="left", padx=6)
+        self.page_info = ttk.Label(toolbar, text="")
+        self.page_info.pack(side="right", padx=6)
 
         ttk.Label(self, text='Customers', font=('Segoe UI', 14)).pack(pady=6)
 
         # --- Treeview inside scrollable wrapper ---
         self.cols = ('id', 'name', 'so', 'cnic', 'phone', 'address')
-        scroll = ScrollableTreeview(self, columns=self.cols, show="headings", selectmode="browse")
+        # virtual mode: the customer list is unbounded, only visible lines are Tk items;
+        # older customers are paged in as the list is scrolled to the bottom
+        scroll = ScrollableTreeview(self, columns=self.cols, show="headings", selectmode="browse", virtual=True,
+                                    on_end=lambda: self.pager.more())
+        self.scroll = scroll
         self.tree = scroll.get_tree()
 
         for c in self.cols:
@@ -42,30 +52,78 @@ class CustomerFrame(tk.Frame):
         # Pack wrapper instead of tree
         scroll.pack(fill="both", expand=True)
 
+        # only some pages are loaded: headings re-query, ordered by an indexed column
+        self._sort = ()
+        scroll.enable_sorting(server=(PAGE_SORTS["customers"], self.set_sort))
+
         # Double click to edit
         self.tree.bind("<Double-1>", lambda e: self.edit_selected())
 
         # Initial load
+        self.pager = PagedLoader(self.worker, self.db, self._fetch, self._show_rows, scroll=self.scroll)
         self.load()
 
+    def _fetch(self, db, after, limit):
+        return db.page_customers(after, limit, order=self._sort[0] if self._sort else None)
+
     def load(self):
-        # refresh tree
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        self._rows.clear()
-
-        cur = self.db.conn.cursor()
-        cur.execute("SELECT id, name, so, cnic, phone, address FROM customers ORDER BY id DESC")
-        for row in cur.fetchall():
-            d = dict(row)
-            self._rows[d['id']] = d
-            self.tree.insert('', 'end', iid=str(d['id']), values=(
-                d['id'], d.get('name', ''), d.get('so', ''), d.get('cnic', ''), d.get('phone', ''), d.get('address', '')
-            ))
+        self.pager.reset(keep=True)
+
+    def set_sort(self, sort):
+        self._sort = sort
+        self.pager.reset()
+
+    def _show_rows(self, rows):
+        # refresh tree: values are only built for the lines in view
+        self._rows.replace(rows)
+        self.scroll.set_rows(self._rows.source(self.cols))
+        self.page_info.configure(text=f"{len(self._rows)} customers" + (" (scroll for older)" if self.pager.has_more else ""))
+
+    def reveal(self, row_id):
+        """Select customer `row_id` (a search hit), reading it in if the pages loaded lack it."""
+        self.scroll.reveal(row_id, on_missing=self._load_row)
+
+    def _load_row(self, iid):
+        # older than the pages loaded: listed after them until the next load
+        columns = self._rows.columns
+        load_async(self.worker, self.db, lambda db: db.get_rows("customers", [int(iid)], columns),
+                   self._add_row)
+
+    def _add_row(self, rows):
+        if not rows:
+            messagebox.showinfo("Not found", "This customer no longer exists.")
+            return
+        self._rows.extend(rows)
+        self.scroll.set_rows(self._rows.source(self.cols))
+        self.scroll.select(rows[0]["id"])
+
+    def apply_changes(self, changes):
+        """
+        Patch the loaded customers that `changes` (FrameRegistry.notify)
+        updated or deleted, re-reading just those; False when the screen must
+        reload.
+        """
+        ids = patchable_ids(changes, "customers", self._rows)
+        if ids is None:
+            return False
+        columns = self._rows.columns
+        load_async(self.worker, self.db, lambda db: db.get_rows("customers", ids, columns),
+                   lambda rows: self._patch_rows(rows, ids))
+        return True
+
+    def _patch_rows(self, rows, ids):
+        key = self._sort[0][0] if self._sort else "id"
+        if any(row[key] != self._rows[row["id"]][key] for row in rows if row["id"] in self._rows):
+            self.load()
+            return
+        self.pager.patch(rows, ids)
+        self._rows.patch(rows, ids)
+        self.scroll.set_rows(self._rows.source(self.cols))
+        self.page_info.configure(text=f"{len(self._rows)} customers" + (" (scroll for older)" if self.pager.has_more else ""))
 
     # ---------------- Edit / Delete helpers ----------------
     def _get_selected(self):
-        sel = self.tree.selection()
+        sel = self.scroll.selection()
         if not sel:
             return None
         try:
@@ -78,10 +136,7 @@ class CustomerFrame(tk.Frame):
         if not cid:
             messagebox.showwarning("Select", "Please select a customer to edit")
             return
-        # fetch latest data
-        cur = self.db.conn.cursor()
-        cur.execute("SELECT * FROM customers WHERE id = ?", (cid,))
-        row = cur.fetchone()
+        row = self._rows.get(cid)
         if not row:
             messagebox.showerror("Not found", "Selected customer not found in database")
             self.load()
@@ -140,15 +195,14 @@ class CustomerFrame(tk.Frame):
                 return
 
             try:
-                cur = self.db.conn.cursor()
-                cur.execute("""
-                    UPDATE customers
-                    SET name = ?, so = ?, cnic = ?, phone = ?, address = ?
-                    WHERE id = ?
-                """, (name, so, cnic, phone, address, row['id']))
-                self.db.conn.commit()
+                with self.db.transaction() as cur:
+                    cur.execute("""
+                        UPDATE customers
+                        SET name = ?, so = ?, cnic = ?, phone = ?, address = ?
+                        WHERE id = ?
+                    """, (name, so, cnic, phone, address, row['id']))
+                    self.db.changed("customers", row['id'])
                 win.destroy()
-                self.load()
                 messagebox.showinfo("Saved", "Customer updated successfully")
             except sqlite3.IntegrityError as e:
                 # likely unique constraint on cnic
@@ -166,10 +220,9 @@ class CustomerFrame(tk.Frame):
         if not messagebox.askyesno("Confirm", f"Delete customer ID {cid}? This cannot be undone."):
             return
         try:
-            cur = self.db.conn.cursor()
-            cur.execute("DELETE FROM customers WHERE id = ?", (cid,))
-            self.db.conn.commit()
-            self.load()
+            with self.db.transaction() as cur:
+                cur.execute("DELETE FROM customers WHERE id = ?", (cid,))
+                self.db.changed("customers", cid, "delete")
             messagebox.showinfo("Deleted", "Customer deleted successfully")
         except sqlite3.IntegrityError:
             messagebox.showerror("DB Error", "Cannot delete customer due to database constraints.")
@@ -1,15 +1,666 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import datetime
+import functools
+import json
+import os
+import re
+import pathlib
+import queue
+import threading
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from changes import Change, ChangeBus
+from query import Filter
+from search_index import SearchIndex
 
 DB_PATH = "showroom.db"
 
+# Connection profiles, picked with the OW_DB_PROFILE environment variable.
+# "local": WAL, so list queries on other connections/processes never wait for a
+#   writer. Only for a database on a local disk (WAL needs shared memory, so
+#   terminals on one PC are fine, a file on a network share is not).
+# "network": classic rollback journal for a showroom.db on a shared drive,
+#   with a longer busy timeout instead of "database is locked".
+PROFILES = {
+    "local": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -16000,        # KiB
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "network": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 15000,
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+    },
+}
+READ_POOL_SIZE = 3
+PAGE_SIZE = 200
+# indexed columns each paged list can be ordered (and keyset-paged) by; the
+# list screens offer heading-click sorting on these
+PAGE_SORTS = {
+    "sold_bikes": ("sold_at", "brand", "listed_price", "engine_no", "chassis_no", "customer_cnic"),
+    "bookings": ("booking_date", "created_at", "cnic"),
+    "customers": ("id", "cnic"),
+    "accounts": ("entry_date",),
+}
+
+# Dates are stored as ISO-8601 text: timestamps as "YYYY-MM-DD HH:MM:SS" (what
+# CURRENT_TIMESTAMP writes), calendar dates as "YYYY-MM-DD". Both sort
+# correctly as text, so ORDER BY and from/to filters are index range scans.
+# Older rows and forms used day-first formats; these are still accepted.
+DATE_FORMATS = ("%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d-%m-%Y",
+                "%d/%m/%Y %H:%M:%S", "%d/%m/%Y", "%Y/%m/%d", "%d.%m.%Y")
+
+
+def parse_date(value) -> Optional[datetime.datetime]:
+    """A datetime from an ISO-8601 or DATE_FORMATS string (or date/datetime), else None."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    text = str(value or "").strip()
+    if not text:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def iso_timestamp(value):
+    """`value` as "YYYY-MM-DD HH:MM:SS"; unparseable text is returned unchanged."""
+    parsed = parse_date(value)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S") if parsed else value
+
+
+def iso_date(value):
+    """`value` as "YYYY-MM-DD"; unparseable text is returned unchanged."""
+    parsed = parse_date(value)
+    return parsed.strftime("%Y-%m-%d") if parsed else value
+
+
+def _date_range(where: list, params: list, column: str, date_from=None, date_to=None):
+    """Add `column` within the days date_from..date_to (either may be None) to a WHERE list."""
+    if date_from:
+        where.append(f"{column} >= ?")
+        params.append(iso_date(date_from))
+    if date_to:
+        where.append(f"{column} < date(?, '+1 day')")
+        params.append(iso_date(date_to))
+
+
+# Money is stored as INTEGER paisa (1 rupee = 100 paisa), so sums and running
+# totals are exact. DB methods take and return paisa: forms parse what the
+# user typed with to_paisa() and lists/documents show format_money().
+def to_paisa(value) -> int:
+    """Rupees ("1,500.50", 1500, 1500.5, Decimal) as integer paisa; blank is 0.
+
+    Raises ValueError if `value` is not an amount.
+    """
+    if value is None:
+        return 0
+    text = str(value).replace(",", "").strip()
+    if not text:
+        return 0
+    try:
+        rupees = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"{value!r} is not an amount") from None
+    if not rupees.is_finite():
+        raise ValueError(f"{value!r} is not an amount")
+    return int((rupees * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def _split_paisa(paisa):
+    sign = "-" if paisa < 0 else ""
+    rupees, rest = divmod(abs(int(paisa)), 100)
+    return sign, rupees, rest
+
+
+def money_text(paisa) -> str:
+    """Paisa as plain rupees for an entry field: "1500", "1500.50"; None is ""."""
+    if paisa is None or paisa == "":
+        return ""
+    sign, rupees, rest = _split_paisa(paisa)
+    return f"{sign}{rupees}" + (f".{rest:02d}" if rest else "")
+
+
+@functools.lru_cache(maxsize=4096)
+def format_money(paisa) -> str:
+    """Paisa for display: "1,500", "1,500.50"; None is "". The one money formatter."""
+    if paisa is None or paisa == "":
+        return ""
+    sign, rupees, rest = _split_paisa(paisa)
+    return f"{sign}{rupees:,}" + (f".{rest:02d}" if rest else "")
+
+
+# table -> money columns, stored as INTEGER paisa from migration 8 on
+MONEY_COLUMNS = {
+    "inventory": ("listed_price",),
+    "sold_bikes": ("listed_price", "sold_price"),
+    "bookings": ("total_amount", "advance", "balance"),
+    "accounts": ("debit", "credit", "cum_debit", "cum_credit"),
+    "sales_daily": ("revenue", "discount"),
+    "sales_monthly": ("revenue", "discount"),
+}
+
+
+# table -> (date column, money columns) for DB.period_totals
+PERIOD_TOTALS = {
+    "sold_bikes": ("sold_at", ("listed_price", "sold_price")),
+    "bookings": ("booking_date", ("total_amount", "advance", "balance")),
+    "accounts": ("entry_date", ("debit", "credit")),
+}
+
+
+def _apply_profile(conn, profile: dict, readonly: bool = False):
+    for pragma, value in profile.items():
+        if readonly and pragma in ("journal_mode", "synchronous"):
+            continue
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+class ReadPool:
+    """Small pool of read-only connections for list queries (thread-safe)."""
+
+    def __init__(self, path: str, profile: dict, size: int = READ_POOL_SIZE):
+        self.uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+        self.profile = profile
+        self.size = size
+        self._free = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def open(self):
+        """A new read-only connection of the pool's kind, not pooled (the caller closes it)."""
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_profile(conn, self.profile, readonly=True)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._free.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            conn = self.open() if create else self._free.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._free.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._free.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# ---------- MIGRATION STEPS ----------
+# Each step receives a cursor and must be safe on a database created by the
+# current _create_tables (i.e. check before ALTER). Append new steps to
+# MIGRATIONS; never renumber or edit a step that has shipped.
+def _table_columns(cur, table: str) -> set:
+    cur.execute(f"PRAGMA table_info({table})")
+    return {r[1] for r in cur.fetchall()}
+
+
+def _m1_bookings_columns(cur):
+    """Bring older bookings tables up to the current column set."""
+    existing = _table_columns(cur, "bookings")
+    expected = {"booking_no", "booking_date", "name", "so", "cnic", "phone",
+                "brand", "model", "colour", "specifications",
+                "total_amount", "advance", "balance", "delivery_date",
+                "delivered", "created_at"}
+    for col in sorted(expected - existing):
+        if col in ("total_amount", "advance", "balance"):
+            cur.execute(f"ALTER TABLE bookings ADD COLUMN {col} REAL DEFAULT 0")
+        elif col == "delivered":
+            cur.execute(f"ALTER TABLE bookings ADD COLUMN {col} INTEGER DEFAULT 0")
+        else:
+            cur.execute(f"ALTER TABLE bookings ADD COLUMN {col} TEXT")
+
+
+def _m2_sold_bikes_gatepass_at(cur):
+    """Timestamp written by SoldBikesFrame.create_gatepass."""
+    if "gatepass_at" not in _table_columns(cur, "sold_bikes"):
+        cur.execute("ALTER TABLE sold_bikes ADD COLUMN gatepass_at TEXT")
+
+
+def _m3_indexes(cur):
+    """Secondary indexes for the list/sort/join paths."""
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_sold_bikes_sold_at ON sold_bikes(sold_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sold_bikes_inventory_id ON sold_bikes(inventory_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sold_bikes_customer_cnic ON sold_bikes(customer_cnic)",
+        "CREATE INDEX IF NOT EXISTS idx_sold_bikes_chassis_no ON sold_bikes(chassis_no)",
+        "CREATE INDEX IF NOT EXISTS idx_sold_bikes_engine_no ON sold_bikes(engine_no)",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_created_at ON bookings(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_cnic ON bookings(cnic)",
+        "CREATE INDEX IF NOT EXISTS idx_accounts_entry_date ON accounts(entry_date)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_category ON inventory(category)",
+    ):
+        cur.execute(sql)
+    cur.execute("ANALYZE")
+
+
+# Full-text search: one trigram FTS5 table over every searchable entity.
+# rowid = ref_id * 4 + entity code, so triggers can delete by rowid.
+FTS_ENTITIES = {
+    # entity: (code, {fts column: source column})
+    "inventory": (0, {"brand": "brand", "model": "model", "colour": "colour",
+                      "engine_no": "engine_no", "chassis_no": "chassis_no"}),
+    "sold_bikes": (1, {"brand": "brand", "model": "model", "colour": "colour",
+                       "engine_no": "engine_no", "chassis_no": "chassis_no",
+                       "name": "customer_name", "cnic": "customer_cnic",
+                       "phone": "customer_contact"}),
+    "customers": (2, {"name": "name", "cnic": "cnic", "phone": "phone"}),
+    "bookings": (3, {"brand": "brand", "model": "model", "colour": "colour",
+                     "name": "name", "cnic": "cnic", "phone": "phone",
+                     "booking_no": "booking_no"}),
+}
+FTS_COLUMNS = ("brand", "model", "colour", "engine_no", "chassis_no",
+               "name", "cnic", "phone", "booking_no")
+
+
+def _m4_search_fts(cur):
+    """Trigram FTS5 index kept in sync by triggers (skipped if unsupported)."""
+    try:
+        cur.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                entity UNINDEXED, ref_id UNINDEXED, {", ".join(FTS_COLUMNS)},
+                tokenize = 'trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 / trigram (< 3.34): keep LIKE search only
+        return
+
+    cols = ", ".join(("entity", "ref_id") + FTS_COLUMNS)
+    for table, (code, mapping) in FTS_ENTITIES.items():
+        def values(ref):
+            src = [f"{ref}.{mapping[c]}" if c in mapping else "NULL" for c in FTS_COLUMNS]
+            return ", ".join([f"{ref}.id * 4 + {code}", f"'{table}'", f"{ref}.id"] + src)
+
+        insert_new = f"INSERT INTO search_fts (rowid, {cols}) VALUES ({values('new')});"
+        delete_old = f"DELETE FROM search_fts WHERE rowid = old.id * 4 + {code};"
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table}
+            BEGIN {insert_new} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table}
+            BEGIN {delete_old} {insert_new} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table}
+            BEGIN {delete_old} END
+        """)
+        cur.execute(f"DELETE FROM search_fts WHERE rowid % 4 = {code}")
+        cur.execute(f"INSERT INTO search_fts (rowid, {cols}) SELECT {values(table)} FROM {table}")
+
+
+def _fts_match(query: str, column: str = None):
+    """Build an FTS5 MATCH expression for `query`, or None if too short.
+
+    With a column the whole query is one quoted phrase restricted to that
+    column (same substring semantics as LIKE '%q%'). Without one, every
+    whitespace-separated term becomes a phrase and the terms are ANDed.
+    The trigram tokenizer cannot match anything under 3 characters.
+    """
+    def phrase(t):
+        return '"' + t.replace('"', '""') + '"'
+
+    query = (query or "").strip()
+    if column:
+        return f"{column} : {phrase(query)}" if len(query) >= 3 else None
+    terms = [t for t in query.split() if len(t) >= 3]
+    if not terms:
+        return None
+    return " ".join(phrase(t) for t in terms)
+
+
+# (table, source column) -> its search_fts column, for Filter "contains"
+_FTS_SOURCE = {(table, src): fts for table, (_code, mapping) in FTS_ENTITIES.items()
+               for fts, src in mapping.items()}
+
+# Filter columns a table is matched on through another table:
+# table -> {column: (other table, other table's column holding our id)}
+RELATED = {
+    # stock sold to a customer (the old LEFT JOIN behind the CNIC search)
+    "inventory": {"customer_cnic": ("sold_bikes", "inventory_id")},
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _where_text(shape: tuple) -> str:
+    """
+    WHERE text for a Filter shape, built once per shape. Each entry is
+    (related, column, kind, arity): related is None or (other table, link
+    column); arity is the IN list length, or which range bounds are present.
+    Only the shape goes into the text, so the same filters with other values
+    reuse it (and sqlite3's statement cache, which is keyed by the text).
+    """
+    clauses = []
+    for related, col, kind, arity in shape:
+        if kind == "eq":
+            sql = f"{col} = ?"
+        elif kind == "in":
+            sql = f"{col} IN ({', '.join('?' * arity)})" if arity else "0"
+        elif kind == "prefix":
+            # a range over the column's NOCASE index; as case-insensitive as
+            # LIKE 'q%', which could not use it
+            sql = f"{col} COLLATE NOCASE >= ? AND {col} COLLATE NOCASE < ?"
+        elif kind == "ids":
+            sql = "id IN (SELECT value FROM json_each(?))"
+        elif kind == "fts":
+            sql = "id IN (SELECT ref_id FROM search_fts WHERE search_fts MATCH ? AND entity = ?)"
+        elif kind == "like":
+            sql = f"{col} LIKE ?"
+        else:  # "range" / "days": arity = (has low, has high)
+            high = f"{col} < date(?, '+1 day')" if kind == "days" else f"{col} <= ?"
+            sql = " AND ".join(part for part, present in zip((f"{col} >= ?", high), arity) if present)
+        if related:
+            other, link = related
+            sql = f"id IN (SELECT {link} FROM {other} WHERE {sql})"
+        clauses.append(sql)
+    return " AND ".join(clauses)
+
+
+# Sales rollups: per day and per month x brand/model/category, kept current by
+# triggers on sold_bikes, so reports read buckets instead of scanning sales.
+# Sales with an unparseable sold_at land in the '' day / month.
+ROLLUPS = {
+    # table: (period column, period expression over a sold_bikes row)
+    "sales_daily": ("day", "COALESCE(date({r}.sold_at), '')"),
+    "sales_monthly": ("month", "COALESCE(strftime('%Y-%m', {r}.sold_at), '')"),
+}
+ROLLUP_DIMS = ("brand", "model", "category")
+
+
+def _m5_sales_rollups(cur):
+    """Daily/monthly sales rollup tables, triggers and a backfill."""
+    dims = ", ".join(ROLLUP_DIMS)
+    for table, (period, expr) in ROLLUPS.items():
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {period} TEXT NOT NULL,
+                brand TEXT NOT NULL,
+                model TEXT NOT NULL,
+                category TEXT NOT NULL,
+                units INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0,
+                discount REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY ({period}, {dims})
+            ) WITHOUT ROWID
+        """)
+
+        def keys(r):
+            return [expr.format(r=r)] + [f"COALESCE({r}.{d}, '')" for d in ROLLUP_DIMS]
+
+        def key(r):
+            return ", ".join(keys(r))
+
+        def apply(r, sign):
+            # sign is +1 for a sale coming in, -1 for one going out
+            return f"""
+                INSERT INTO {table} ({period}, {dims}, units, revenue, discount)
+                VALUES ({key(r)}, {sign},
+                        {sign} * COALESCE({r}.sold_price, 0),
+                        {sign} * (COALESCE({r}.listed_price, 0) - COALESCE({r}.sold_price, 0)))
+                ON CONFLICT ({period}, {dims}) DO UPDATE SET
+                    units = units + excluded.units,
+                    revenue = revenue + excluded.revenue,
+                    discount = discount + excluded.discount;
+            """
+
+        def prune(r):
+            where = " AND ".join(f"{c} = {v}" for c, v in zip((period,) + ROLLUP_DIMS, keys(r)))
+            return f"DELETE FROM {table} WHERE {where} AND units = 0;"
+
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS sold_bikes_{table}_ai AFTER INSERT ON sold_bikes
+            BEGIN {apply('new', 1)} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS sold_bikes_{table}_au
+            AFTER UPDATE OF sold_at, {dims}, listed_price, sold_price ON sold_bikes
+            BEGIN {apply('old', -1)} {prune('old')} {apply('new', 1)} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS sold_bikes_{table}_ad AFTER DELETE ON sold_bikes
+            BEGIN {apply('old', -1)} {prune('old')} END
+        """)
+
+        cur.execute(f"DELETE FROM {table}")
+        cur.execute(f"""
+            INSERT INTO {table} ({period}, {dims}, units, revenue, discount)
+            SELECT {key('sold_bikes')}, COUNT(*),
+                   TOTAL(sold_price), TOTAL(COALESCE(listed_price, 0) - COALESCE(sold_price, 0))
+            FROM sold_bikes
+            GROUP BY 1, 2, 3, 4
+        """)
+
+
+# Running totals on the ledger: every accounts row carries the cumulative
+# debit and credit up to and including itself in (entry_date, id) order, so
+# the balance at any row or date is one index seek (balance = credit - debit).
+# Appends touch only the new row; a back-dated or edited entry also shifts the
+# rows after it.
+_LEDGER_PREV = """
+    (SELECT p.{col} FROM accounts p
+     WHERE (p.entry_date, p.id) < (new.entry_date, new.id)
+     ORDER BY p.entry_date DESC, p.id DESC LIMIT 1)
+"""
+
+
+def _ledger_shift(ref, sign):
+    """Move every entry after `ref` (old/new) by `ref`'s amounts, times sign."""
+    return f"""
+        UPDATE accounts SET
+            cum_debit = cum_debit {sign} COALESCE({ref}.debit, 0),
+            cum_credit = cum_credit {sign} COALESCE({ref}.credit, 0)
+        WHERE (entry_date, id) > ({ref}.entry_date, {ref}.id);
+    """
+
+
+_LEDGER_SET_NEW = f"""
+    UPDATE accounts SET
+        cum_debit = COALESCE({_LEDGER_PREV.format(col="cum_debit")}, 0) + COALESCE(new.debit, 0),
+        cum_credit = COALESCE({_LEDGER_PREV.format(col="cum_credit")}, 0) + COALESCE(new.credit, 0)
+    WHERE id = new.id;
+"""
+
+
+def _m6_ledger_running_totals(cur):
+    """cum_debit / cum_credit on accounts, kept by triggers, backfilled in order."""
+    cols = _table_columns(cur, "accounts")
+    for col in ("cum_debit", "cum_credit"):
+        if col not in cols:
+            cur.execute(f"ALTER TABLE accounts ADD COLUMN {col} REAL NOT NULL DEFAULT 0")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_accounts_entry_date ON accounts(entry_date)")
+
+    # the triggers only write cum_* columns, so they never fire each other
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS accounts_ledger_ai AFTER INSERT ON accounts
+        BEGIN {_LEDGER_SET_NEW} {_ledger_shift('new', '+')} END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS accounts_ledger_au AFTER UPDATE OF entry_date, debit, credit ON accounts
+        BEGIN {_ledger_shift('old', '-')} {_ledger_shift('new', '+')} {_LEDGER_SET_NEW} END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS accounts_ledger_ad AFTER DELETE ON accounts
+        BEGIN {_ledger_shift('old', '-')} END
+    """)
+
+    cur.execute("""
+        UPDATE accounts SET cum_debit = w.cum_debit, cum_credit = w.cum_credit
+        FROM (
+            SELECT id,
+                   SUM(COALESCE(debit, 0)) OVER (ORDER BY entry_date, id) AS cum_debit,
+                   SUM(COALESCE(credit, 0)) OVER (ORDER BY entry_date, id) AS cum_credit
+            FROM accounts
+        ) AS w
+        WHERE accounts.id = w.id
+    """)
+
+
+# (table, column) -> canonical form
+DATE_COLUMNS = {
+    ("sold_bikes", "sold_at"): iso_timestamp,
+    ("sold_bikes", "gatepass_at"): iso_timestamp,
+    ("bookings", "booking_date"): iso_date,
+    ("bookings", "delivery_date"): iso_date,
+    ("bookings", "created_at"): iso_timestamp,
+    ("accounts", "entry_date"): iso_timestamp,
+}
+
+
+def _m7_iso_dates(cur):
+    """Rewrite every stored date in its ISO-8601 form; index booking_date."""
+    # entry_date edits would shift the running totals row by row: recompute once instead
+    cur.execute("DROP TRIGGER IF EXISTS accounts_ledger_au")
+    for (table, column), canonical in DATE_COLUMNS.items():
+        if column not in _table_columns(cur, table):
+            continue
+        rows = cur.execute(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL").fetchall()
+        changed = []
+        for row_id, value in rows:
+            new = canonical(value)
+            if new != value:
+                changed.append((new, row_id))
+        cur.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?", changed)
+    _m6_ledger_running_totals(cur)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_booking_date ON bookings(booking_date)")
+    cur.execute("ANALYZE")
+
+
+def _money_to_paisa(cur, table: str, columns):
+    """Rebuild `table` with `columns` declared INTEGER and holding rupees * 100.
+
+    SQLite cannot change a column's type in place (and REAL affinity would
+    turn stored integers back into floats), so this is the documented
+    create-copy-drop-rename; indexes and triggers go with the old table.
+    """
+    sql = cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    tmp = f"{table}_paisa"
+    sql = re.sub(r"^CREATE TABLE\s+(IF NOT EXISTS\s+)?\"?\w+\"?", f"CREATE TABLE {tmp}", sql, count=1)
+    for col in columns:
+        sql = re.sub(rf"\b{col}\s+REAL\b", f"{col} INTEGER", sql)
+    cur.execute(sql)
+
+    names = [r[1] for r in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+    values = [
+        # amounts typed with thousands separators may have been kept as text
+        f"CAST(round(CASE WHEN typeof({c}) = 'text' THEN CAST(replace({c}, ',', '') AS REAL)"
+        f" ELSE {c} END * 100) AS INTEGER)" if c in columns else c
+        for c in names
+    ]
+    cur.execute(f"INSERT INTO {tmp} ({', '.join(names)}) SELECT {', '.join(values)} FROM {table}")
+
+    # keep AUTOINCREMENT from reusing the ids of deleted rows
+    seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    cur.execute(f"DROP TABLE {table}")
+    cur.execute(f"ALTER TABLE {tmp} RENAME TO {table}")
+    if seq is not None:
+        cur.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+        cur.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, seq[0]))
+
+
+def _m8_money_paisa(cur):
+    """Money columns to INTEGER paisa; recreate what the rebuilt tables dropped."""
+    for table, columns in MONEY_COLUMNS.items():
+        _money_to_paisa(cur, table, columns)
+    _m3_indexes(cur)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_booking_date ON bookings(booking_date)")
+    _m4_search_fts(cur)
+    _m5_sales_rollups(cur)
+    _m6_ledger_running_totals(cur)
+
+
+def _m9_filter_indexes(cur):
+    """Indexes for the filter panel's brand/status lists and price ranges and sorts."""
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_inventory_brand ON inventory(brand)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_status ON inventory(status)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_listed_price ON inventory(listed_price)",
+        "CREATE INDEX IF NOT EXISTS idx_sold_bikes_brand ON sold_bikes(brand)",
+        "CREATE INDEX IF NOT EXISTS idx_sold_bikes_listed_price ON sold_bikes(listed_price)",
+    ):
+        cur.execute(sql)
+    cur.execute("ANALYZE")
+
+
+def _m10_prefix_indexes(cur):
+    """Case-insensitive indexes for prefix search on engine, chassis and CNIC."""
+    for table, col in (("inventory", "engine_no"), ("inventory", "chassis_no"),
+                       ("sold_bikes", "engine_no"), ("sold_bikes", "chassis_no"),
+                       ("sold_bikes", "customer_cnic")):
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{col}_nocase ON {table}({col} COLLATE NOCASE)")
+
+
+MIGRATIONS = [
+    (1, _m1_bookings_columns),
+    (2, _m2_sold_bikes_gatepass_at),
+    (3, _m3_indexes),
+    (4, _m4_search_fts),
+    (5, _m5_sales_rollups),
+    (6, _m6_ledger_running_totals),
+    (7, _m7_iso_dates),
+    (8, _m8_money_paisa),
+    (9, _m9_filter_indexes),
+    (10, _m10_prefix_indexes),
+]
+
 
 class DB:
-    def __init__(self, path: str = DB_PATH):
+    def __init__(self, path: str = DB_PATH, profile: dict = None):
+        self.path = path
+        self.profile = profile or PROFILES[os.environ.get("OW_DB_PROFILE", "local")]
+        # the single writer connection: every write goes through transaction()
         self.conn = sqlite3.connect(path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        _apply_profile(self.conn, self.profile)
+        self.write_lock = threading.RLock()
+        self._tx_depth = 0
+        # (entity, id, op) of every committed write, for the screens showing them
+        self.changes = ChangeBus()
+        self._tx_changes = []   # recorded by changed(), published on commit
+        self._tx_index = []     # recorded by indexed(), applied to search_index on commit
+        self._tx_start = 0      # conn.total_changes when the transaction began
+        # read-only connections for list queries (none for in-memory databases)
+        self.reads = ReadPool(path, self.profile) if path != ":memory:" else None
+        # table name -> frozenset of column names; filled lazily by
+        # table_columns() and cleared whenever _migrate() changes the schema
+        self._columns = {}
         self._create_tables()
+        self._migrate()
+        # engine/chassis/CNIC prefixes for search-as-you-type; built by the app
+        # off the Tk thread, kept current by the write methods below as their
+        # transactions commit
+        self.search_index = SearchIndex(self)
 
     def _create_tables(self):
         c = self.conn.cursor()
@@ -36,7 +687,7 @@ class DB:
                 capacity TEXT,
                 engine_no TEXT UNIQUE,
                 chassis_no TEXT UNIQUE,
-                listed_price REAL,
+                listed_price INTEGER,
                 status TEXT
             )
         """)
@@ -54,7 +705,7 @@ class DB:
                 capacity TEXT,
                 engine_no TEXT,
                 chassis_no TEXT,
-                listed_price REAL,
+                listed_price INTEGER,
                 status TEXT,
                 customer_name TEXT,
                 customer_so TEXT,
@@ -63,7 +714,7 @@ class DB:
                 customer_address TEXT,
                 gate_pass TEXT,
                 documents_delivered TEXT,
-                sold_price REAL,
+                sold_price INTEGER,
                 invoice_no TEXT,
                 sold_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (inventory_id) REFERENCES inventory(id)
@@ -97,9 +748,9 @@ class DB:
                 model TEXT,
                 colour TEXT,
                 specifications TEXT,
-                total_amount REAL DEFAULT 0,
-                advance REAL DEFAULT 0,
-                balance REAL DEFAULT 0,
+                total_amount INTEGER DEFAULT 0,
+                advance INTEGER DEFAULT 0,
+                balance INTEGER DEFAULT 0,
                 delivery_date TEXT,
                 delivered INTEGER DEFAULT 0,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP
@@ -115,69 +766,401 @@ class DB:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 entry_date TEXT DEFAULT CURRENT_TIMESTAMP,
                 description TEXT,
-                debit REAL DEFAULT 0,
-                credit REAL DEFAULT 0
+                debit INTEGER DEFAULT 0,
+                credit INTEGER DEFAULT 0
+            )
+        """)
+
+        # Schema version (one row, bumped by _migrate)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER NOT NULL
             )
         """)
 
         self.conn.commit()
 
+    # ---------- MIGRATIONS ----------
+    def _migrate(self):
+        """Run every migration step newer than the stored schema_version.
+
+        Each step runs in its own transaction together with the version bump,
+        so a crash mid-way leaves the database at the last completed step.
+        """
+        cur = self.conn.cursor()
+        cur.execute("SELECT version FROM schema_version")
+        row = cur.fetchone()
+        if row is None:
+            cur.execute("INSERT INTO schema_version (version) VALUES (0)")
+            self.conn.commit()
+            current = 0
+        else:
+            current = row["version"]
+
+        for version, step in MIGRATIONS:
+            if version <= current:
+                continue
+            self._columns.clear()
+            try:
+                cur.execute("BEGIN")
+                step(cur)
+                cur.execute("UPDATE schema_version SET version = ?", (version,))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    # ---------- CONNECTIONS ----------
+    @contextmanager
+    def transaction(self):
+        """Run writes on the writer connection, serialized across threads.
+
+        Commits when the outermost block exits, rolls back on error; nested
+        blocks join the enclosing transaction.
+        """
+        with self.write_lock:
+            if self._tx_depth == 0:
+                self._tx_start = self.conn.total_changes
+            self._tx_depth += 1
+            cur = self.conn.cursor()
+            try:
+                yield cur
+            except BaseException:
+                self._tx_depth -= 1
+                if self._tx_depth == 0:
+                    self.conn.rollback()
+                    self._tx_changes = []
+                    self._tx_index = []
+                raise
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self._commit()
+                changes, self._tx_changes = self._tx_changes, []
+                self.changes.publish(changes)
+
+    def _commit(self):
+        """Commit the writer's transaction; the search index follows what it recorded."""
+        index_changes, self._tx_index = self._tx_index, []
+        if not index_changes:
+            self.conn.commit()
+        elif self.reads is None:
+            # in memory: this connection is the only one, and counts its own changes
+            self.conn.commit()
+            self.search_index.apply(self._tx_start, index_changes, self.conn.total_changes)
+        else:
+            # the transaction's write lock keeps other connections from
+            # committing until this one has; the writer's data_version moves
+            # only if one commits before `after` is read
+            before = self.search_index.version()
+            others = self._data_version()
+            self.conn.commit()
+            after = self.search_index.version()
+            self.search_index.apply(before, index_changes, after if self._data_version() == others else None)
+
+    def _data_version(self):
+        """PRAGMA data_version of the writer: moves only when another connection commits."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def indexed(self, table: str, row_id: int, old=None, new=None):
+        """
+        Record this transaction's change to an indexed row for search_index
+        (old / new: {column: value}, None for an insert / a delete); applied
+        once it commits.
+        """
+        self._tx_index.append((table, row_id, old, new))
+
+    def changed(self, entity: str, row_id=None, op: str = "update"):
+        """
+        Record that this transaction changed row `row_id` of `entity` (None: rows
+        it cannot name); published on self.changes once it commits. Every write
+        made outside the methods below (a dialog's own UPDATE) should say so too.
+        """
+        self._tx_changes.append(Change(entity, row_id, op))
+        if self._tx_depth == 0:
+            changes, self._tx_changes = self._tx_changes, []
+            self.changes.publish(changes)
+
+    @contextmanager
+    def reader(self):
+        """A connection for read-only queries (pooled, never blocked by the writer in WAL)."""
+        if self.reads is None:
+            yield self.conn
+        else:
+            with self.reads.connection() as conn:
+                yield conn
+
+    def close(self):
+        self.search_index.close()
+        if self.reads is not None:
+            self.reads.close()
+        self.conn.close()
+
+    def table_columns(self, table: str) -> frozenset:
+        """Column names of `table`, introspected once per DB instance."""
+        cols = self._columns.get(table)
+        if cols is None:
+            cols = frozenset(_table_columns(self.conn.cursor(), table))
+            self._columns[table] = cols
+        return cols
+
+    def _keyset_page(self, sql, where, params, key, after, limit, desc=True):
+        """
+        One page of `sql` (a SELECT without WHERE/ORDER BY) newest first.
+
+        Rows are ordered by (key, id) DESC (ASC with desc=False), or by id
+        when key is None, and the page starts right after the cursor `after`
+        taken from the previous page. Seeks go through the key's index, so
+        every page costs the same however deep it is. Rows with a NULL key
+        (older databases) come last, by id. Returns (rows, cursor of the next
+        page, or None at the end).
+        """
+        past, order = ("<", "DESC") if desc else (">", "ASC")
+        def run(conn, extra, extra_params, order, n):
+            clauses = where + extra
+            q = sql
+            if clauses:
+                q += " WHERE " + " AND ".join(clauses)
+            q += f" ORDER BY {order} LIMIT ?"
+            return conn.execute(q, params + extra_params + [n]).fetchall()
+
+        with self.reader() as conn:
+            if key is None:
+                rows = run(conn, [f"id {past} ?"] if after else [], list(after or ()), f"id {order}", limit + 1)
+            else:
+                rows = []
+                if after is None or after[0] is not None:
+                    seek = [f"({key}, id) {past} (?, ?)"] if after else [f"{key} IS NOT NULL"]
+                    rows = run(conn, seek, list(after or ()), f"{key} {order}, id {order}", limit + 1)
+                if len(rows) <= limit:
+                    seek, seek_params = [f"{key} IS NULL"], []
+                    if after is not None and after[0] is None:
+                        seek.append(f"id {past} ?")
+                        seek_params.append(after[1])
+                    rows += run(conn, seek, seek_params, f"id {order}", limit + 1 - len(rows))
+
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, ((last["id"],) if key is None else (last[key], last["id"]))
+
+    def get_rows(self, table: str, ids, columns=None) -> List[sqlite3.Row]:
+        """
+        `columns` (default all) of the `table` rows with these ids, in no
+        particular order; ids without a row are skipped. A screen re-reads
+        the rows a change touched with it (see changes.py).
+        """
+        known = self.table_columns(table) if table.isidentifier() else frozenset()
+        if not known:
+            raise ValueError(f"Unknown table {table!r}")
+        bad = set(columns or ()) - known
+        if bad:
+            raise ValueError(f"Unknown {table} columns: {sorted(bad)}")
+        with self.reader() as conn:
+            return conn.execute(
+                f"SELECT {', '.join(columns) if columns else '*'} FROM {table} "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(ids)),)).fetchall()
+
+    @staticmethod
+    def _page_order(table, order, default):
+        """(keyset key or None for id, desc) for a page_* order=(column, desc)."""
+        column, desc = order or default
+        if column not in PAGE_SORTS[table]:
+            raise ValueError(f"{table} cannot be paged by {column!r}")
+        return (None if column == "id" else column), bool(desc)
+
     # ---------- USER HELPERS ----------
     def create_user(self, username: str, password_hashed: str, full_name: Optional[str] = None) -> int:
-        c = self.conn.cursor()
-        c.execute(
-            "INSERT INTO users (username, password, full_name) VALUES (?, ?, ?)",
-            (username, password_hashed, full_name),
-        )
-        self.conn.commit()
+        with self.transaction() as c:
+            c.execute(
+                "INSERT INTO users (username, password, full_name) VALUES (?, ?, ?)",
+                (username, password_hashed, full_name),
+            )
+            self.changed("users", c.lastrowid, "insert")
         return c.lastrowid
 
     def get_user(self, username: str):
-        c = self.conn.cursor()
-        c.execute("SELECT * FROM users WHERE username = ?", (username,))
-        return c.fetchone()
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
 
     # ---------- INVENTORY HELPERS ----------
     def add_bike(self, brand, model, colour, variant, category, capacity,
                  engine_no, chassis_no, listed_price, status) -> int:
-        c = self.conn.cursor()
-        c.execute("""
-            INSERT INTO inventory
-            (brand, model, colour, variant, category, capacity,
-             engine_no, chassis_no, listed_price, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (brand, model, colour, variant, category, capacity,
-              engine_no, chassis_no, listed_price, status))
-        self.conn.commit()
+        """Add a bike to stock; listed_price is in paisa (see to_paisa)."""
+        with self.transaction() as c:
+            c.execute("""
+                INSERT INTO inventory
+                (brand, model, colour, variant, category, capacity,
+                 engine_no, chassis_no, listed_price, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (brand, model, colour, variant, category, capacity,
+                  engine_no, chassis_no, listed_price, status))
+            self.indexed("inventory", c.lastrowid, new={"engine_no": engine_no, "chassis_no": chassis_no})
+            self.changed("inventory", c.lastrowid, "insert")
         return c.lastrowid
 
-    def list_inventory(self, filters: dict = None) -> List[sqlite3.Row]:
-        filters = filters or {}
+    def add_bikes(self, rows) -> Tuple[int, List[Tuple[int, str, str]]]:
+        """Insert many inventory rows (tuples in add_bike's argument order).
+
+        Rows whose engine_no or chassis_no is already in stock, or repeats an
+        earlier row of the same call, are skipped rather than aborting the
+        rest. Returns (inserted, conflicts) with conflicts as
+        (row index, column, value). Call it inside transaction() to make
+        several batches one commit.
+        """
+        rows = list(rows)
+        with self.transaction() as cur:
+            taken = {"engine_no": set(), "chassis_no": set()}
+            for col, pos in (("engine_no", 6), ("chassis_no", 7)):
+                values = [r[pos] for r in rows]
+                for i in range(0, len(values), 500):
+                    part = values[i:i + 500]
+                    cur.execute(
+                        f"SELECT {col} FROM inventory WHERE {col} IN ({', '.join('?' * len(part))})",
+                        part,
+                    )
+                    taken[col].update(v for (v,) in cur.fetchall())
+
+            clean, conflicts = [], []
+            for i, r in enumerate(rows):
+                for col, pos in (("engine_no", 6), ("chassis_no", 7)):
+                    if r[pos] in taken[col]:
+                        conflicts.append((i, col, r[pos]))
+                        break
+                else:
+                    taken["engine_no"].add(r[6])
+                    taken["chassis_no"].add(r[7])
+                    clean.append(r)
+
+            # Multi-row INSERTs rather than executemany: FTS5 flushes its pending
+            # index data at every statement, so one statement per row through
+            # the inventory_fts_ai trigger is ~4x slower. 99 rows x 10 columns
+            # stays under the 999-variable limit of older SQLite builds.
+            for i in range(0, len(clean), 99):
+                part = clean[i:i + 99]
+                cur.execute(
+                    "INSERT INTO inventory (brand, model, colour, variant, category, capacity,"
+                    " engine_no, chassis_no, listed_price, status) VALUES "
+                    + ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(part))
+                    + " RETURNING id, engine_no, chassis_no",
+                    [v for r in part for v in r],
+                )
+                for r in cur.fetchall():
+                    self.indexed("inventory", r["id"], new=dict(r))
+                    self.changed("inventory", r["id"], "insert")
+        return len(clean), conflicts
+
+    def list_inventory(self, filters: Filter = None) -> List[sqlite3.Row]:
+        """Stock matching `filters` (a query.Filter), in its sort order, else newest first."""
+        where, params, flt = self._where("inventory", filters)
         q = "SELECT * FROM inventory"
-        where = []
-        params = []
-        if "category" in filters and filters["category"]:
-            where.append("category LIKE ?")
-            params.append("%" + filters["category"] + "%")
-        if "chassis_no" in filters and filters["chassis_no"]:
-            where.append("chassis_no LIKE ?")
-            params.append("%" + filters["chassis_no"] + "%")
-        if "engine_no" in filters and filters["engine_no"]:
-            where.append("engine_no LIKE ?")
-            params.append("%" + filters["engine_no"] + "%")
-        if "customer_cnic" in filters and filters["customer_cnic"]:
-            q = """
-                SELECT i.* FROM inventory i
-                LEFT JOIN sold_bikes s ON s.inventory_id = i.id
-            """
-            where.append("s.customer_cnic LIKE ?")
-            params.append("%" + filters["customer_cnic"] + "%")
         if where:
-            q += " WHERE " + " AND ".join(where)
-        q += " ORDER BY id DESC"
-        c = self.conn.cursor()
-        c.execute(q, params)
-        return c.fetchall()
+            q += " WHERE " + where
+        order = [f"{col} {'DESC' if desc else 'ASC'}" for col, desc in flt.sort]
+        q += " ORDER BY " + ", ".join(order + ["id DESC"])
+        with self.reader() as conn:
+            return conn.execute(q, params).fetchall()
+
+    # ---------- FILTERS ----------
+    def _where(self, table: str, flt: Filter = None):
+        """
+        (WHERE text or "", params, the Filter as applied) for a query.Filter on
+        `table`. Conditions and sort keys on columns the table does not have
+        (nor reaches through RELATED) are dropped, so one Filter can drive
+        both the stock and the sold lists.
+
+          prefix    a range over the column's NOCASE index; ids from search_index
+                    when it is current for the column (search-as-you-type)
+          contains  search_fts when it indexes the column and the text is
+                    long enough for trigrams, else LIKE '%text%'
+          range     on DATE_COLUMNS the bounds are whole days
+        """
+        columns = self.table_columns(table)
+        related = RELATED.get(table, {})
+        flt = (flt or Filter()).restrict(columns | set(related))
+        flt = Filter(flt.conds, [s for s in flt.sort if s[0] in columns])
+        shape, params = [], []
+        for column, op, value in flt.conds:
+            via = related.get(column) if column not in columns else None
+            target = via[0] if via else table
+            if op == "eq":
+                kind, args = "eq", [value]
+            elif op == "in":
+                kind, args = "in", list(value)
+            elif op == "prefix":
+                ids = self.search_index.lookup(target, column, value)
+                if ids is not None:
+                    kind, args = "ids", [json.dumps(ids)]
+                else:
+                    kind, args = "prefix", [value, value + "\U0010ffff"]
+            elif op == "contains":
+                fts = _FTS_SOURCE.get((target, column))
+                match = _fts_match(value, fts) if fts and self.has_fts else None
+                kind, args = ("fts", [match, target]) if match else ("like", ["%" + value + "%"])
+            elif op == "range":
+                days = (target, column) in DATE_COLUMNS
+                kind = "days" if days else "range"
+                args = [iso_date(v) if days else v for v in value if v is not None]
+                shape.append((via, column, kind, tuple(v is not None for v in value)))
+                params.extend(args)
+                continue
+            else:
+                raise ValueError(f"Unknown filter operator {op!r}")
+            shape.append((via, column, kind, len(args) if kind == "in" else None))
+            params.extend(args)
+        return _where_text(tuple(shape)), params, flt
+
+    # ---------- SEARCH ----------
+    @property
+    def has_fts(self) -> bool:
+        return bool(self.table_columns("search_fts"))
+
+    def search_all(self, query: str, limit: int = 200) -> List[sqlite3.Row]:
+        """Ranked hits across inventory, sold bikes, customers and bookings.
+
+        Rows carry entity, ref_id and the indexed columns. Queries shorter
+        than the trigram size fall back to an (unranked) LIKE scan.
+        """
+        if not self.has_fts:
+            return self._search_all_like(query, limit)
+        cols = ", ".join(("entity", "ref_id") + FTS_COLUMNS)
+        match = _fts_match(query)
+        if match:
+            q = f"""
+                SELECT {cols} FROM search_fts
+                WHERE search_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """
+            params = (match, limit)
+        else:
+            like = "%" + (query or "").strip() + "%"
+            q = f"""
+                SELECT {cols} FROM search_fts
+                WHERE {" OR ".join(f"{col} LIKE ?" for col in FTS_COLUMNS)}
+                ORDER BY rowid DESC
+                LIMIT ?
+            """
+            params = [like] * len(FTS_COLUMNS) + [limit]
+        with self.reader() as conn:
+            return conn.execute(q, params).fetchall()
+
+    def _search_all_like(self, query: str, limit: int) -> List[sqlite3.Row]:
+        """search_all without FTS5: one UNION ALL of LIKE scans."""
+        like = "%" + (query or "").strip() + "%"
+        parts, params = [], []
+        for table, (_code, mapping) in FTS_ENTITIES.items():
+            select = ", ".join(
+                [f"'{table}' AS entity", "id AS ref_id"]
+                + [f"{mapping[col]} AS {col}" if col in mapping else f"NULL AS {col}"
+                   for col in FTS_COLUMNS]
+            )
+            cond = " OR ".join(f"{src} LIKE ?" for src in mapping.values())
+            parts.append(f"SELECT {select} FROM {table} WHERE {cond}")
+            params.extend([like] * len(mapping))
+        with self.reader() as conn:
+            return conn.execute(" UNION ALL ".join(parts) + " LIMIT ?", params + [limit]).fetchall()
 
 
     # ---------- SOLD BIKES HELPERS ----------
@@ -192,7 +1175,7 @@ class DB:
         capacity: str = "",
         engine_no: str = "",
         chassis_no: str = "",
-        listed_price: float = 0.0,
+        listed_price: int = 0,
         status: str = "sold",
         customer_name: str = "",
         customer_so: str = "",
@@ -201,12 +1184,11 @@ class DB:
         customer_address: str = "",
         gate_pass: str = "",
         documents_delivered: str = "",
-        sold_price: float = 0.0,
+        sold_price: int = 0,
         invoice_no: str = "",
         sold_at: str = None,
     ) -> int:
-        """Insert a sold_bikes snapshot, keeping column order safe."""
-        cur = self.conn.cursor()
+        """Insert a sold_bikes snapshot, keeping column order safe (prices in paisa)."""
         cols = [
             "inventory_id", "brand", "model", "colour", "variant", "category",
             "capacity", "engine_no", "chassis_no", "listed_price", "status",
@@ -219,80 +1201,225 @@ class DB:
             capacity, engine_no, chassis_no, listed_price, status,
             customer_name, customer_so, customer_cnic, customer_contact,
             customer_address, gate_pass, documents_delivered,
-            sold_price, invoice_no, sold_at
+            sold_price, invoice_no, iso_timestamp(sold_at)
         ]
         placeholders = ", ".join(["?"] * len(cols))
         sql = f"INSERT INTO sold_bikes ({', '.join(cols)}) VALUES ({placeholders})"
-        cur.execute(sql, vals)
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute(sql, vals)
+            self.indexed("sold_bikes", cur.lastrowid, new={
+                "engine_no": engine_no, "chassis_no": chassis_no, "customer_cnic": customer_cnic})
+            self.changed("sold_bikes", cur.lastrowid, "insert")
         return cur.lastrowid
 
+    def sell_bike(
+        self,
+        inventory_id: int,
+        customer_name: str,
+        customer_cnic: str,
+        customer_so: str = "",
+        customer_contact: str = "",
+        customer_address: str = "",
+        gate_pass: str = "",
+        documents_delivered: str = "",
+        sold_price: int = 0,
+        invoice_no: str = "",
+        sold_at: str = None,
+        ledger_description: str = None,
+    ) -> int:
+        """Sell an inventory bike in one transaction and return the sold_bikes id.
+
+        Snapshots the inventory row into sold_bikes, removes it from stock,
+        upserts the customer by CNIC and, when `ledger_description` is given,
+        credits `sold_price` (paisa) to accounts. Either all of it lands or none does.
+        Raises ValueError if the bike is no longer in stock.
+        """
+        with self.transaction() as cur:
+            cur.execute("""
+                INSERT INTO sold_bikes (
+                    inventory_id, brand, model, colour, variant, category, capacity,
+                    engine_no, chassis_no, listed_price, status,
+                    customer_name, customer_so, customer_cnic, customer_contact,
+                    customer_address, gate_pass, documents_delivered,
+                    sold_price, invoice_no, sold_at
+                )
+                SELECT id, brand, model, colour, variant, category, capacity,
+                       engine_no, chassis_no, COALESCE(listed_price, 0), 'sold',
+                       ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP)
+                FROM inventory WHERE id = ?
+                RETURNING id, engine_no, chassis_no, customer_cnic
+            """, (
+                customer_name, customer_so, customer_cnic, customer_contact,
+                customer_address, gate_pass, documents_delivered,
+                sold_price, invoice_no, iso_timestamp(sold_at), inventory_id,
+            ))
+            sold = cur.fetchone()
+            if sold is None:
+                raise ValueError(f"Bike {inventory_id} is no longer in stock")
+            sold_id = sold["id"]
+
+            cur.execute("DELETE FROM inventory WHERE id = ?", (inventory_id,))
+            self.changed("sold_bikes", sold_id, "insert")
+            self.changed("inventory", inventory_id, "delete")
+
+            # blank fields keep what is already on file, like add_or_get_customer
+            cur.execute("""
+                INSERT INTO customers (name, cnic, phone, address, so)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cnic) DO UPDATE SET
+                    name = COALESCE(NULLIF(excluded.name, ''), name),
+                    phone = COALESCE(NULLIF(excluded.phone, ''), phone),
+                    address = COALESCE(NULLIF(excluded.address, ''), address),
+                    so = COALESCE(NULLIF(excluded.so, ''), so)
+                RETURNING id
+            """, (customer_name, customer_cnic, customer_contact, customer_address, customer_so))
+            # new or updated: screens that do not have it yet reload
+            self.changed("customers", cur.fetchone()["id"], "update")
+
+            if ledger_description:
+                cur.execute(
+                    "INSERT INTO accounts (description, debit, credit) VALUES (?, 0, ?)",
+                    (ledger_description, sold_price),
+                )
+                self.changed("accounts", cur.lastrowid, "insert")
+            self.indexed("inventory", inventory_id, old=dict(sold))
+            self.indexed("sold_bikes", sold_id, new=dict(sold))
+        return sold_id
 
-    def list_sold_bikes(self, filters: dict = None, limit=200):
+
+    def list_sold_bikes(self, filters: Filter = None, limit=PAGE_SIZE):
+        """The newest `limit` sold bikes; see page_sold_bikes for the rest."""
+        return self.page_sold_bikes(filters, limit=limit)[0]
+
+    def page_sold_bikes(self, filters: Filter = None, after=None, limit=PAGE_SIZE):
         """
-        List sold bikes with optional filters:
-          - category
-          - chassis_no
-          - engine_no
-          - customer_cnic
+        A page of sold bikes matching `filters` (a query.Filter; see _where),
+        newest sale first. A sort in the filter pages by its first column
+        instead (ties by id; PAGE_SORTS are the indexed ones). `after` is the
+        cursor returned with the previous page. Returns (rows, next cursor or None).
         """
-        filters = filters or {}
-        q = "SELECT * FROM sold_bikes"
-        where = []
-        params = []
-
-        if "category" in filters and filters["category"]:
-            where.append("category LIKE ?")
-            params.append("%" + filters["category"] + "%")
-        if "chassis_no" in filters and filters["chassis_no"]:
-            where.append("chassis_no LIKE ?")
-            params.append("%" + filters["chassis_no"] + "%")
-        if "engine_no" in filters and filters["engine_no"]:
-            where.append("engine_no LIKE ?")
-            params.append("%" + filters["engine_no"] + "%")
-        if "customer_cnic" in filters and filters["customer_cnic"]:
-            where.append("customer_cnic LIKE ?")
-            params.append("%" + filters["customer_cnic"] + "%")
+        where, params, flt = self._where("sold_bikes", filters)
+        key, desc = flt.sort[0] if flt.sort else ("sold_at", True)
+        return self._keyset_page("SELECT * FROM sold_bikes", [where] if where else [], params,
+                                 key, after, limit, desc=desc)
 
-        if where:
-            q += " WHERE " + " AND ".join(where)
 
-        q += " ORDER BY sold_at DESC LIMIT ?"
-        params.append(limit)
+    def list_sold_bikes_between(self, date_from: str, date_to: str) -> List[sqlite3.Row]:
+        """Sold bikes with sold_at on the days date_from..date_to (YYYY-MM-DD), oldest first."""
+        where, params = [], []
+        _date_range(where, params, "sold_at", date_from, date_to)
+        with self.reader() as conn:
+            return conn.execute(
+                f"SELECT * FROM sold_bikes WHERE {' AND '.join(where)} ORDER BY sold_at, id", params
+            ).fetchall()
 
-        c = self.conn.cursor()
-        c.execute(q, params)
-        return c.fetchall()
 
+    def sales_report(self, date_from: str, date_to: str, group_by=("brand",), period=None) -> List[sqlite3.Row]:
+        """
+        Units, revenue and discount (listed - sold price; both in paisa) for
+        sales on the days date_from..date_to (YYYY-MM-DD), read from the rollup
+        tables.
+
+        group_by: columns out of ROLLUP_DIMS; period: None (whole range),
+        "year", "month" or "day" (adds a `period` column). Whole months inside
+        the range come from sales_monthly and only the days at its ragged ends
+        from sales_daily, so the cost follows the number of buckets, not sales.
+        """
+        bad = [c for c in group_by if c not in ROLLUP_DIMS]
+        if bad or period not in (None, "year", "month", "day"):
+            raise ValueError(f"Unsupported report grouping: {bad or period}")
+        start = datetime.date.fromisoformat(date_from)
+        end = datetime.date.fromisoformat(date_to)
+        if start > end:
+            return []
+
+        # [first, last): the whole months inside the range
+        first = start if start.day == 1 else (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        last = (end + datetime.timedelta(days=1)).replace(day=1)
+        dims = ", ".join(ROLLUP_DIMS)
+        if period == "day" or first >= last:
+            source = f"""
+                SELECT day AS p, {dims}, units, revenue, discount FROM sales_daily
+                WHERE day >= ? AND day <= ?
+            """
+            params = [start.isoformat(), end.isoformat()]
+        else:
+            source = f"""
+                SELECT month AS p, {dims}, units, revenue, discount FROM sales_monthly
+                WHERE month >= ? AND month < ?
+                UNION ALL
+                SELECT day, {dims}, units, revenue, discount FROM sales_daily
+                WHERE (day >= ? AND day < ?) OR (day >= ? AND day <= ?)
+            """
+            params = [first.isoformat()[:7], last.isoformat()[:7],
+                      start.isoformat(), first.isoformat(), last.isoformat(), end.isoformat()]
+
+        cols = list(group_by)
+        if period is not None:
+            cols.insert(0, {"year": "substr(p, 1, 4)", "month": "substr(p, 1, 7)", "day": "p"}[period] + " AS period")
+        totals = ["COALESCE(SUM(units), 0) AS units", "COALESCE(SUM(revenue), 0) AS revenue",
+                  "COALESCE(SUM(discount), 0) AS discount"]
+        sql = f"SELECT {', '.join(cols + totals)} FROM ({source})"
+        if cols:
+            sql += f" GROUP BY {', '.join(str(i + 1) for i in range(len(cols)))}"
+        sql += " ORDER BY " + ("period, " if period else "") + "revenue DESC"
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def period_totals(self, table: str, date_from: str = None, date_to: str = None) -> dict:
+        """
+        Row count and the sum of each money column (paisa) of `table`, a
+        PERIOD_TOTALS key, over the days date_from..date_to (either may be None).
+
+        SQLite adds INTEGER columns exactly in 64 bits (an overflow raises
+        rather than rounds) while range-scanning the date index, so no rows
+        are fetched into Python however many the period holds.
+        """
+        date_column, columns = PERIOD_TOTALS[table]
+        where, params = [], []
+        _date_range(where, params, date_column, date_from, date_to)
+        sums = ", ".join(f"COALESCE(SUM({c}), 0) AS {c}" for c in columns)
+        sql = f"SELECT COUNT(*) AS count, {sums} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self.reader() as conn:
+            return dict(conn.execute(sql, params).fetchone())
 
     # ---------- CUSTOMER HELPERS ----------
+    def page_customers(self, after=None, limit=PAGE_SIZE, order=None):
+        """A page of customers, newest first, or by order=(column, desc) out of
+        PAGE_SORTS. Returns (rows, next cursor or None)."""
+        key, desc = self._page_order("customers", order, ("id", True))
+        return self._keyset_page("SELECT id, name, so, cnic, phone, address FROM customers",
+                                 [], [], key, after, limit, desc=desc)
+
     def add_or_get_customer(self, name, cnic, phone=None, address=None, so=None):
         """Create or update a customer by CNIC, including so + address."""
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM customers WHERE cnic = ?", (cnic,))
-        row = cur.fetchone()
-        if row:
-            # Update if new values are provided
-            cur.execute("""
-                UPDATE customers
-                SET name = ?, phone = ?, address = ?, so = ?
-                WHERE cnic = ?
-            """, (
-                name or row["name"],
-                phone or row["phone"],
-                address or row["address"],
-                so or row["so"],
-                cnic
-            ))
-            self.conn.commit()
-            return row["id"]
-        else:
-            cur.execute("""
-                INSERT INTO customers (name, cnic, phone, address, so)
-                VALUES (?, ?, ?, ?, ?)
-            """, (name, cnic, phone, address, so))
-            self.conn.commit()
-            return cur.lastrowid
+        with self.transaction() as cur:
+            cur.execute("SELECT * FROM customers WHERE cnic = ?", (cnic,))
+            row = cur.fetchone()
+            if row:
+                # Update if new values are provided
+                cur.execute("""
+                    UPDATE customers
+                    SET name = ?, phone = ?, address = ?, so = ?
+                    WHERE cnic = ?
+                """, (
+                    name or row["name"],
+                    phone or row["phone"],
+                    address or row["address"],
+                    so or row["so"],
+                    cnic
+                ))
+                self.changed("customers", row["id"], "update")
+                return row["id"]
+            else:
+                cur.execute("""
+                    INSERT INTO customers (name, cnic, phone, address, so)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (name, cnic, phone, address, so))
+                self.changed("customers", cur.lastrowid, "insert")
+                return cur.lastrowid
 
 
         # ---------- BOOKINGS (standalone) ----------
@@ -307,85 +1434,73 @@ class DB:
                     model=None,
                     colour=None,
                     specifications=None,
-                    total_amount=0.0,
-                    advance=0.0,
-                    balance=0.0,
+                    total_amount=0,
+                    advance=0,
+                    balance=0,
                     delivery_date=None,
                     delivered=0):
-        """Insert booking and return booking_no (generated or existing)."""
-        # make sure bookings table has expected columns
-        self.ensure_bookings_columns()
+        """Insert booking and return booking_no (generated or existing); amounts in paisa."""
+        # booking_no continues from the last booking's number (999 when there
+        # is none): new = 10000 + last + 1. Computed inside the INSERT so the
+        # whole write is a single statement.
+        with self.transaction() as cur:
+            cur.execute("""
+                INSERT INTO bookings (
+                    booking_no, booking_date, name, so, cnic, phone, brand, model, colour,
+                    specifications, total_amount, advance, balance, delivery_date, delivered
+                ) VALUES (
+                    CAST(10001 + COALESCE(
+                        (SELECT CAST(LTRIM(NULLIF(booking_no, ''), 'B') AS INTEGER)
+                         FROM bookings ORDER BY id DESC LIMIT 1), 999) AS TEXT),
+                    ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                )
+                RETURNING id, booking_no
+            """, (
+                iso_date(booking_date) or datetime.date.today().isoformat(),
+                name, so, cnic, phone, brand, model, colour,
+                specifications, total_amount, advance, balance, iso_date(delivery_date), delivered
+            ))
+            booking = cur.fetchone()
+            self.changed("bookings", booking["id"], "insert")
+        return booking["booking_no"]
 
-        cur = self.conn.cursor()
-        # create a booking_no: numeric sequence starting at 1000 -> format as 5 digits
-        # attempt to fetch last booking_no numeric part
-        cur.execute("SELECT booking_no FROM bookings ORDER BY id DESC LIMIT 1")
-        last = cur.fetchone()
-        if last and last["booking_no"]:
-            try:
-                last_num = int(str(last["booking_no"]).lstrip("B") )
-            except Exception:
-                last_num = 999
-        else:
-            last_num = 999
-        new_num = last_num + 1
-        booking_no =  booking_no = str(10000 + new_num) 
-        cur.execute("""
-            INSERT INTO bookings (
-                booking_no, booking_date, name, so, cnic, phone, brand, model, colour,
-                specifications, total_amount, advance, balance, delivery_date, delivered
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            booking_no, booking_date or datetime.datetime.now().strftime("%d-%m-%Y"),
-            name, so, cnic, phone, brand, model, colour,
-            specifications, total_amount, advance, balance, delivery_date, delivered
-        ))
-        self.conn.commit()
-        return booking_no
 
+    def list_bookings(self, limit=PAGE_SIZE):
+        return self.page_bookings(limit=limit)[0]
 
-    def list_bookings(self, limit=200):
-        self.ensure_bookings_columns()
-        c = self.conn.cursor()
-        c.execute("""
+    def page_bookings(self, after=None, limit=PAGE_SIZE, date_from=None, date_to=None, order=None):
+        """A page of bookings, latest booking_date first (or by order=(column, desc)
+        out of PAGE_SORTS), optionally within the days date_from..date_to
+        (YYYY-MM-DD). Returns (rows, next cursor or None)."""
+        key, desc = self._page_order("bookings", order, ("booking_date", True))
+        where, params = [], []
+        _date_range(where, params, "booking_date", date_from, date_to)
+        return self._keyset_page("""
             SELECT id, booking_no, booking_date, name, so, cnic, phone, brand, model, colour,
-                   specifications, total_amount, advance, balance, delivery_date, delivered
+                   specifications, total_amount, advance, balance, delivery_date, delivered,
+                   created_at
             FROM bookings
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (limit,))
-        return c.fetchall()
+        """, where, params, key, after, limit, desc=desc)
+
+    def list_bookings_between(self, date_from: str, date_to: str) -> List[sqlite3.Row]:
+        """Bookings dated on the days date_from..date_to (YYYY-MM-DD), oldest first."""
+        where, params = [], []
+        _date_range(where, params, "booking_date", date_from, date_to)
+        with self.reader() as conn:
+            return conn.execute(
+                f"SELECT * FROM bookings WHERE {' AND '.join(where)} ORDER BY booking_date, id", params
+            ).fetchall()
 
     def ensure_bookings_columns(self):
-        """Ensure bookings has expected columns (light migration)."""
-        cur = self.conn.cursor()
-        cur.execute("PRAGMA table_info(bookings)")
-        existing = {r[1] for r in cur.fetchall()}
-        expected = {"booking_no", "booking_date", "name", "so", "cnic", "phone",
-                    "brand", "model", "colour", "specifications",
-                    "total_amount", "advance", "balance", "delivery_date",
-                    "delivered", "created_at"}
-        missing = expected - existing
-        for col in missing:
-            if col in ("total_amount", "advance", "balance"):
-                cur.execute(f"ALTER TABLE bookings ADD COLUMN {col} REAL DEFAULT 0")
-            elif col == "delivered":
-                cur.execute(f"ALTER TABLE bookings ADD COLUMN {col} INTEGER DEFAULT 0")
-            else:
-                cur.execute(f"ALTER TABLE bookings ADD COLUMN {col} TEXT")
-        if missing:
-            self.conn.commit()
+        """Ensure bookings has expected columns (re-runs migrations only if not)."""
+        if "delivered" not in self.table_columns("bookings"):
+            self._migrate()
 
     def toggle_booking_delivered(self, booking_id: int, value: int):
         """Set delivered flag (0/1) for booking id."""
-        cur = self.conn.cursor()
-        cur.execute("PRAGMA table_info(bookings)")
-        cols = {r[1] for r in cur.fetchall()}
-        if "delivered" not in cols:
-            cur.execute("ALTER TABLE bookings ADD COLUMN delivered INTEGER DEFAULT 0")
-            self.conn.commit()
-        cur.execute("UPDATE bookings SET delivered = ? WHERE id = ?", (int(value), booking_id))
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute("UPDATE bookings SET delivered = ? WHERE id = ?", (int(value), booking_id))
+            self.changed("bookings", booking_id, "update")
         return True
 
 
@@ -395,11 +1510,66 @@ class DB:
 
 
     # ---------- ACCOUNTS ----------
-    def add_account_entry(self, description, debit=0, credit=0):
-        c = self.conn.cursor()
-        c.execute(
-            "INSERT INTO accounts (description, debit, credit) VALUES (?, ?, ?)",
-            (description, debit, credit),
-        )
-        self.conn.commit()
+    def page_accounts(self, after=None, limit=PAGE_SIZE, date_from=None, date_to=None, order=None):
+        """A page of ledger entries with their running balance, latest entry_date first
+        (or by order=(column, desc) out of PAGE_SORTS), optionally within the days
+        date_from..date_to. Returns (rows, next cursor or None)."""
+        key, desc = self._page_order("accounts", order, ("entry_date", True))
+        where, params = [], []
+        _date_range(where, params, "entry_date", date_from, date_to)
+        return self._keyset_page(
+            "SELECT *, cum_credit - cum_debit AS balance FROM accounts", where, params, key, after, limit,
+            desc=desc)
+
+    def add_account_entry(self, description, debit=0, credit=0, entry_date: str = None):
+        """Add a ledger entry (debit/credit in paisa); entry_date (YYYY-MM-DD[ HH:MM:SS])
+        back-dates it, default now."""
+        with self.transaction() as c:
+            c.execute(
+                "INSERT INTO accounts (description, debit, credit, entry_date) "
+                "VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))",
+                (description, debit, credit, iso_timestamp(entry_date)),
+            )
+            # a back-dated entry also moves the running balance of every later one
+            self.changed("accounts", c.lastrowid, "insert")
         return c.lastrowid
+
+    def _ledger_totals_before(self, conn, bound: str = None):
+        """(cum_debit, cum_credit) of the last entry dated before `bound` (or the last entry)."""
+        where, params = ("WHERE entry_date < ?", (bound,)) if bound else ("", ())
+        row = conn.execute(f"""
+            SELECT cum_debit, cum_credit FROM accounts {where}
+            ORDER BY entry_date DESC, id DESC LIMIT 1
+        """, params).fetchone()
+        return (row["cum_debit"], row["cum_credit"]) if row else (0, 0)
+
+    def account_balance(self, as_of: str = None) -> int:
+        """Ledger balance in paisa (credits - debits) at the end of day `as_of` (YYYY-MM-DD), default now."""
+        with self.reader() as conn:
+            bound = None
+            if as_of is not None:
+                bound = (datetime.date.fromisoformat(as_of) + datetime.timedelta(days=1)).isoformat()
+            debit, credit = self._ledger_totals_before(conn, bound)
+        return credit - debit
+
+    def ledger_summary(self, date_from: str = None, date_to: str = None) -> dict:
+        """
+        Opening balance, total debit, total credit and closing balance (paisa) for the
+        days date_from..date_to (YYYY-MM-DD; None = from the first / up to the
+        last entry): two index seeks on the running totals, however many
+        entries the period holds.
+        """
+        with self.reader() as conn:
+            d0 = c0 = 0
+            if date_from:
+                d0, c0 = self._ledger_totals_before(conn, iso_date(date_from))
+            bound = None
+            if date_to:
+                bound = (parse_date(date_to) + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+            d1, c1 = self._ledger_totals_before(conn, bound)
+        return {
+            "opening": c0 - d0,
+            "debit": d1 - d0,
+            "credit": c1 - c0,
+            "closing": c1 - d1,
+        }
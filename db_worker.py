@@ -0,0 +1,236 @@
+# db_worker.py
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+
+from db import DB, PAGE_SIZE
+
+
+class DBWorker:
+    """
+    Runs database and other slow work off the Tk main loop.
+
+    read(fn, *args) / write(fn, *args) queue fn(db, *args) on a reader or a
+    writer thread, so list queries never queue behind writes. Both share the
+    app's DB: reads should go through db.reader() (pooled read-only
+    connections), writes run holding db.write_lock on its single writer
+    connection. run(fn, *args) queues plain background work (PDF rendering
+    etc.) on a third thread.
+
+    Every call returns a concurrent.futures.Future. on_done(result) /
+    on_error(exc) are invoked back on the Tk thread: finished futures are
+    collected by a poller scheduled with tk_root.after(), never from a worker.
+    With key=..., only the most recent call for that key delivers its result
+    (older, superseded reads are dropped). Each poll also delivers the
+    db.changes published by writes on the worker threads.
+    """
+
+    def __init__(self, tk_root, db: DB, poll_ms: int = 15):
+        self.root = tk_root
+        self.db = db
+        self.poll_ms = poll_ms
+        self._finished = queue.Queue()
+        self._latest = {}
+        self._pending = 0
+        self._polling = False
+        self._queues = {}
+        self._threads = []
+        for name in ("reader", "writer", "tasks"):
+            q = queue.Queue()
+            t = threading.Thread(target=self._loop, args=(q, name), name=f"db-{name}", daemon=True)
+            self._queues[name] = q
+            self._threads.append(t)
+            t.start()
+
+    # ---------- public API ----------
+    def read(self, fn, *args, on_done=None, on_error=None, key=None) -> Future:
+        return self._submit("reader", fn, args, on_done, on_error, key)
+
+    def write(self, fn, *args, on_done=None, on_error=None, key=None) -> Future:
+        return self._submit("writer", fn, args, on_done, on_error, key)
+
+    def run(self, fn, *args, on_done=None, on_error=None, key=None) -> Future:
+        return self._submit("tasks", fn, args, on_done, on_error, key)
+
+    def close(self):
+        for q in self._queues.values():
+            q.put(None)
+
+    # ---------- internals ----------
+    def _submit(self, queue_name, fn, args, on_done, on_error, key):
+        fut = Future()
+        if key is not None:
+            self._latest[key] = fut
+        self._pending += 1
+        self._queues[queue_name].put((fn, args, fut, on_done, on_error, key))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return fut
+
+    def _loop(self, q, name):
+        db = self.db
+        while True:
+            job = q.get()
+            if job is None:
+                break
+            fn, args, fut, on_done, on_error, key = job
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                if name == "writer":
+                    with db.write_lock:
+                        try:
+                            result = fn(db, *args)
+                        except BaseException:
+                            if db.conn.in_transaction:
+                                db.conn.rollback()
+                            raise
+                elif name == "reader":
+                    result = fn(db, *args)
+                else:
+                    result = fn(*args)
+            except BaseException as e:
+                fut.set_exception(e)
+            else:
+                fut.set_result(result)
+            self._finished.put(job)
+
+    def _poll(self):
+        """Tk thread: deliver finished jobs to their callbacks."""
+        # writes made on the writer thread first reach the screens showing them
+        self.db.changes.deliver()
+        while True:
+            try:
+                _fn, _args, fut, on_done, on_error, key = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if key is not None:
+                if self._latest.get(key) is not fut:
+                    continue
+                del self._latest[key]
+            exc = fut.exception()
+            try:
+                if exc is None:
+                    if on_done is not None:
+                        on_done(fut.result())
+                elif on_error is not None:
+                    on_error(exc)
+                else:
+                    traceback.print_exception(type(exc), exc, exc.__traceback__)
+            except Exception:
+                traceback.print_exc()
+        if self._pending > 0:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+
+def load_async(worker, db, query, on_rows, scroll=None, on_error=None):
+    """
+    Run query(db) and pass its rows to on_rows on the Tk thread.
+    With a worker the query runs on its reader thread and `scroll` (a
+    ScrollableTreeview) shows a loading state meanwhile; without one it runs
+    inline on `db`, as before.
+    """
+    if worker is None:
+        on_rows(query(db))
+        return
+
+    if scroll is not None:
+        scroll.set_loading(True)
+
+    def done(rows):
+        if scroll is not None:
+            scroll.set_loading(False)
+        on_rows(rows)
+
+    def failed(exc):
+        if scroll is not None:
+            scroll.set_loading(False)
+        if on_error is not None:
+            on_error(exc)
+        else:
+            traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+    worker.read(query, on_done=done, on_error=failed, key=scroll if scroll is not None else on_rows)
+
+
+class PagedLoader:
+    """
+    Keyset-paged rows for a list frame.
+
+    fetch(db, after, limit) -> (rows, next cursor or None), i.e. one of the
+    DB.page_* methods. reset() loads the first page, more() appends the next
+    one (hook it to ScrollableTreeview(on_end=...) for infinite scroll), and
+    on_rows(rows) always receives every row loaded so far. Pages are read via
+    load_async, so on the worker's reader thread when there is one.
+    """
+
+    def __init__(self, worker, db, fetch, on_rows, scroll=None, on_error=None, page_size=PAGE_SIZE):
+        self.worker = worker
+        self.db = db
+        self.fetch = fetch
+        self.on_rows = on_rows
+        self.scroll = scroll
+        self.on_error = on_error
+        self.page_size = page_size
+        self.rows = []
+        self.cursor = None
+        self._busy = False
+
+    @property
+    def has_more(self) -> bool:
+        return self.cursor is not None
+
+    def reset(self, fetch=None, keep=False):
+        """
+        Start again from the newest row, optionally with a new fetch (other
+        filters). keep=True re-reads as many rows as are loaded now, so a
+        refresh after an edit does not throw away the pages scrolled in.
+        """
+        if fetch is not None:
+            self.fetch = fetch
+        limit = max(self.page_size, len(self.rows)) if keep else self.page_size
+        self._load(None, limit, [])
+
+    def patch(self, rows, ids):
+        """
+        Swap in `rows`, the current state of the loaded rows `ids`, keeping
+        their place; ids that `rows` lacks are dropped. Nothing is fetched
+        and the cursor stays put.
+        """
+        fresh = {row["id"]: row for row in rows}
+        self.rows = [fresh.get(row["id"], row) for row in self.rows
+                     if row["id"] not in ids or row["id"] in fresh]
+
+    def more(self):
+        if self._busy or self.cursor is None:
+            return
+        self._load(self.cursor, self.page_size, self.rows)
+
+    def _load(self, after, limit, head):
+        fetch = self.fetch
+        self._busy = True
+
+        def done(result):
+            rows, cursor = result
+            self._busy = False
+            self.rows = head + list(rows)
+            self.cursor = cursor
+            self.on_rows(self.rows)
+
+        def failed(exc):
+            self._busy = False
+            if self.on_error is not None:
+                self.on_error(exc)
+            else:
+                traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+        try:
+            load_async(self.worker, self.db, lambda db: fetch(db, after, limit), done,
+                       scroll=self.scroll, on_error=failed)
+        except Exception as e:
+            failed(e)
@@ -0,0 +1,109 @@
+# import_bench.py
+"""
+Bulk import check: load a large supplier manifest through importer.import_manifest.
+
+Writes a CSV and a JSON-lines manifest of --rows bikes each, with some
+engine numbers repeated inside the file, some unparseable prices and one
+bike already in stock, imports both into a fresh database and reports the
+time and rows per second, next to DB.add_bike one row at a time (timed on
+--per-row rows and extrapolated). Exits non-zero if the report's counts
+are not exactly what was planted, progress never reached the end, or an
+import takes longer than --budget seconds.
+
+Usage:  python import_bench.py [--rows 100000] [--budget 10] [--per-row 2000]
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import importer
+from db import DB
+
+HEADER = ["Brand", "Model", "Colour", "Variant", "Category", "Capacity",
+          "Engine No", "Chassis", "Listed Price", "Status"]
+
+
+def write_manifests(tmp, n):
+    """(csv path, jsonl path, {what: count planted in the CSV})."""
+    csv_path = os.path.join(tmp, "manifest.csv")
+    repeats = bad_prices = 0
+    with open(csv_path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow(HEADER)
+        for i in range(n):
+            engine = f"E{i}"
+            if i % 1000 == 999:
+                engine, repeats = "E0", repeats + 1        # repeats line 2's engine
+            price = "150,000"
+            if i % 997 == 500:
+                price, bad_prices = "n/a", bad_prices + 1
+            out.writerow(["Honda", "CD70", "Red", "Std", "Bike", "70cc", engine, f"C{i}", price, "in stock"])
+    jsonl_path = os.path.join(tmp, "manifest.jsonl")
+    with open(jsonl_path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"brand": "Yamaha", "model": "YBR", "engine": f"J{i}",
+                                "chassis_no": f"K{i}", "price": 200000}) + "\n")
+    return csv_path, jsonl_path, {"repeats": repeats, "bad_prices": bad_prices}
+
+
+def timed_import(db, path):
+    fractions = []
+    t = time.perf_counter()
+    report = importer.import_manifest(db, path, progress=lambda done, fraction: fractions.append(fraction))
+    return report, time.perf_counter() - t, fractions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--budget", type=float, default=10.0, help="seconds allowed per import")
+    ap.add_argument("--per-row", type=int, default=2000, help="rows to time through DB.add_bike")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="import_bench")
+    try:
+        csv_path, jsonl_path, planted = write_manifests(tmp, args.rows)
+        db = DB(os.path.join(tmp, "bench.db"))
+        # already in stock: line 12 of the CSV (E10) conflicts with it
+        db.add_bike("Honda", "CD70", "Red", "", "", "", "E10", "PRE-EXISTING", 15000000, "in stock")
+
+        failed = False
+        expected = {
+            csv_path: (args.rows - planted["repeats"] - planted["bad_prices"] - 1,
+                       planted["repeats"] + 1, planted["bad_prices"]),
+            jsonl_path: (args.rows, 0, 0),
+        }
+        for path, (inserted, conflicts, errors) in expected.items():
+            report, secs, fractions = timed_import(db, path)
+            got = (report.inserted, len(report.conflicts), len(report.errors))
+            ok = got == (inserted, conflicts, errors) and fractions and fractions[-1] >= 1.0 \
+                and secs <= args.budget
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {os.path.basename(path)}: {secs:.2f} s, "
+                  f"{args.rows / secs:,.0f} rows/s, {len(fractions)} progress updates")
+            print(f"       {report.summary()}".replace("\n", " "))
+            if got != (inserted, conflicts, errors):
+                print(f"       expected {inserted} imported, {conflicts} duplicates, {errors} invalid")
+        db.close()
+
+        db = DB(os.path.join(tmp, "per_row.db"))
+        t = time.perf_counter()
+        for i in range(args.per_row):
+            db.add_bike("Honda", "CD70", "Red", "Std", "Bike", "70cc", f"E{i}", f"C{i}", 15000000, "in stock")
+        per_row = (time.perf_counter() - t) / args.per_row
+        db.close()
+        print(f"DB.add_bike one at a time: {per_row * 1000:.2f} ms/row, "
+              f"about {per_row * args.rows:.0f} s for {args.rows} rows")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
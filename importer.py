@@ -0,0 +1,146 @@
+# importer.py
+"""
+Bulk inventory import from supplier shipment manifests.
+
+A manifest is a CSV file with a header row, or JSON lines (.jsonl/.ndjson,
+one object per line). Column names are matched loosely ("Engine No",
+"engine_no" and "engine" all work). Rows are read as a stream, validated and
+inserted in chunks through DB.add_bikes, all inside one transaction.
+"""
+import csv
+import json
+import os
+
+from db import DB, to_paisa
+
+# inventory columns in DB.add_bike argument order
+FIELDS = ("brand", "model", "colour", "variant", "category", "capacity",
+          "engine_no", "chassis_no", "listed_price", "status")
+ALIASES = {
+    "engine": "engine_no",
+    "chassis": "chassis_no",
+    "color": "colour",
+    "price": "listed_price",
+}
+CHUNK_SIZE = 1000
+
+
+class ImportReport:
+    """What happened to each manifest row (line numbers are 1-based)."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.conflicts = []   # (line, column, value): already in stock or repeated
+        self.errors = []      # (line, message): row failed validation
+
+    def summary(self) -> str:
+        text = f"{self.inserted} of {self.rows} bikes imported."
+        if self.conflicts:
+            text += f"\n{len(self.conflicts)} skipped as duplicates (engine/chassis already in stock)."
+        if self.errors:
+            text += f"\n{len(self.errors)} rejected as invalid."
+        return text
+
+    def details(self, limit: int = 20) -> str:
+        problems = [(n, f"duplicate {col} {val!r}") for n, col, val in self.conflicts]
+        problems += self.errors
+        problems.sort()
+        more = len(problems) - limit
+        text = "\n".join(f"line {n}: {msg}" for n, msg in problems[:limit])
+        return text + (f"\n… and {more} more" if more > 0 else "")
+
+
+def _field_name(header: str) -> str:
+    key = (header or "").strip().lower().replace(" ", "_")
+    return ALIASES.get(key, key)
+
+
+class _ManifestReader:
+    """Yields (line_no, record) and tracks how much of the file was consumed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path) or 1
+        self.consumed = 0
+
+    def _lines(self, f):
+        for raw in f:
+            self.consumed += len(raw)
+            yield raw.decode("utf-8-sig")
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            if self.path.lower().endswith((".jsonl", ".ndjson", ".json")):
+                for n, line in enumerate(self._lines(f), 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except ValueError as e:
+                        yield n, ValueError(f"bad JSON: {e}")
+                        continue
+                    if not isinstance(rec, dict):
+                        yield n, ValueError("expected a JSON object")
+                        continue
+                    yield n, {_field_name(k): v for k, v in rec.items()}
+            else:
+                reader = csv.reader(self._lines(f))
+                header = [_field_name(h) for h in next(reader, [])]
+                for row in reader:
+                    if not any(c.strip() for c in row):
+                        continue
+                    yield reader.line_num, dict(zip(header, row))
+
+    @property
+    def fraction(self) -> float:
+        return min(self.consumed / self.size, 1.0)
+
+
+def _validate(rec: dict) -> tuple:
+    """Turn one manifest record into an add_bike tuple, or raise ValueError."""
+    row = {k: ("" if rec.get(k) is None else str(rec.get(k)).strip()) for k in FIELDS}
+    if not row["engine_no"] or not row["chassis_no"]:
+        raise ValueError("engine_no and chassis_no are required")
+    try:
+        row["listed_price"] = to_paisa(row["listed_price"])
+    except ValueError:
+        raise ValueError(f"listed_price {row['listed_price']!r} is not a number")
+    return tuple(row[k] for k in FIELDS)
+
+
+def import_manifest(db: DB, path: str, progress=None, chunk_size: int = CHUNK_SIZE) -> ImportReport:
+    """
+    Import every valid row of the manifest at `path` into inventory.
+
+    Duplicate engine/chassis numbers and invalid rows are reported per line in
+    the returned ImportReport without stopping the import. `progress(rows,
+    fraction)` is called after each chunk (from the calling thread). The whole
+    import is one transaction: an unexpected error leaves inventory untouched.
+    """
+    report = ImportReport()
+    reader = _ManifestReader(path)
+
+    def flush(chunk, lines):
+        inserted, conflicts = db.add_bikes(chunk)
+        report.inserted += inserted
+        report.conflicts.extend((lines[i], col, val) for i, col, val in conflicts)
+        if progress is not None:
+            progress(report.rows, reader.fraction)
+
+    with db.transaction():
+        chunk, lines = [], []
+        for line, rec in reader:
+            report.rows += 1
+            try:
+                if isinstance(rec, Exception):
+                    raise rec
+                chunk.append(_validate(rec))
+                lines.append(line)
+            except ValueError as e:
+                report.errors.append((line, str(e)))
+            if len(chunk) >= chunk_size:
+                flush(chunk, lines)
+                chunk, lines = [], []
+        flush(chunk, lines)
+    return report
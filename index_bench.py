@@ -0,0 +1,156 @@
+# index_bench.py
+"""
+Secondary index check: do the list queries still use their indexes?
+
+Seeds a throwaway database with --rows stock items, sales, bookings and
+ledger entries, then runs the queries behind the list screens through the
+DB methods themselves (the SQL they actually send is captured), prints
+each one's EXPLAIN QUERY PLAN and timing with and without its index (the
+index is dropped inside a savepoint that is rolled back), and exits
+non-zero if a plan no longer uses the index it is meant to.
+
+Usage:  python index_bench.py [--rows 500000] [--keep path.db]
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from db import DB
+from query import Filter
+
+
+def seed(db, n):
+    """
+    n rows in each of inventory, sold_bikes, bookings and accounts (dates
+    ascending). The search_fts triggers are dropped first: the trigram index
+    is not what is measured here and would make seeding take minutes.
+    """
+    start = datetime.datetime(2020, 1, 1)
+    step = datetime.timedelta(days=5 * 365) / n
+
+    def day(i):
+        # ascending, so the ledger triggers never shift later entries
+        return (start + i * step).strftime("%Y-%m-%d %H:%M:%S")
+
+    with db.transaction() as cur:
+        fts_triggers = cur.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name GLOB '*_fts_*'").fetchall()
+        for (name,) in fts_triggers:
+            cur.execute(f"DROP TRIGGER {name}")
+        cur.executemany(
+            "INSERT INTO inventory (brand, model, category, engine_no, chassis_no, listed_price, status) "
+            "VALUES (?, ?, 'Bike', ?, ?, 15000000, 'in stock')",
+            ((f"Brand{i % 20}", f"Model{i % 50}", f"E{i:07d}", f"C{i:07d}") for i in range(n)))
+        cur.executemany(
+            "INSERT INTO sold_bikes (inventory_id, brand, model, category, engine_no, chassis_no, "
+            "customer_cnic, listed_price, sold_price, sold_at) VALUES (?, ?, ?, 'Bike', ?, ?, ?, 15000000, 14500000, ?)",
+            ((i + 1, f"Brand{i % 20}", f"Model{i % 50}", f"SE{i:07d}", f"SC{i:07d}", f"{i % (n // 3 or 1):013d}", day(i))
+             for i in range(n)))
+        cur.executemany(
+            "INSERT INTO bookings (booking_no, booking_date, name, cnic, created_at) VALUES (?, ?, 'x', ?, ?)",
+            ((f"B{i}", day(i)[:10], f"{i:013d}", day(i)) for i in range(n)))
+        cur.executemany(
+            "INSERT INTO accounts (description, debit, credit, entry_date) VALUES ('x', ?, ?, ?)",
+            ((i % 7 * 100, i % 5 * 100, day(i)) for i in range(n)))
+
+
+def checks(n):
+    """(label, fn(db) running the query, index it must use)."""
+    cnic = f"{(n // 3 or 1) // 2:013d}"
+    return [
+        ("sold bikes, newest first", lambda db: db.page_sold_bikes(), "idx_sold_bikes_sold_at"),
+        ("sold bikes of a CNIC", lambda db: db.page_sold_bikes(Filter().eq("customer_cnic", cnic)),
+         "idx_sold_bikes_customer_cnic"),
+        ("stock sold to a CNIC", lambda db: db.list_inventory(Filter().eq("customer_cnic", cnic)),
+         "idx_sold_bikes_customer_cnic"),
+        ("sale of a stock item", lambda db: db.conn.execute(
+            "SELECT id FROM sold_bikes WHERE inventory_id = ?", (n // 2,)).fetchall(), "idx_sold_bikes_inventory_id"),
+        ("bookings, latest first", lambda db: db.page_bookings(), "idx_bookings_booking_date"),
+        ("bookings by created_at", lambda db: db.page_bookings(order=("created_at", True)), "idx_bookings_created_at"),
+        ("ledger, latest first", lambda db: db.page_accounts(), "idx_accounts_entry_date"),
+    ]
+
+
+def captured(db, fn):
+    """The first SELECT fn(db) sends (parameters inlined)."""
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        fn(db)
+    finally:
+        db.conn.set_trace_callback(None)
+    return next(s for s in statements if s.lstrip().upper().startswith("SELECT"))
+
+
+def plan(db, sql, note=""):
+    # the note keeps sqlite3's statement cache from handing back a plan
+    # prepared before the index was dropped (EXPLAIN is not re-prepared)
+    return "; ".join(row[3] for row in db.conn.execute(f"EXPLAIN QUERY PLAN /* {note} */ {sql}"))
+
+
+def timed(db, sql, runs=3):
+    best = None
+    for _ in range(runs):
+        t = time.perf_counter()
+        db.conn.execute(sql).fetchall()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=500_000)
+    ap.add_argument("--keep", help="seed (or reuse) this database file instead of a temporary one")
+    args = ap.parse_args()
+
+    tmp = None
+    path = args.keep
+    if path is None:
+        tmp = tempfile.mkdtemp(prefix="index_bench")
+        path = os.path.join(tmp, "bench.db")
+    try:
+        fresh = not os.path.exists(path)
+        db = DB(path)
+        if fresh:
+            t = time.perf_counter()
+            seed(db, args.rows)
+            print(f"seeded {args.rows} rows per table in {time.perf_counter() - t:.1f} s")
+        db.conn.execute("ANALYZE")
+        # every query on the writer connection, so the savepoint below hides the index from it
+        if db.reads is not None:
+            db.reads.close()
+            db.reads = None
+
+        failed = False
+        for label, fn, index in checks(args.rows):
+            sql = captured(db, fn)
+            after = plan(db, sql)
+            after_ms = timed(db, sql)
+            db.conn.execute("SAVEPOINT no_index")
+            try:
+                db.conn.execute(f"DROP INDEX {index}")
+                before = plan(db, sql, "without " + index)
+                before_ms = timed(db, sql, runs=1)
+            finally:
+                db.conn.execute("ROLLBACK TO no_index")
+                db.conn.execute("RELEASE no_index")
+            ok = index in after
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {label}: {before_ms:9.2f} ms -> {after_ms:7.2f} ms")
+            print(f"       without {index}: {before}")
+            print(f"       with it:  {after}")
+        print("FAIL: a query no longer uses its index" if failed else "OK")
+        db.conn.close()
+        return 1 if failed else 0
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
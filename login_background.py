@@ -0,0 +1,78 @@
+# login_background.py
+"""
+Pre-scaled login background.
+
+assets/background.PNG is scaled (LANCZOS, with PIL) to a few fixed sizes and
+the results are kept as PNGs in assets/cache, keyed by the source's mtime and
+the target size. Tk loads those directly (no PIL at startup); a missing size
+is built off the Tk thread with build().
+
+Run this file to pre-build every size, e.g. after replacing the background:
+    python login_background.py
+"""
+import os
+
+HERE = os.path.dirname(__file__) or "."
+ASSETS_DIR = os.path.join(HERE, "assets")
+CACHE_DIR = os.path.join(ASSETS_DIR, "cache")
+SOURCE = os.path.join(ASSETS_DIR, "background.PNG")
+
+# 3:2 sizes, smallest first; the login view uses the smallest that covers the window
+LADDER = ((1200, 800), (1500, 1000), (1800, 1200), (2400, 1600))
+
+
+def ladder_size(width: int, height: int) -> tuple:
+    """The smallest ladder size covering width x height (else the largest)."""
+    for size in LADDER:
+        if size[0] >= width and size[1] >= height:
+            return size
+    return LADDER[-1]
+
+
+def _cache_path(src: str, size: tuple) -> str:
+    name = os.path.splitext(os.path.basename(src))[0]
+    mtime = os.stat(src).st_mtime_ns
+    return os.path.join(CACHE_DIR, f"{name}_{size[0]}x{size[1]}_{mtime}.png")
+
+
+def cached(src: str, size: tuple):
+    """Path of the scaled image if it is already cached, else None."""
+    try:
+        path = _cache_path(src, size)
+    except OSError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def build(src: str, size: tuple) -> str:
+    """Scale `src` to `size` into the cache (PIL; safe off the Tk thread) and return the path."""
+    from PIL import Image  # slow to import, not needed once the cache is warm
+
+    path = _cache_path(src, size)
+    if os.path.exists(path):
+        return path
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with Image.open(src) as img:
+        img = img.convert("RGB").resize(size, Image.LANCZOS)
+    # write then rename: a half-written file must never look cached
+    tmp = f"{path}.{os.getpid()}.tmp"
+    img.save(tmp, "PNG")
+    os.replace(tmp, path)
+
+    # drop sizes scaled from an older version of the source
+    prefix = os.path.splitext(os.path.basename(src))[0] + "_"
+    suffix = f"_{os.stat(src).st_mtime_ns}.png"
+    for old in os.listdir(CACHE_DIR):
+        if old.startswith(prefix) and old.endswith(".png") and not old.endswith(suffix):
+            try:
+                os.remove(os.path.join(CACHE_DIR, old))
+            except OSError:
+                pass
+    return path
+
+
+if __name__ == "__main__":
+    if not os.path.exists(SOURCE):
+        raise SystemExit(f"No background image at {SOURCE}")
+    for size in LADDER:
+        print(build(SOURCE, size))
@@ -1,10 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import os
 
 from utils import THEME
 from db import DB
+from db_worker import DBWorker
+from query import Filter
 from auth import LoginFrame, SignupFrame
 from navbar import Navbar
 
@@ -12,10 +13,127 @@ from navbar import Navbar
 import inventory as inventory_mod
 import add_bike as add_bike_mod
 import sold_bikes as sold_mod
-from sold_bikes import SoldBikesFrame
 import booking_mod as booking_mod
 import customer_data as customer_mod
 import accounts as accounts_mod
+import search_results as search_mod
+import reports as reports_mod
+import stamping
+import login_background
+
+
+# tables each screen shows: it patches or reloads itself when they change
+WATCHES = {
+    'inventory': ('inventory',),
+    'sold': ('sold_bikes',),
+    'booking': ('bookings',),
+    'customers': ('customers',),
+    'accounts': ('accounts',),
+    'reports': ('sold_bikes',),
+}
+
+# screens a user usually opens next; built in idle time after the first one shows
+PREFETCH = {
+    'inventory': ('sold', 'add_bike'),
+    'sold': ('inventory', 'customers'),
+    'add_bike': ('inventory',),
+    'booking': ('customers',),
+    'customers': ('booking', 'accounts'),
+    'accounts': ('sold',),
+}
+
+
+class FrameRegistry:
+    """
+    Dashboard screens, each built the first time it is needed.
+
+    factories: {key: fn() -> Frame}; a frame's constructor does its first load.
+    When a built frame is shown again it is reloaded (through reload(key, frame))
+    only if it is stale: marked with mark_stale(), or one of the tables it
+    shows (watches[key]) changed while it was hidden; see notify(). After a
+    screen is shown, the screens in prefetch[key] are built one per idle
+    callback.
+    """
+
+    def __init__(self, widget, factories, reload, watches=None, prefetch=None):
+        self.widget = widget
+        self.factories = factories
+        self.reload = reload
+        self.watches = watches or {}
+        self.prefetch = prefetch or {}
+        self.current = None
+        self._frames = {}
+        self._stale = set()
+
+    def __contains__(self, key):
+        return key in self.factories
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def built(self, key):
+        return key in self._frames
+
+    def get(self, key):
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = self.factories[key]()
+            frame.place(relx=0, rely=0, relwidth=1, relheight=1)
+            frame.lower()
+        return frame
+
+    def is_stale(self, key):
+        return key in self._stale
+
+    def mark_stale(self, *keys):
+        """Reload these screens (all built ones if none given): now if shown, else when next shown."""
+        for key in keys or list(self._frames):
+            if key not in self._frames:
+                continue   # loads when it is built
+            if key == self.current:
+                self._reload(key)
+            else:
+                self._stale.add(key)
+
+    def _reload(self, key):
+        self._stale.discard(key)
+        self.reload(key, self._frames[key])
+
+    def notify(self, changes):
+        """
+        A batch of db.changes (one per idle cycle). The screen on view patches
+        the rows it shows (frame.apply_changes(changes), False if it cannot)
+        or else reloads; hidden ones watching a changed table go stale.
+        """
+        for key, frame in list(self._frames.items()):
+            mine = [c for c in changes if c.entity in self.watches.get(key, ())]
+            if not mine:
+                continue
+            if key != self.current:
+                self._stale.add(key)
+                continue
+            patch = getattr(frame, 'apply_changes', None)
+            if patch is None or not patch(mine):
+                self._reload(key)
+
+    def show(self, key):
+        if key not in self.factories:
+            return None
+        frame = self.get(key)
+        if self.is_stale(key):
+            self._reload(key)
+        frame.lift()
+        self.current = key
+        pending = [k for k in self.prefetch.get(key, ()) if k not in self._frames]
+        if pending:
+            self.widget.after_idle(self._prefetch, pending)
+        return frame
+
+    def _prefetch(self, pending):
+        # one screen per idle callback, so input events get in between
+        self.get(pending.pop(0))
+        if pending:
+            self.widget.after_idle(self._prefetch, pending)
 
 
 class App(tk.Tk):
@@ -25,6 +143,10 @@ class App(tk.Tk):
         self.geometry('1100x700')
         self.minsize(900,600)
         self.db = DB()
+        # list queries, the sale transaction and PDF rendering run here, off the Tk loop
+        self.worker = DBWorker(self, self.db)
+        # changes committed on this thread reach the screens once per idle cycle
+        self.db.changes.attach(self)
         self.user = None
         self.style = ttk.Style(self)
         self.configure(bg=THEME['bg'])
@@ -43,18 +165,16 @@ class App(tk.Tk):
         self.bg_frame = tk.Frame(self, bg=THEME['bg'])
         self.bg_frame.pack(fill='both', expand=True)
 
-        assets_dir = os.path.join(os.path.dirname(__file__), 'assets')
-        bg_path = os.path.join(assets_dir, 'background.PNG')
-        if os.path.exists(bg_path):
-            try:
-                img = Image.open(bg_path)
-                img = img.resize((1200,800), Image.LANCZOS)
-                self.bg_img = ImageTk.PhotoImage(img)
-                canvas = tk.Canvas(self.bg_frame)
-                canvas.pack(fill='both', expand=True)
-                canvas.create_image(0,0, anchor='nw', image=self.bg_img)
-            except Exception as e:
-                print('Background image load failed:', e)
+        # pre-scaled copies from assets/cache; a missing size is scaled on the
+        # worker and shows when ready, the login form does not wait for it
+        self.bg_canvas = None
+        self.bg_size = None
+        if os.path.exists(login_background.SOURCE):
+            self.bg_canvas = tk.Canvas(self.bg_frame, bg=THEME['bg'], highlightthickness=0)
+            self.bg_canvas.pack(fill='both', expand=True)
+            self.bg_item = self.bg_canvas.create_image(0, 0, anchor='nw')
+            self.bg_canvas.bind('<Configure>', lambda e: self._show_background(e.width, e.height))
+            self._show_background(1, 1)
 
         # login/signup container
         container = ttk.Frame(self.bg_frame, padding=12)
@@ -74,6 +194,30 @@ class App(tk.Tk):
 
         self.login_frame.pack()
 
+    def _show_background(self, width, height):
+        size = login_background.ladder_size(width, height)
+        if size == self.bg_size:
+            return
+        self.bg_size = size
+        path = login_background.cached(login_background.SOURCE, size)
+        if path:
+            self._set_background(path)
+            return
+        self.worker.run(login_background.build, login_background.SOURCE, size,
+                        on_done=self._set_background,
+                        on_error=lambda e: print('Background image load failed:', e),
+                        key='login_background')
+
+    def _set_background(self, path):
+        if self.bg_canvas is None or not self.bg_canvas.winfo_exists():
+            return   # already logged in
+        try:
+            self.bg_img = tk.PhotoImage(file=path)
+        except tk.TclError as e:
+            print('Background image load failed:', e)
+            return
+        self.bg_canvas.itemconfigure(self.bg_item, image=self.bg_img)
+
     def show_signup(self):
         self.login_frame.pack_forget()
         self.signup_frame.pack()
@@ -88,6 +232,10 @@ class App(tk.Tk):
         # destroy login view and open main dashboard
         self.bg_frame.destroy()
         self._build_dashboard()
+        # import the PDF libraries in the background, before the first document is needed
+        self.worker.run(stamping.preload, on_error=lambda e: None)
+        # and build the prefix index behind search-as-you-type
+        self.worker.run(self.db.search_index.build, on_error=lambda e: None)
 
 
     def _build_dashboard(self):
@@ -103,30 +251,40 @@ class App(tk.Tk):
         self.nav = Navbar(self.left, on_nav_select=self.on_nav_select)
         self.nav.pack(fill='y', expand=True)
 
-        # dictionary of frames
-        self.frames = {}
-        self.frames['inventory'] = inventory_mod.InventoryFrame(self.content, self.db)
-        self.frames['add_bike'] = add_bike_mod.AddBikeFrame(self.content, self.db, on_added=self._on_data_changed)
-        self.frames['sold'] = sold_mod.SoldBikesFrame(self.content, self.db)
-        self.frames['booking'] = booking_mod.BookingFrame(self.content, self.db)
-        self.frames['customers'] = customer_mod.CustomerFrame(self.content, self.db)
-        self.frames['accounts'] = accounts_mod.AccountsFrame(self.content, self.db)
-
-        # place frames but keep hidden
-        for f in self.frames.values():
-            f.place(relx=0, rely=0, relwidth=1, relheight=1)
-            f.lower()
+        # screens are built on first show (see FrameRegistry)
+        content, db, worker = self.content, self.db, self.worker
+        self.frames = FrameRegistry(self, {
+            # an active search is loaded straight away, not after every row
+            'inventory': lambda: inventory_mod.InventoryFrame(
+                content, db, worker=worker, on_refresh=self.clear_search, filters=self.last_search_filters),
+            'add_bike': lambda: add_bike_mod.AddBikeFrame(content, db, worker=worker),
+            'sold': lambda: sold_mod.SoldBikesFrame(content, db, worker=worker, filters=self.last_search_filters),
+            'booking': lambda: booking_mod.BookingFrame(content, db, worker=worker),
+            'customers': lambda: customer_mod.CustomerFrame(content, db, worker=worker),
+            'accounts': lambda: accounts_mod.AccountsFrame(content, db, worker=worker),
+            'reports': lambda: reports_mod.ReportsFrame(content, db, worker=worker),
+            'search': lambda: search_mod.SearchResultsFrame(content, db, on_open=self.open_search_hit),
+        }, reload=self._reload_frame, watches=WATCHES, prefetch=PREFETCH)
+        db.changes.subscribe(self.frames.notify)
 
         # show default view
         self.show_frame('inventory')
 
+    def _reload_frame(self, key, frame):
+        if key in ('inventory', 'sold'):
+            frame.load(self.last_search_filters)
+        elif key != 'search' and hasattr(frame, 'load'):
+            frame.load()
+
     def show_frame(self, key):
-        if key in self.frames:
-            for k, f in self.frames.items():
-                if k == key:
-                    f.lift()
-                else:
-                    f.lower()
+        self.frames.show(key)
+
+    def clear_search(self):
+        """Drop the active search (navbar cleared, inventory Refresh): both lists show every row."""
+        self.last_search_filters = None
+        if hasattr(self.nav, "sync_with_filters"):
+            self.nav.sync_with_filters(None)
+        self.frames.mark_stale('inventory', 'sold')
 
     def on_nav_select(self, key, payload=None):
     # special search action
@@ -134,64 +292,49 @@ class App(tk.Tk):
             payload = payload or {}
             q = (payload.get('query') or '').strip()
             f = payload.get('filter', 'chassis_no')
-            filters = {}
-
-            # if query empty -> clear search
-            if not q:
-                self.last_search_filters = None
-                if hasattr(self.nav, "sync_with_filters"):
-                    self.nav.sync_with_filters(None)
-
-                if 'inventory' in self.frames:
-                    try:
-                        self.frames['inventory'].load(None)
-                    except Exception:
-                        pass
-                if 'sold' in self.frames:
-                    try:
-                        self.frames['sold'].load(None)
-                    except Exception:
-                        pass
-                self.show_frame('inventory')
+            live = payload.get('live', False)   # typed, not submitted: match prefixes
+            panel = payload.get('panel') or Filter()   # the navbar's filter panel
+
+            # only the list on screen (else inventory) is queried now; the
+            # other one picks the search up when it is next shown
+            target = self.frames.current if self.frames.current in ('inventory', 'sold') else 'inventory'
+            other = 'sold' if target == 'inventory' else 'inventory'
+
+            # if query and panel empty -> clear search
+            if not q and not panel:
+                self.clear_search()
+                self.show_frame(target)
+                return
+
+            # "All fields": ranked hits from every table in one query
+            if q and f == 'all_fields':
+                self.frames['search'].load(q)
+                self.show_frame('search')
                 return
 
-            # build filters
-            if f == 'category':
-                filters['category'] = q
-            elif f == 'chassis_no':
-                filters['chassis_no'] = q
-            elif f == 'engine_no':
-                filters['engine_no'] = q
-            elif f == 'customer_cnic':
-                filters['customer_cnic'] = q
-
-            # persist filters
+            # build filters: the panel's, plus the search box
+            filters = panel
+            if q and f == 'category':
+                filters = filters.contains('category', q)
+            elif q and live:
+                filters = filters.prefix(f, q)
+                # answered by SQL until the index has caught up with other writes
+                if not self.db.search_index.current():
+                    self.worker.run(self.db.search_index.build, on_error=lambda e: None)
+            elif q:
+                filters = filters.contains(f, q)
+
+            # persist filters (the bar already shows what is being typed)
             self.last_search_filters = filters
-            if hasattr(self.nav, "sync_with_filters"):
+            if not live and hasattr(self.nav, "sync_with_filters"):
                 self.nav.sync_with_filters(filters)
 
-            # apply filters to both frames
-            if 'inventory' in self.frames:
-                try:
-                    self.frames['inventory'].load(filters)
-                except Exception:
-                    pass
-            if 'sold' in self.frames:
-                try:
-                    self.frames['sold'].load(filters)
-                except Exception:
-                    pass
-
-            # show inventory by default after search
-            self.show_frame('inventory')
+            self.frames.mark_stale(other, target)
+            self.show_frame(target)
             return
 
         # If navigating to inventory or sold and a search is active, apply it
         if key in ('inventory', 'sold') and getattr(self, 'last_search_filters', None):
-            try:
-                self.frames[key].load(self.last_search_filters)
-            except Exception:
-                pass
             if hasattr(self.nav, "sync_with_filters"):
                 self.nav.sync_with_filters(self.last_search_filters)
             self.show_frame(key)
@@ -203,14 +346,21 @@ class App(tk.Tk):
 
 
 
-    def _on_data_changed(self):
-        # refresh inventory if present
-        try:
-            self.frames['inventory'].load()
-        except Exception:
-            pass
+    def open_search_hit(self, entity, ref_id):
+        """Show the screen that owns a search hit and select its row."""
+        key = {'inventory': 'inventory', 'sold_bikes': 'sold',
+               'customers': 'customers', 'bookings': 'booking'}.get(entity)
+        if key not in self.frames:
+            return
+        self.show_frame(key)
+        # selected once the screen's (first) load is in, read in if it is not
+        # among the rows loaded; the screen says so if it no longer exists
+        self.frames[key].reveal(ref_id)
 
 
 if __name__ == '__main__':
+    # batch document generation uses a process pool (needed for frozen Windows builds)
+    import multiprocessing
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
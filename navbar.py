@@ -1,6 +1,21 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from utils import THEME
+from db import money_text, to_paisa
+from query import Filter
+
+# search-as-you-type: the list updates once typing pauses this long
+SEARCH_DEBOUNCE_MS = 150
+# filters answered from the in-memory prefix index while typing; the others
+# (and full "contains" matching) wait for Search / Enter
+LIVE_FILTERS = ('engine_no', 'customer_cnic', 'chassis_no')
+# filter panel sort choices -> Filter sort keys ((column, desc), ...)
+SORTS = {
+    'Newest': (),
+    'Price: low to high': (('listed_price', False),),
+    'Price: high to low': (('listed_price', True),),
+    'Brand A-Z': (('brand', False),),
+}
 
 class Navbar(tk.Frame):
     def __init__(self, master, on_nav_select, *args, **kwargs):
@@ -19,17 +34,53 @@ class Navbar(tk.Frame):
 
         self.search_entry = ttk.Entry(top, textvariable=self.search_var, width=30)
         self.search_entry.pack(side='left', padx=(0, 6))
+        self.search_entry.bind('<Return>', lambda e: self.do_search())
 
         opts = ttk.OptionMenu(
             top,
             self.filter_var,
             'category',
-            'category', 'engine_no', 'customer_cnic', 'chassis_no'
+            'category', 'engine_no', 'customer_cnic', 'chassis_no', 'all_fields'
         )
         opts.pack(side='left')
 
         ttk.Button(top, text='Search', command=self.do_search).pack(side='left', padx=6)
 
+        self._pending = None     # after() id of the debounced live search
+        self._last_live = None   # (query, filter) last sent, so repeats are skipped
+        self.search_var.trace_add('write', self._on_type)
+        self.filter_var.trace_add('write', self._on_type)
+
+        # Filter panel: applies to inventory and sold bikes alike, together
+        # with whatever is in the search bar
+        panel = ttk.LabelFrame(self, text='Filters', padding=6)
+        panel.pack(fill='x', padx=6, pady=(0, 6))
+        self.brands_var = tk.StringVar()
+        self.status_var = tk.StringVar()
+        self.price_min_var = tk.StringVar()
+        self.price_max_var = tk.StringVar()
+        self.sort_var = tk.StringVar(value='Newest')
+        fields = (
+            ('Brands', self.brands_var),
+            ('Status', self.status_var),
+            ('Price from', self.price_min_var),
+            ('Price to', self.price_max_var),
+        )
+        for row, (label, var) in enumerate(fields):
+            ttk.Label(panel, text=label).grid(row=row, column=0, sticky='w', pady=2)
+            entry = ttk.Entry(panel, textvariable=var, width=18)
+            entry.grid(row=row, column=1, sticky='ew', pady=2)
+            entry.bind('<Return>', lambda e: self.do_search())
+        ttk.Label(panel, text='Sort').grid(row=len(fields), column=0, sticky='w', pady=2)
+        sort = ttk.Combobox(panel, textvariable=self.sort_var, values=list(SORTS), state='readonly', width=16)
+        sort.grid(row=len(fields), column=1, sticky='ew', pady=2)
+        sort.bind('<<ComboboxSelected>>', lambda e: self.do_search())
+        buttons = ttk.Frame(panel)
+        buttons.grid(row=len(fields) + 1, column=0, columnspan=2, sticky='e', pady=(4, 0))
+        ttk.Button(buttons, text='Apply', command=self.do_search).pack(side='left')
+        ttk.Button(buttons, text='Clear', command=self.clear_panel).pack(side='left', padx=(4, 0))
+        panel.columnconfigure(1, weight=1)
+
         # Navigation buttons
         btns = [
             ('Inventory', 'inventory'),
@@ -38,36 +89,88 @@ class Navbar(tk.Frame):
             ('Booking letter', 'booking'),
             ('Customer data', 'customers'),
             ('Accounts', 'accounts'),
+            ('Reports', 'reports'),
         ]
         for label, key in btns:
             b = ttk.Button(self, text=label, command=lambda k=key: self.on_nav_select(k))
             b.pack(fill='x', padx=8, pady=6)
 
+    def _on_type(self, *args):
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+        self._pending = self.after(SEARCH_DEBOUNCE_MS, self._live_search)
+
+    def _live_search(self):
+        self._pending = None
+        q = self.search_var.get().strip()
+        f = self.filter_var.get()
+        if f not in LIVE_FILTERS or (q, f) == self._last_live:
+            return
+        self._last_live = (q, f)
+        if callable(self.on_nav_select):
+            self.on_nav_select('search', {'query': q, 'filter': f, 'live': True,
+                                          'panel': self._panel_filter(warn=False)})
+
+    def _settle(self):
+        """The bar now shows what was searched: drop any live search still pending."""
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+            self._pending = None
+        self._last_live = (self.search_var.get().strip(), self.filter_var.get())
+
+    def _panel_filter(self, warn=True):
+        """The filter panel as a query.Filter, or None if a price is not an amount."""
+        flt = Filter()
+        for column, var in (('brand', self.brands_var), ('status', self.status_var)):
+            values = [v.strip() for v in var.get().split(',') if v.strip()]
+            if values:
+                flt = flt.isin(column, values)
+        try:
+            low, high = (to_paisa(v.get()) if v.get().strip() else None
+                         for v in (self.price_min_var, self.price_max_var))
+        except ValueError:
+            if warn:
+                messagebox.showwarning('Filters', 'Prices must be amounts, e.g. 150000', parent=self)
+            return None
+        flt = flt.range('listed_price', low, high)
+        for column, desc in SORTS.get(self.sort_var.get(), ()):
+            flt = flt.order(column, desc)
+        return flt
+
     def do_search(self):
         q = self.search_var.get().strip()
         f = self.filter_var.get()
+        panel = self._panel_filter()
+        if panel is None:
+            return
+        self._settle()
 
         # Notify parent via callback
         if callable(self.on_nav_select):
-            self.on_nav_select('search', {'query': q, 'filter': f})
+            self.on_nav_select('search', {'query': q, 'filter': f, 'panel': panel})
 
-    def sync_with_filters(self, filters: dict):
-        """Update the search bar UI to reflect last applied filters."""
-        if not filters:
-            self.search_var.set("")
-            self.filter_var.set("chassis_no")
-            return
+    def clear_panel(self):
+        for var in (self.brands_var, self.status_var, self.price_min_var, self.price_max_var):
+            var.set('')
+        self.sort_var.set('Newest')
+        self.do_search()
+
+    def sync_with_filters(self, filters: Filter):
+        """Update the search bar and filter panel UI to reflect last applied filters."""
+        filters = filters or Filter()
+        self.search_var.set("")
+        self.filter_var.set("chassis_no")
+        # the search bar holds the one text condition
+        for column, op, value in filters.conds:
+            if op in ("prefix", "contains"):
+                self.filter_var.set(column)
+                self.search_var.set(value)
+                break
 
-        # pick whichever key is in filters
-        if "category" in filters:
-            self.filter_var.set("category")
-            self.search_var.set(filters["category"])
-        elif "chassis_no" in filters:
-            self.filter_var.set("chassis_no")
-            self.search_var.set(filters["chassis_no"])
-        elif "engine_no" in filters:
-            self.filter_var.set("engine_no")
-            self.search_var.set(filters["engine_no"])
-        elif "customer_cnic" in filters:
-            self.filter_var.set("customer_cnic")
-            self.search_var.set(filters["customer_cnic"])
\ No newline at end of file
+        self.brands_var.set(", ".join(filters.get("brand", "in") or ()))
+        self.status_var.set(", ".join(filters.get("status", "in") or ()))
+        low, high = filters.get("listed_price", "range") or (None, None)
+        self.price_min_var.set(money_text(low) if low is not None else "")
+        self.price_max_var.set(money_text(high) if high is not None else "")
+        self.sort_var.set(next((label for label, keys in SORTS.items() if keys == filters.sort), 'Newest'))
+        self._settle()
@@ -0,0 +1,122 @@
+# overlay_bench.py
+"""
+PDF overlay check: in-memory overlays against the old temp-file round trip.
+
+Generates --docs invoices into a scratch folder twice: once with the
+overlay written to a tempfile.mkstemp file, re-opened with PdfReader and
+deleted (how every PDF writer used to do it), and once through
+stamping.render_to_file, whose overlay stays in an io.BytesIO. Both use
+the same parsed template, so only the overlay handling differs. Also
+times stamping.render() returning bytes. Exits non-zero if a generated
+file or the returned bytes are not a readable PDF, or if the in-memory
+path leaves files behind in the temp directory.
+
+Needs ReportLab and PyPDF2 (like the documents themselves).
+
+Usage:  python overlay_bench.py [--docs 1000] [--template invoice]
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import stamping
+
+INVOICE = {
+    "date": "2026-01-01", "invoice_no": "INV-1", "customer_name": "Ali Khan", "customer_so": "Akbar Khan",
+    "customer_cnic": "1730112345671", "customer_contact": "03001234567",
+    "customer_address": "House 1, Street 2\nPeshawar", "brand": "Honda", "model": "CD70", "colour": "Red",
+    "engine_no": "E1", "chassis_no": "C1", "sold_price": 14500000, "gate_pass": "yes",
+    "documents_delivered": "no",
+}
+
+
+def temp_file_render(template_id, data, out_path):
+    """The old way: overlay to a temp file, read back from disk, then deleted."""
+    _pdf_path, _coords_path, draw = stamping.TEMPLATES[template_id]
+    rl_canvas, A4 = stamping._reportlab()
+    PdfReader, PdfWriter, PageObject = stamping._pypdf2()
+    tpl = stamping.load_template(template_id)
+    fd, overlay_path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        c = rl_canvas.Canvas(overlay_path, pagesize=A4)
+        draw(c, tpl.coords, data)
+        c.save()
+        with tpl.lock:
+            overlay = PdfReader(overlay_path)
+            page = PageObject(tpl.first.pdf)
+            page.update(tpl.first)
+            page.merge_page(overlay.pages[0])
+            writer = PdfWriter()
+            writer.add_page(page)
+            for p in tpl.pages[1:]:
+                writer.add_page(p)
+            with open(out_path, "wb") as f:
+                writer.write(f)
+    finally:
+        os.remove(overlay_path)
+    return out_path
+
+
+def readable(path_or_bytes):
+    PdfReader = stamping._pypdf2()[0]
+    if isinstance(path_or_bytes, bytes):
+        if not path_or_bytes.startswith(b"%PDF"):
+            return False
+        path_or_bytes = io.BytesIO(path_or_bytes)
+    try:
+        return len(PdfReader(path_or_bytes).pages) >= 1
+    except Exception:
+        return False
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--docs", type=int, default=1000)
+    ap.add_argument("--template", default="invoice", choices=sorted(stamping.TEMPLATES))
+    args = ap.parse_args()
+
+    if not stamping.available(args.template):
+        print(f"SKIP: ReportLab, PyPDF2 or the {args.template} template PDF is missing")
+        return 1
+
+    out_dir = tempfile.mkdtemp(prefix="overlay_bench")
+    try:
+        stamping.render(args.template, INVOICE)   # imports and the template parse, outside the timings
+        failed = False
+        results = {}
+        for label, render in (("temp-file overlay", temp_file_render),
+                              ("in-memory overlay", stamping.render_to_file)):
+            folder = os.path.join(out_dir, label.split()[0])
+            os.makedirs(folder)
+            scratch = set(os.listdir(tempfile.gettempdir()))
+            t = time.perf_counter()
+            for i in range(args.docs):
+                render(args.template, dict(INVOICE, invoice_no=f"INV-{i}"), os.path.join(folder, f"{i}.pdf"))
+            results[label] = secs = time.perf_counter() - t
+            leftovers = set(os.listdir(tempfile.gettempdir())) - scratch - {os.path.basename(out_dir)}
+            ok = all(readable(os.path.join(folder, f"{i}.pdf")) for i in (0, args.docs - 1)) and not leftovers
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {label}: {secs:.2f} s for {args.docs} documents, "
+                  f"{secs / args.docs * 1000:.2f} ms each" + (f", left {sorted(leftovers)}" if leftovers else ""))
+
+        t = time.perf_counter()
+        for _ in range(100):
+            data = stamping.render(args.template, INVOICE)
+        ok = readable(data)
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} render() to bytes: {(time.perf_counter() - t) * 10:.2f} ms each")
+        old, new = results["temp-file overlay"], results["in-memory overlay"]
+        print(f"in-memory overlays: {(1 - new / old) * 100:.0f}% less time than temp files")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
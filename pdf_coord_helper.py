@@ -1,5 +1,5 @@
 # pdf_coord_helper.py
-import os, tempfile, webbrowser
+import io, os, webbrowser
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from PyPDF2 import PdfReader, PdfWriter
@@ -20,8 +20,8 @@ width = float(media.width)
 height = float(media.height)
 
 # create overlay
-overlay_path = os.path.join(tempfile.gettempdir(), "overlay_grid.pdf")
-c = canvas.Canvas(overlay_path, pagesize=(width, height))
+overlay_buf = io.BytesIO()
+c = canvas.Canvas(overlay_buf, pagesize=(width, height))
 
 # light grid lines
 c.setStrokeColorRGB(0.85,0.85,0.85)
@@ -73,7 +73,8 @@ c.save()
 
 # merge overlay and template
 reader = PdfReader(TEMPLATE)
-overlay = PdfReader(overlay_path)
+overlay_buf.seek(0)
+overlay = PdfReader(overlay_buf)
 writer = PdfWriter()
 base_page = reader.pages[0]
 try:
@@ -1,5 +1,5 @@
 # pdf_place_test.py
-import os, tempfile, webbrowser
+import io, os, webbrowser
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from PyPDF2 import PdfReader, PdfWriter
@@ -52,8 +52,8 @@ media = page.mediabox
 width = float(media.width)
 height = float(media.height)
 
-overlay_path = os.path.join(tempfile.gettempdir(), "overlay_test.pdf")
-c = canvas.Canvas(overlay_path, pagesize=(width, height))
+overlay_buf = io.BytesIO()
+c = canvas.Canvas(overlay_buf, pagesize=(width, height))
 c.setFont("Helvetica", 10)
 
 for key, (x,y) in coords.items():
@@ -72,7 +72,8 @@ c.save()
 
 # merge overlay onto template
 reader = PdfReader(TEMPLATE)
-overlay = PdfReader(overlay_path)
+overlay_buf.seek(0)
+overlay = PdfReader(overlay_buf)
 writer = PdfWriter()
 base_page = reader.pages[0]
 base_page.merge_page(overlay.pages[0])
@@ -0,0 +1,86 @@
+# query.py
+"""
+Composable filters and sort order for the list screens.
+
+    Filter().isin("brand", ["Honda", "Yamaha"]).range("listed_price", 100000_00, None) \
+            .prefix("chassis_no", "MH").order("listed_price", desc=True)
+
+A Filter is an immutable value (every method returns a new one) that
+compares and hashes by content, so a screen can tell whether a reload asks
+for the same rows. DB.list_inventory / DB.page_sold_bikes turn it into SQL;
+see DB._where for how each operator is answered.
+
+Operators:
+  eq        column = value
+  prefix    column starts with text, ignoring case (a range scan on the index)
+  contains  text anywhere in column (search_fts where it covers the column)
+  range     low <= column <= high, either bound None; on date columns the
+            bounds are whole days (YYYY-MM-DD)
+  in        column is one of values
+"""
+
+OPS = ("eq", "prefix", "contains", "range", "in")
+
+
+class Filter:
+    __slots__ = ("conds", "sort")
+
+    def __init__(self, conds=(), sort=()):
+        # conds: ((column, op, value), ...); sort: ((column, desc), ...)
+        self.conds = tuple(conds)
+        self.sort = tuple(sort)
+
+    def _add(self, column, op, value):
+        return Filter(self.conds + ((column, op, value),), self.sort)
+
+    def eq(self, column: str, value) -> "Filter":
+        return self._add(column, "eq", value)
+
+    def prefix(self, column: str, text: str) -> "Filter":
+        return self._add(column, "prefix", text)
+
+    def contains(self, column: str, text: str) -> "Filter":
+        return self._add(column, "contains", text)
+
+    def range(self, column: str, low=None, high=None) -> "Filter":
+        if low is None and high is None:
+            return self
+        return self._add(column, "range", (low, high))
+
+    def isin(self, column: str, values) -> "Filter":
+        return self._add(column, "in", tuple(values))
+
+    def order(self, column: str, desc: bool = False) -> "Filter":
+        """Sort by `column` after any sort already given (ties: newest id first)."""
+        return Filter(self.conds, self.sort + ((column, bool(desc)),))
+
+    def without(self, *columns) -> "Filter":
+        """This filter minus every condition on `columns`."""
+        return Filter([c for c in self.conds if c[0] not in columns], self.sort)
+
+    def unsorted(self) -> "Filter":
+        return Filter(self.conds)
+
+    def get(self, column: str, op: str = None):
+        """The value of the first condition on `column` (with operator `op`), else None."""
+        for col, o, value in self.conds:
+            if col == column and (op is None or o == op):
+                return value
+        return None
+
+    def restrict(self, columns) -> "Filter":
+        """Only the conditions and sort keys on `columns` (one Filter can drive several tables)."""
+        return Filter([c for c in self.conds if c[0] in columns],
+                      [s for s in self.sort if s[0] in columns])
+
+    def __bool__(self):
+        return bool(self.conds or self.sort)
+
+    def __eq__(self, other):
+        return isinstance(other, Filter) and (self.conds, self.sort) == (other.conds, other.sort)
+
+    def __hash__(self):
+        return hash((self.conds, self.sort))
+
+    def __repr__(self):
+        return f"Filter({self.conds!r}, sort={self.sort!r})"
@@ -0,0 +1,108 @@
+# reports.py
+from widgets.scrollable_treeview import ScrollableTreeview
+import datetime
+import tkinter as tk
+from tkinter import ttk, messagebox
+from db import DB, format_money
+from db_worker import load_async
+
+# label -> rollup columns to group by
+GROUPINGS = {
+    "Brand": ("brand",),
+    "Brand + model": ("brand", "model"),
+    "Category": ("category",),
+    "Brand + model + category": ("brand", "model", "category"),
+    "Everything": (),
+}
+# label -> DB.sales_report period
+PERIODS = {
+    "Whole range": None,
+    "Yearly": "year",
+    "Monthly": "month",
+    "Daily": "day",
+}
+
+
+class ReportsFrame(tk.Frame):
+    """Sales by brand/model/category over a date range, answered from the rollup tables."""
+
+    def __init__(self, master, db: DB, worker=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.db = db
+        self.worker = worker
+        self.build()
+
+    def build(self):
+        # --- Toolbar ---
+        toolbar = ttk.Frame(self)
+        toolbar.pack(fill="x", pady=6)
+
+        today = datetime.date.today()
+        ttk.Label(toolbar, text="From").pack(side="left")
+        self.date_from = ttk.Entry(toolbar, width=12)
+        self.date_from.insert(0, today.replace(day=1).isoformat())
+        self.date_from.pack(side="left", padx=(4, 8))
+        ttk.Label(toolbar, text="To").pack(side="left")
+        self.date_to = ttk.Entry(toolbar, width=12)
+        self.date_to.insert(0, today.isoformat())
+        self.date_to.pack(side="left", padx=(4, 8))
+
+        ttk.Label(toolbar, text="Group by").pack(side="left")
+        self.grouping = ttk.Combobox(toolbar, values=list(GROUPINGS), state="readonly", width=24)
+        self.grouping.set("Brand + model")
+        self.grouping.pack(side="left", padx=(4, 8))
+        self.period = ttk.Combobox(toolbar, values=list(PERIODS), state="readonly", width=12)
+        self.period.set("Whole range")
+        self.period.pack(side="left", padx=(0, 8))
+
+        ttk.Button(toolbar, text="Run", command=self.load).pack(side="left")
+        self.totals = ttk.Label(toolbar, text="")
+        self.totals.pack(side="right", padx=6)
+
+        ttk.Label(self, text="Sales report", font=("Segoe UI", 14)).pack(pady=6)
+
+        self.cols = ("period", "brand", "model", "category", "units", "revenue", "discount")
+        scroll = ScrollableTreeview(self, columns=self.cols, show="headings", selectmode="browse")
+        self.scroll = scroll
+        self.tree = scroll.get_tree()
+        for c in self.cols:
+            self.tree.heading(c, text=c.title())
+            if c in ("units", "revenue", "discount"):
+                self.tree.column(c, width=110, anchor="e")
+            else:
+                self.tree.column(c, width=140, anchor="w")
+        scroll.pack(fill="both", expand=True)
+
+        self.load()
+
+    def load(self):
+        try:
+            date_from = datetime.date.fromisoformat(self.date_from.get().strip()).isoformat()
+            date_to = datetime.date.fromisoformat(self.date_to.get().strip()).isoformat()
+        except ValueError:
+            messagebox.showwarning("Reports", "Dates must be YYYY-MM-DD")
+            return
+        group_by = GROUPINGS[self.grouping.get()]
+        period = PERIODS[self.period.get()]
+
+        # only the columns this report fills in are shown
+        shown = (("period",) if period else ()) + group_by + ("units", "revenue", "discount")
+        self.tree.configure(displaycolumns=shown)
+
+        load_async(self.worker, self.db,
+                   lambda db: db.sales_report(date_from, date_to, group_by, period),
+                   self._show_rows, scroll=self.scroll,
+                   on_error=lambda e: messagebox.showerror("Reports", f"Report failed: {e}"))
+
+    def _show_rows(self, rows):
+        source = []
+        units = revenue = discount = 0
+        for row in rows:
+            d = dict(row)
+            units += d["units"]
+            revenue += d["revenue"]
+            discount += d["discount"]
+            key = tuple(d.get(c, "") for c in ("period", "brand", "model", "category"))
+            source.append(("|".join(key), key + (d["units"], format_money(d["revenue"]), format_money(d["discount"]))))
+        self.scroll.sync_rows(source)
+        self.totals.configure(text=f"{units} bikes   revenue {format_money(revenue)}   discount {format_money(discount)}")
@@ -0,0 +1,156 @@
+# row_cache.py
+"""
+Row cache shared by a list screen's tree and its dialogs.
+
+A screen used to turn every loaded sqlite3.Row into a dict (about 1 KB more
+per row than the row itself, on top of the Row PagedLoader still holds) and
+then build a tuple of values for the tree. RowCache keeps each row once, as
+the sqlite3.Row (or tuple) the query returned, keyed by id, with the column
+names held once for the whole cache:
+
+    cache.replace(rows)                     # after a load
+    cache.tree_rows(cols, formats)          # (id, values) for sync_rows
+    cache.source(cols, formats)             # the same, lazily, for set_rows
+    row = cache.get(row_id)                 # a RowView: row["brand"], row.get(...), dict(row)
+
+RowViews are made on demand and read the cached row, so edit dialogs see
+exactly what the list shows.
+"""
+from collections.abc import Mapping
+
+
+class RowView(Mapping):
+    """Read-only {column: value} view of one cached row."""
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: dict, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, column):
+        return self._values[self._index[column]]
+
+    def get(self, column, default=None):
+        i = self._index.get(column)
+        return default if i is None else self._values[i]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return f"RowView({dict(self)!r})"
+
+
+class RowCache:
+    """The rows a list screen has loaded, in load order, keyed by their `key` column."""
+
+    def __init__(self, key: str = "id"):
+        self.key = key
+        self._index = {}   # column -> position in every row (shared by the RowViews)
+        self._rows = {}    # id -> row as the query returned it
+
+    @property
+    def columns(self) -> tuple:
+        """The cached rows' column names, in query order."""
+        return tuple(self._index)
+
+    def replace(self, rows):
+        """Cache exactly `rows` (sqlite3.Rows or dicts, all of the same query)."""
+        self._index = {}
+        self._rows = {}
+        self.extend(rows)
+
+    def extend(self, rows):
+        for row in rows:
+            if not self._index:
+                self._index = {c: i for i, c in enumerate(row.keys())}
+            if isinstance(row, dict):
+                row = tuple(row.get(c) for c in self._index)
+            self._rows[row[self._index[self.key]]] = row
+
+    def patch(self, rows, ids) -> list:
+        """
+        Refresh the cached rows among `ids` from `rows`, their current state,
+        keeping their place; ids that `rows` lacks are dropped (deleted, or
+        no longer matching the screen's query). Returns the dropped ids.
+        """
+        columns = list(self._index)
+        fresh = {}
+        for row in rows:
+            if isinstance(row, dict) or list(row.keys()) != columns:
+                # another query's column order (e.g. SELECT *)
+                row = tuple(row[c] if c in row.keys() else None for c in columns)
+            fresh[row[self._index[self.key]]] = row
+        dropped = [rid for rid in ids if rid not in fresh]
+        for rid in dropped:
+            self._rows.pop(rid, None)
+        for rid, row in fresh.items():
+            if rid in self._rows:
+                self._rows[rid] = row
+        return dropped
+
+    def clear(self):
+        self._rows = {}
+
+    def get(self, row_id, default=None):
+        row = self._rows.get(row_id)
+        return default if row is None else RowView(self._index, row)
+
+    def __getitem__(self, row_id):
+        return RowView(self._index, self._rows[row_id])
+
+    def __contains__(self, row_id):
+        return row_id in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _picker(self, columns, formats=None):
+        """row -> tuple of `columns` values, formats[column](value) applied."""
+        formats = formats or {}
+        index = self._index
+        picks = [(index.get(c), formats.get(c)) for c in columns]
+
+        def pick(row):
+            return tuple("" if i is None else fmt(row[i]) if fmt else row[i] for i, fmt in picks)
+        return pick
+
+    def tree_rows(self, columns, formats=None, ids=None) -> list:
+        """[(id, values)] in load order (only `ids`, if given), for ScrollableTreeview.sync_rows()."""
+        pick = self._picker(columns, formats)
+        if ids is not None:
+            return [(row_id, pick(self._rows[row_id])) for row_id in ids if row_id in self._rows]
+        return [(row_id, pick(row)) for row_id, row in self._rows.items()]
+
+    def source(self, columns, formats=None):
+        """The same rows as a ScrollableTreeview.set_rows() source, built only as they are shown."""
+        return _Source(list(self._rows.items()), self._picker(columns, formats))
+
+
+class _Source:
+    """Sliceable (id, values) rows for a virtual tree; values are made per slice."""
+
+    def __init__(self, items, pick):
+        self._items = items
+        self._pick = pick
+        self._positions = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [(row_id, self._pick(row)) for row_id, row in self._items[key]]
+        row_id, row = self._items[key]
+        return row_id, self._pick(row)
+
+    def index_of(self, iid):
+        if self._positions is None:
+            self._positions = {str(row_id): i for i, (row_id, _row) in enumerate(self._items)}
+        return self._positions.get(str(iid))
@@ -0,0 +1,109 @@
+# row_cache_bench.py
+"""
+Row cache memory check: RowCache against a dict per loaded row.
+
+Loads --rows sold bikes from a fresh database the way the sold list does
+(sqlite3.Rows from the pager) and measures with tracemalloc what a screen
+keeps on top of them: the old per-row dict cache plus the value tuples
+the tree was given, against RowCache plus the tuples ScrollableTreeview
+keeps for its diff. Exits non-zero if RowCache does not keep less, or if
+a RowView reads differently from the dict made from the same row.
+
+Usage:  python row_cache_bench.py [--rows 100000]
+"""
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from db import DB, MONEY_COLUMNS, format_money
+from row_cache import RowCache
+
+COLUMNS = ("id", "brand", "model", "colour", "engine_no", "chassis_no", "listed_price", "sold_price",
+           "customer_name", "customer_cnic", "customer_contact", "sold_at")
+MONEY = {c: format_money for c in MONEY_COLUMNS["sold_bikes"]}
+
+
+def seed(db, n):
+    with db.transaction() as cur:
+        # the search triggers only slow the seeding down; the rows are what count
+        for (name,) in cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                   "AND name GLOB '*_fts_*'").fetchall():
+            cur.execute(f"DROP TRIGGER {name}")
+        cur.executemany(
+            "INSERT INTO sold_bikes (brand, model, colour, engine_no, chassis_no, listed_price, sold_price, "
+            "customer_name, customer_cnic, customer_contact, sold_at) "
+            "VALUES (?, 'CD70', 'Red', ?, ?, 15000000, 14500000, ?, ?, '03001234567', ?)",
+            ((f"Brand{i % 20}", f"E{i}", f"C{i}", f"Customer {i % 5000}", f"{i % 5000:013d}",
+              f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}") for i in range(n)))
+
+
+def dict_per_row(rows):
+    """What a list screen kept before RowCache."""
+    cache, tree = {}, {}
+    for row in rows:
+        d = dict(row)
+        cache[d["id"]] = d
+        tree[str(d["id"])] = tuple(MONEY[c](d.get(c)) if c in MONEY else d.get(c, "") for c in COLUMNS)
+    return cache, tree
+
+
+def row_cache(rows):
+    cache = RowCache()
+    cache.replace(rows)
+    return cache, {str(rid): values for rid, values in cache.tree_rows(COLUMNS, MONEY)}
+
+
+def measure(build, rows):
+    """(what build(rows) returned, bytes it keeps, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    kept = build(rows)
+    secs = time.perf_counter() - t
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, size, secs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="row_cache_bench")
+    try:
+        db = DB(os.path.join(tmp, "bench.db"))
+        seed(db, args.rows)
+        with db.reader() as conn:
+            rows = conn.execute("SELECT * FROM sold_bikes ORDER BY id").fetchall()
+        db.close()
+
+        (dicts, _), old, old_secs = measure(dict_per_row, rows)
+        (cache, _), new, new_secs = measure(row_cache, rows)
+        failed = False
+        for label, size, secs in (("dict per row + tree values", old, old_secs),
+                                  ("RowCache + tree values", new, new_secs)):
+            print(f"     {label:28} {size / 1e6:7.1f} MB  {size / len(rows):6.0f} bytes/row  "
+                  f"built in {secs * 1000:.0f} ms")
+        ok = new < old
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} RowCache keeps {(1 - new / old) * 100:.0f}% less than dicts")
+
+        ok = all(dict(cache.get(rid)) == d and cache.get(rid).get("brand") == d["brand"]
+                 for rid, d in list(dicts.items())[::max(1, len(dicts) // 1000)])
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} RowViews read the same values as the dicts")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
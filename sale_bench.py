@@ -0,0 +1,111 @@
+# sale_bench.py
+"""
+Sale transaction check: DB.sell_bike against the old four-commit sale.
+
+Sells --sales bikes the way InvoiceWindow used to (add_sold_bike, a
+separate DELETE + commit, two debug SELECTs, add_or_get_customer) and
+--sales more through DB.sell_bike, on a fresh database per DB.PROFILES
+profile, and reports milliseconds and commits per sale. Exits non-zero
+unless sell_bike commits exactly once per sale, leaves stock, sales and
+customers consistent, and refuses to sell the same bike twice.
+
+Usage:  python sale_bench.py [--sales 400] [--profile local] [--profile network]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from db import DB, PROFILES
+
+
+def old_sale(db, inventory_id, cnic):
+    """The sale as InvoiceWindow.save_and_mark_sold made it before DB.sell_bike."""
+    row = db.conn.execute("SELECT * FROM inventory WHERE id = ?", (inventory_id,)).fetchone()
+    sold_id = db.add_sold_bike(
+        inventory_id=inventory_id, brand=row["brand"], model=row["model"], colour=row["colour"],
+        engine_no=row["engine_no"], chassis_no=row["chassis_no"], listed_price=row["listed_price"],
+        customer_name="Customer", customer_cnic=cnic, sold_price=14500000)
+    cur = db.conn.cursor()
+    cur.execute("DELETE FROM inventory WHERE id = ?", (inventory_id,))
+    db.conn.commit()
+    cur.execute("SELECT customer_address FROM sold_bikes WHERE id = ?", (sold_id,)).fetchone()
+    cur.execute("SELECT * FROM customers WHERE cnic = ?", (cnic,)).fetchone()
+    db.add_or_get_customer("Customer", cnic, "0300")
+
+
+def new_sale(db, inventory_id, cnic):
+    db.sell_bike(inventory_id, "Customer", cnic, customer_contact="0300", sold_price=14500000)
+
+
+def timed_sales(db, sale, ids):
+    """(ms per sale, commits per sale)."""
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    t = time.perf_counter()
+    try:
+        for i, inventory_id in enumerate(ids):
+            sale(db, inventory_id, f"{i % 50:013d}")
+    finally:
+        db.conn.set_trace_callback(None)
+    elapsed = time.perf_counter() - t
+    commits = sum(s.strip().upper() == "COMMIT" for s in statements)
+    return elapsed / len(ids) * 1000, commits / len(ids)
+
+
+def run(profile, sales, tmp):
+    db = DB(os.path.join(tmp, f"{profile}.db"), PROFILES[profile])
+    with db.transaction() as cur:
+        cur.executemany(
+            "INSERT INTO inventory (brand, model, colour, engine_no, chassis_no, listed_price, status) "
+            "VALUES ('Honda', 'CD70', 'Red', ?, ?, 15000000, 'in stock')",
+            ((f"E{i}", f"C{i}") for i in range(2 * sales)))
+    ids = [r[0] for r in db.conn.execute("SELECT id FROM inventory ORDER BY id")]
+    old_ms, old_commits = timed_sales(db, old_sale, ids[:sales])
+    new_ms, new_commits = timed_sales(db, new_sale, ids[sales:])
+
+    stock = db.conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
+    sold = db.conn.execute("SELECT COUNT(*) FROM sold_bikes").fetchone()[0]
+    customers = db.conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+    try:
+        new_sale(db, ids[-1], "0000000000001")
+        resold = True
+    except ValueError:
+        resold = False
+    db.close()
+
+    print(f"{profile}: old {old_ms:6.2f} ms/sale ({old_commits:.0f} commits)   "
+          f"sell_bike {new_ms:6.2f} ms/sale ({new_commits:.0f} commit)   {old_ms / new_ms:.1f}x")
+    problems = []
+    if new_commits != 1:
+        problems.append(f"sell_bike made {new_commits} commits per sale")
+    if (stock, sold, customers) != (0, 2 * sales, 50):
+        problems.append(f"{stock} in stock, {sold} sold, {customers} customers")
+    if resold:
+        problems.append("a sold bike was sold again")
+    for problem in problems:
+        print(f"  FAIL: {problem}")
+    return not problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sales", type=int, default=400)
+    ap.add_argument("--profile", action="append", choices=sorted(PROFILES))
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="sale_bench")
+    try:
+        failed = False
+        for profile in args.profile or sorted(PROFILES):
+            failed |= not run(profile, args.sales, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
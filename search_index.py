@@ -0,0 +1,163 @@
+# search_index.py
+"""
+In-memory prefix index over engine_no, chassis_no and customer_cnic.
+
+Each indexed column is kept as a sorted list of its values with the row
+ids alongside, so "starts with" is two bisects and a slice, whatever the
+number of bikes. Search-as-you-type asks it for ids instead of scanning.
+
+The index is built once (off the Tk thread) and then follows the writes the
+DB methods make: DB hands them to apply() once their transaction commits
+(a rollback drops them). It is stamped with the database's version: PRAGMA
+data_version on a read connection of its own, which moves with every
+commit from any connection or process. Any write it was not told about (a
+raw UPDATE in an edit dialog, another counter's sale) leaves it out of
+date, lookup() then returns None so the caller falls back to SQL, and the
+next build() brings it current again.
+"""
+import bisect
+import threading
+
+# table -> indexed columns
+FIELDS = {
+    "inventory": ("engine_no", "chassis_no"),
+    "sold_bikes": ("engine_no", "chassis_no", "customer_cnic"),
+}
+# a prefix matching more rows than this is answered by SQL instead
+MAX_IDS = 10000
+# SQLite's NOCASE folds ASCII letters only
+_NOCASE = str.maketrans("abcdefghijklmnopqrstuvwxyz", "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+
+def _key(value) -> str:
+    # compared the way the NOCASE range (DB._where) it stands in for compares
+    return str(value or "").translate(_NOCASE)
+
+
+class PrefixIndex:
+    """The values of one column, sorted, with their row ids alongside."""
+
+    def __init__(self, pairs=()):
+        pairs = sorted((_key(value), rid) for rid, value in pairs if _key(value))
+        self.keys = [k for k, _ in pairs]
+        self.ids = [rid for _, rid in pairs]
+
+    def span(self, prefix: str):
+        """[lo, hi) of the keys starting with `prefix` (already a _key)."""
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def add(self, rid: int, value):
+        key = _key(value)
+        if key:
+            i = bisect.bisect_right(self.keys, key)
+            self.keys.insert(i, key)
+            self.ids.insert(i, rid)
+
+    def remove(self, rid: int, value):
+        key = _key(value)
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_right(self.keys, key, lo)
+        for i in range(lo, hi):
+            if self.ids[i] == rid:
+                del self.keys[i]
+                del self.ids[i]
+                return
+
+
+class SearchIndex:
+    """A PrefixIndex for every FIELDS column of one DB (thread-safe)."""
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._columns = {}   # (table, column) -> PrefixIndex
+        self._stamp = None   # version() the index matches; None until built
+        self._probe = None   # read connection version() asks (file databases)
+        self._probe_lock = threading.Lock()
+
+    def version(self):
+        """
+        The committed state of the database: data_version of a read
+        connection kept for this, which changes whenever any other
+        connection (the writer included) commits. An in-memory database has
+        no other connections, so there it is the writer's total_changes.
+        """
+        if self.db.reads is None:
+            return self.db.conn.total_changes
+        with self._probe_lock:
+            if self._probe is None:
+                self._probe = self.db.reads.open()
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    def current(self) -> bool:
+        return self._stamp is not None and self._stamp == self.version()
+
+    def build(self, attempts: int = 3):
+        """
+        (Re)read every indexed column; a no-op while the index is current.
+        The version is taken under the DB's write lock (no transaction of
+        this DB open) and must be the same once the columns are read, or the
+        build is tried again: a commit landing mid-build is never stamped.
+        """
+        for _ in range(attempts):
+            if self.current():
+                return
+            with self.db.write_lock:
+                stamp = self.version()
+            columns = {}
+            with self.db.reader() as conn:
+                for table, cols in FIELDS.items():
+                    rows = conn.execute(f"SELECT id, {', '.join(cols)} FROM {table}").fetchall()
+                    for i, col in enumerate(cols, 1):
+                        columns[(table, col)] = PrefixIndex((r[0], r[i]) for r in rows)
+            with self.db.write_lock, self._lock:
+                if self.version() == stamp:
+                    self._columns, self._stamp = columns, stamp
+                    return
+
+    def lookup(self, table: str, column: str, prefix: str):
+        """
+        Ids of `table` rows whose `column` starts with `prefix`, or None when
+        the index cannot answer: not built or out of date, not an indexed
+        column, or more than MAX_IDS matches.
+        """
+        with self._lock:
+            index = self._columns.get((table, column))
+            if index is None or not self.current():
+                return None
+            lo, hi = index.span(_key(prefix))
+            if hi - lo > MAX_IDS:
+                return None
+            return index.ids[lo:hi]
+
+    def apply(self, before, changes, after):
+        """
+        Follow a committed write made through DB. `before` / `after` are
+        version() just before and after the commit (`after` None when
+        another connection may have committed in between); changes are
+        (table, id, old values, new values) with values {column: value} or
+        None for an insert's old / a delete's new. Ignored unless the index
+        was current up to the commit.
+        """
+        with self._lock:
+            if self._stamp is None or self._stamp != before:
+                return
+            if after is None:
+                self._stamp = None
+                return
+            for table, rid, old, new in changes:
+                for col in FIELDS.get(table, ()):
+                    index = self._columns[(table, col)]
+                    if old:
+                        index.remove(rid, old.get(col))
+                    if new:
+                        index.add(rid, new.get(col))
+            self._stamp = after
+
+    def close(self):
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
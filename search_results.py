@@ -0,0 +1,79 @@
+# search_results.py
+from widgets.scrollable_treeview import ScrollableTreeview
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from db import DB
+
+
+ENTITY_LABELS = {
+    "inventory": "Inventory",
+    "sold_bikes": "Sold bike",
+    "customers": "Customer",
+    "bookings": "Booking",
+}
+
+
+class SearchResultsFrame(tk.Frame):
+    """Ranked "All fields" search hits from every table (DB.search_all)."""
+
+    def __init__(self, master, db: DB, on_open=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.db = db
+        self.on_open = on_open
+        self._rows = {}
+        self.build()
+
+    def build(self):
+        self.title_var = tk.StringVar(value="Search")
+        ttk.Label(self, textvariable=self.title_var, font=('Segoe UI', 14)).pack(pady=6)
+
+        self.cols = (
+            "entity", "ref_id", "booking_no", "name", "cnic", "phone",
+            "brand", "model", "colour", "engine_no", "chassis_no"
+        )
+        scroll = ScrollableTreeview(self, columns=self.cols, show="headings", selectmode="browse")
+        self.scroll = scroll
+        self.tree = scroll.get_tree()
+
+        for c in self.cols:
+            heading = "Type" if c == "entity" else "ID" if c == "ref_id" else c.replace("_", " ").title()
+            self.tree.heading(c, text=heading)
+            if c in ("entity", "ref_id"):
+                self.tree.column(c, width=80, anchor="center")
+            else:
+                self.tree.column(c, width=120, anchor="w")
+
+        scroll.pack(fill="both", expand=True)
+
+        # double-click jumps to the row in its own screen
+        self.tree.bind("<Double-1>", lambda e: self.open_selected())
+
+    def load(self, query: str = ""):
+        try:
+            rows = self.db.search_all(query)
+        except Exception as e:
+            messagebox.showerror("DB Error", f"Search failed:\n{e}")
+            return
+
+        self.title_var.set(f"Search: {query}  ({len(rows)} hits)")
+        self._rows.clear()
+        tree_rows = []
+        for row in rows:
+            d = dict(row)
+            iid = f"{d['entity']}:{d['ref_id']}"
+            self._rows[iid] = d
+            values = tuple(
+                ENTITY_LABELS.get(d["entity"], d["entity"]) if c == "entity" else (d.get(c) or "")
+                for c in self.cols
+            )
+            tree_rows.append((iid, values))
+        self.scroll.sync_rows(tree_rows)
+
+    def open_selected(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        d = self._rows.get(sel[0])
+        if d and callable(self.on_open):
+            self.on_open(d["entity"], d["ref_id"])
@@ -1,41 +1,90 @@
 # sold_bikes.py
 from widgets.scrollable_treeview import ScrollableTreeview
+from widgets.date_range import DateRangeBar
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import tempfile
 import webbrowser
-import json
 import datetime
 
-from db import DB
+from db import DB, MONEY_COLUMNS, PAGE_SORTS, format_money, iso_timestamp, money_text, to_paisa
+from db_worker import PagedLoader, load_async
+from changes import patchable_ids
+from query import Filter
+from row_cache import RowCache
 
-# optional libs (ReportLab + PyPDF2) are required for PDF generation
-try:
-    from reportlab.pdfgen import canvas as rl_canvas
-    from reportlab.lib.pagesizes import A4
-    REPORTLAB_AVAILABLE = True
-except Exception:
-    REPORTLAB_AVAILABLE = False
-
-try:
-    from PyPDF2 import PdfReader, PdfWriter
-    PYPDF2_AVAILABLE = True
-except Exception:
-    PYPDF2_AVAILABLE = False
+import stamping
+from batch_docs import BatchDocsDialog
 
 HERE = os.path.dirname(__file__)
-ASSETS = os.path.join(HERE, "assets")
-TEMPLATE_PDF = os.path.join(ASSETS, "gatepass.pdf")
-COORDS_JSON = os.path.join(ASSETS, "gatepass_coords.json")
+TEMPLATE_PDF, COORDS_JSON = stamping.TEMPLATES["gatepass"][:2]
 GATEPASSES_DIR = os.path.join(HERE, "gatepasses")
+INVOICES_DIR = os.path.join(HERE, "invoices")
 os.makedirs(GATEPASSES_DIR, exist_ok=True)
 
 
+def gatepass_data(row) -> dict:
+    """Values for the gatepass template (customer and showroom copy) from a sold_bikes row."""
+    data = {}
+    # dates for both copies
+    data["date"] = datetime.datetime.now().strftime("%d-%m-%Y")
+    data["date_show"] = datetime.datetime.now().strftime("%d-%m-%Y")
+
+    # customer copy values
+    data["name_cust"] = row.get("customer_name", "") or ""
+    data["cnic_cust"] = row.get("customer_cnic", "") or ""
+    data["cell_cust"] = row.get("customer_contact", "") or ""
+    data["brand_cust"] = row.get("brand", "") or ""
+    data["model_cust"] = row.get("model", "") or ""
+    data["engine_cust"] = row.get("engine_no", "") or ""
+    data["chassis_cust"] = row.get("chassis_no", "") or ""
+
+    # showroom copy values (reuse same by default)
+    data["name_show"] = data["name_cust"]
+    data["cnic_show"] = data["cnic_cust"]
+    data["cell_show"] = data["cell_cust"]
+    data["brand_show"] = data["brand_cust"]
+    data["model_show"] = data["model_cust"]
+    data["engine_show"] = data["engine_cust"]
+    data["chassis_show"] = data["chassis_cust"]
+
+    # certification text (optional) - if coords contain text keys they will be written
+    cert_text = "This is to certify that the following bike has been delivered to the customer."
+    data["cert_cust_text"] = cert_text
+    data["cert_show_text"] = cert_text
+
+    # mark certification boxes as checked (overlay will draw check if present)
+    data["cert_cust_checked"] = True
+    data["cert_show_checked"] = True
+
+    # Document delivery final wording (kept in template) - optionally override
+    data["doc_text"] = "Customer has received all relevant documents related to the bike."
+    return data
+
+
+def gatepass_path(row) -> str:
+    return os.path.join(GATEPASSES_DIR, f"gatepass_{row.get('invoice_no') or row.get('id')}.pdf")
+
+
+def invoice_data(row) -> dict:
+    """Values for the invoice template from a sold_bikes row (for reprints)."""
+    keys = ("invoice_no", "customer_name", "customer_so", "customer_cnic", "customer_contact",
+            "customer_address", "brand", "model", "colour", "engine_no", "chassis_no",
+            "listed_price", "sold_price", "gate_pass", "documents_delivered")
+    data = {k: row.get(k, "") or "" for k in keys}
+    data["date"] = row.get("sold_at", "") or ""
+    return data
+
+
+def invoice_path(row) -> str:
+    return os.path.join(INVOICES_DIR, f"invoice_{row.get('invoice_no') or row.get('id')}.pdf")
+
+
 class SoldBikesFrame(tk.Frame):
-    def __init__(self, master, db: DB, *args, **kwargs):
+    def __init__(self, master, db: DB, worker=None, filters: Filter = None, *args, **kwargs):
         super().__init__(master, *args, **kwargs)
         self.db = db
+        self.worker = worker
         self.cols = (
             "id", "inventory_id", "brand", "model", "colour", "variant", "category",
             "capacity", "engine_no", "chassis_no", "listed_price", "status",
@@ -43,7 +92,9 @@ class SoldBikesFrame(tk.Frame):
             "gate_pass", "documents_delivered",
             "invoice_no", "sold_at"
         )
-        self._rows = {}
+        self._rows = RowCache()
+        self._formats = {c: format_money for c in MONEY_COLUMNS["sold_bikes"]}
+        self._filters = filters   # the search the pages were loaded with (first: the app's)
         self.build()
 
     def build(self):
@@ -56,9 +107,20 @@ class SoldBikesFrame(tk.Frame):
         ttk.Button(toolbar, text="Mark Docs Delivered", command=self.toggle_documents_delivered).pack(side="left", padx=6)
         ttk.Button(toolbar, text="Edit", command=self.edit_row).pack(side="left", padx=6)
         ttk.Button(toolbar, text="Delete", command=self.delete_row).pack(side="left", padx=6)
+        ttk.Button(toolbar, text="Generate Documents…", command=self.generate_documents).pack(side="left", padx=6)
+        self.more_btn = ttk.Button(toolbar, text="Load more", command=lambda: self.pager.more())
+        self.more_btn.pack(side="right", padx=6)
+        self.page_info = ttk.Label(toolbar, text="")
+        self.page_info.pack(side="right", padx=6)
+
+        # sold_at range, on top of any search filters
+        self._dates = (None, None)
+        DateRangeBar(self, on_change=self.set_dates).pack(fill="x", padx=6)
 
         # --- Treeview inside scrollable wrapper ---
-        scroll = ScrollableTreeview(self, columns=self.cols, show="headings")
+        # older sales are paged in as the list is scrolled to the bottom
+        scroll = ScrollableTreeview(self, columns=self.cols, show="headings", on_end=lambda: self.pager.more())
+        self.scroll = scroll
         self.tree = scroll.get_tree()
 
         for c in self.cols:
@@ -77,30 +139,93 @@ class SoldBikesFrame(tk.Frame):
         # pack wrapper instead of tree
         scroll.pack(fill="both", expand=True)
 
+        # only some pages are loaded: headings re-query, ordered by an indexed column
+        self._sort = ()
+        scroll.enable_sorting(server=(PAGE_SORTS["sold_bikes"], self.set_sort))
+
         # double-click to create gatepass (convenience)
         self.tree.bind("<Double-1>", lambda e: self.create_gatepass())
 
-        # --- Load data initially ---
-        self.load()
+        def on_error(e):
+            messagebox.showerror("DB Error", f"Failed to fetch sold bikes:\n{e}")
 
-    def load(self, filters: dict = None):
-        # clear tree
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        self._rows.clear()
+        self._query = None
+        self.pager = PagedLoader(self.worker, self.db, None, self._show_rows,
+                                 scroll=self.scroll, on_error=on_error)
 
-        # get rows from db (if you later add filter support, pass it here)
-        try:
-            rows = self.db.list_sold_bikes() if filters is None else self.db.list_sold_bikes(filters=filters)
-        except Exception as e:
-            messagebox.showerror("DB Error", f"Failed to fetch sold bikes:\n{e}")
+        # --- Load data initially ---
+        self.load(self._filters)
+
+    def load(self, filters: Filter = None):
+        # newest page first (on the worker's reader thread when available);
+        # reloading with the same filters and dates keeps the pages already scrolled in
+        query = (filters or Filter()).without("sold_at").range("sold_at", *self._dates)
+        if self._sort:
+            query = Filter(query.conds, self._sort)
+        keep = query == self._query
+        self._filters = filters
+        self._query = query
+        self.pager.reset(lambda db, after, limit: db.page_sold_bikes(query, after, limit), keep=keep)
+
+    def set_dates(self, date_from, date_to):
+        self._dates = (date_from, date_to)
+        self.load(self._filters)
+
+    def set_sort(self, sort):
+        self._sort = sort
+        self.load(self._filters)
+
+    def _show_rows(self, rows):
+        # the cache holds the pager's rows themselves (no copy per row)
+        self._rows.replace(rows)
+        # diff against what the tree shows: a single edit costs a single item() call
+        self.scroll.sync_rows(self._rows.tree_rows(self.cols, self._formats))
+        more = self.pager.has_more
+        self.page_info.configure(text=f"{len(self._rows)} sales" + (" (scroll for older)" if more else ""))
+        self.more_btn.configure(state="normal" if more else "disabled")
+
+    def reveal(self, row_id):
+        """Select sale `row_id` (a search hit), reading it in if the pages loaded lack it."""
+        self.scroll.reveal(row_id, on_missing=self._load_row)
+
+    def _load_row(self, iid):
+        # older than the pages loaded, or outside the search / dates: listed
+        # after them until the next load
+        columns = self._rows.columns
+        load_async(self.worker, self.db, lambda db: db.get_rows("sold_bikes", [int(iid)], columns),
+                   self._add_row)
+
+    def _add_row(self, rows):
+        if not rows:
+            messagebox.showinfo("Not found", "This sale no longer exists.")
             return
+        self._rows.extend(rows)
+        self.scroll.sync_rows(self._rows.tree_rows(self.cols, self._formats))
+        self.scroll.select(rows[0]["id"])
 
-        for row in rows:
-            d = dict(row)
-            self._rows[d["id"]] = d
-            values = tuple(d.get(col, "") for col in self.cols)
-            self.tree.insert("", "end", iid=str(d["id"]), values=values)
+    def apply_changes(self, changes):
+        """
+        Patch the loaded sales that `changes` (FrameRegistry.notify) updated
+        or deleted, re-reading just those; False when the screen must reload.
+        """
+        ids = patchable_ids(changes, "sold_bikes", self._rows)
+        if ids is None:
+            return False
+        query = self._query.isin("id", sorted(ids))
+        load_async(self.worker, self.db, lambda db: db.page_sold_bikes(query, limit=len(ids))[0],
+                   lambda rows: self._patch_rows(rows, ids))
+        return True
+
+    def _patch_rows(self, rows, ids):
+        key = self._query.sort[0][0] if self._query.sort else "sold_at"
+        if any(row[key] != self._rows[row["id"]][key] for row in rows if row["id"] in self._rows):
+            # an edit moved a row in the page order: re-read the pages loaded
+            self.load(self._filters)
+            return
+        self.pager.patch(rows, ids)
+        dropped = self._rows.patch(rows, ids)
+        self.scroll.patch_rows(self._rows.tree_rows(self.cols, self._formats, ids), dropped)
+        self.page_info.configure(text=f"{len(self._rows)} sales" + (" (scroll for older)" if self.pager.has_more else ""))
 
     # ---------------- EDIT ----------------
     def edit_row(self):
@@ -122,20 +247,23 @@ class SoldBikesFrame(tk.Frame):
             ttk.Label(win, text=col.replace("_", " ").title()).grid(row=i, column=0, sticky="e", padx=4, pady=2)
             e = ttk.Entry(win, width=40)
             e.grid(row=i, column=1, padx=4, pady=2)
-            e.insert(0, row.get(col, "") or "")
+            e.insert(0, money_text(row.get(col)) if col in MONEY_COLUMNS["sold_bikes"] else row.get(col, "") or "")
             entries[col] = e
 
         def save_changes():
             updated = {col: entries[col].get().strip() for col in self.cols}
+            updated["sold_at"] = iso_timestamp(updated["sold_at"])
             try:
-                c = self.db.conn.cursor()
-                sets = ", ".join([f"{col} = ?" for col in self.cols if col != "id"])
-                values = [updated[col] for col in self.cols if col != "id"]
-                values.append(updated["id"])
-                c.execute(f"UPDATE sold_bikes SET {sets} WHERE id = ?", values)
-                self.db.conn.commit()
+                for col in MONEY_COLUMNS["sold_bikes"]:
+                    if col in updated:
+                        updated[col] = to_paisa(updated[col])
+                with self.db.transaction() as c:
+                    sets = ", ".join([f"{col} = ?" for col in self.cols if col != "id"])
+                    values = [updated[col] for col in self.cols if col != "id"]
+                    values.append(updated["id"])
+                    c.execute(f"UPDATE sold_bikes SET {sets} WHERE id = ?", values)
+                    self.db.changed("sold_bikes", row_id)
                 win.destroy()
-                self.load()
                 messagebox.showinfo("Success", "Row updated successfully")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to update row:\n{e}")
@@ -152,10 +280,9 @@ class SoldBikesFrame(tk.Frame):
         if not messagebox.askyesno("Confirm", "Are you sure you want to delete this row?"):
             return
         try:
-            cur = self.db.conn.cursor()
-            cur.execute("DELETE FROM sold_bikes WHERE id = ?", (row_id,))
-            self.db.conn.commit()
-            self.load()
+            with self.db.transaction() as cur:
+                cur.execute("DELETE FROM sold_bikes WHERE id = ?", (row_id,))
+                self.db.changed("sold_bikes", row_id, "delete")
             messagebox.showinfo("Deleted", "Row deleted successfully")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete row:\n{e}")
@@ -178,7 +305,7 @@ class SoldBikesFrame(tk.Frame):
         if not row:
             return
 
-        if not REPORTLAB_AVAILABLE or not PYPDF2_AVAILABLE:
+        if not stamping.REPORTLAB_AVAILABLE or not stamping.PYPDF2_AVAILABLE:
             messagebox.showerror("Missing libraries", "ReportLab and PyPDF2 are required to generate gatepass PDFs.")
             return
 
@@ -189,180 +316,49 @@ class SoldBikesFrame(tk.Frame):
             )
             return
 
-        # build data expected by coords JSON
-        data = {}
-        # dates for both copies
-        now_str = datetime.datetime.now().strftime("%d-%m-%Y")
-        data["date"] = datetime.datetime.now().strftime("%d-%m-%Y")
-        data["date_show"] = datetime.datetime.now().strftime("%d-%m-%Y")
-
-        # customer copy values
-        data["name_cust"] = row.get("customer_name", "") or ""
-        data["cnic_cust"] = row.get("customer_cnic", "") or ""
-        data["cell_cust"] = row.get("customer_contact", "") or ""
-        data["brand_cust"] = row.get("brand", "") or ""
-        data["model_cust"] = row.get("model", "") or ""
-        data["engine_cust"] = row.get("engine_no", "") or ""
-        data["chassis_cust"] = row.get("chassis_no", "") or ""
-
-        # showroom copy values (reuse same by default)
-        data["name_show"] = data["name_cust"]
-        data["cnic_show"] = data["cnic_cust"]
-        data["cell_show"] = data["cell_cust"]
-        data["brand_show"] = data["brand_cust"]
-        data["model_show"] = data["model_cust"]
-        data["engine_show"] = data["engine_cust"]
-        data["chassis_show"] = data["chassis_cust"]
-
-        # certification text (optional) - if coords contain text keys they will be written
-        cert_text = "This is to certify that the following bike has been delivered to the customer."
-        data["cert_cust_text"] = cert_text
-        data["cert_show_text"] = cert_text
-
-        # mark certification boxes as checked (overlay will draw check if present)
-        data["cert_cust_checked"] = True
-        data["cert_show_checked"] = True
-
-        # Document delivery final wording (kept in template) - optionally override
-        data["doc_text"] = "Customer has received all relevant documents related to the bike."
+        data = gatepass_data(row)
 
         # output path
-        out_pdf = os.path.join(GATEPASSES_DIR, f"gatepass_{row.get('invoice_no') or row.get('id')}.pdf")
+        out_pdf = gatepass_path(row)
 
         try:
-            self._write_gatepass_on_template(out_pdf, data, TEMPLATE_PDF, COORDS_JSON)
+            stamping.render_to_file("gatepass", data, out_pdf)
             webbrowser.open("file://" + os.path.abspath(out_pdf))
             # update DB: mark gate_pass yes and save timestamp
             try:
-                cur = self.db.conn.cursor()
-                now_ts = datetime.datetime.now().strftime("%d-%m-%Y")
-                # add gatepass_at column in DB if you want to store timestamp (migration required)
-                cur.execute("UPDATE sold_bikes SET gate_pass = ?, gatepass_at = ? WHERE id = ?", ("yes", now_ts, row["id"]))
-                self.db.conn.commit()
+                with self.db.transaction() as cur:
+                    now_ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    # add gatepass_at column in DB if you want to store timestamp (migration required)
+                    cur.execute("UPDATE sold_bikes SET gate_pass = ?, gatepass_at = ? WHERE id = ?", ("yes", now_ts, row["id"]))
+                    self.db.changed("sold_bikes", row["id"])
             except Exception:
                 # if columns missing, try a lighter update just gate_pass
                 try:
-                    cur = self.db.conn.cursor()
-                    cur.execute("UPDATE sold_bikes SET gate_pass = ? WHERE id = ?", ("yes", row["id"]))
-                    self.db.conn.commit()
+                    with self.db.transaction() as cur:
+                        cur.execute("UPDATE sold_bikes SET gate_pass = ? WHERE id = ?", ("yes", row["id"]))
+                        self.db.changed("sold_bikes", row["id"])
                 except Exception:
                     pass
-            self.load()
             messagebox.showinfo("Gatepass", f"Gatepass created:\n{out_pdf}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to create gatepass: {e}")
 
-    def _write_gatepass_on_template(self, out_path, data, template_path, coords_path):
-        """
-        Create overlay PDF from data and merge onto template.
-        - Writes values for keys found in coords JSON.
-        - If coords include 'cert_cust_box' or 'cert_show_box' it will draw a checkbox and mark it using
-          data['cert_cust_checked'] / data['cert_show_checked'] (truthy => draw ✓).
-        - If coords include text keys (cert_cust_text / cert_show_text / doc_text) they will be drawn.
-        """
-        if not REPORTLAB_AVAILABLE or not PYPDF2_AVAILABLE:
-            raise RuntimeError("ReportLab and PyPDF2 are required to generate gatepass PDFs.")
-
-        coords = {}
-        if os.path.exists(coords_path):
-            try:
-                with open(coords_path, "r", encoding="utf-8") as f:
-                    coords = json.load(f)
-            except Exception:
-                coords = {}
-
-        # helper to get coords value (fallback to None)
-        def get_pos(key):
-            v = coords.get(key)
-            if isinstance(v, (list, tuple)) and len(v) >= 2:
-                return float(v[0]), float(v[1])
-            return None
-
-        # create overlay
-        fd, overlay_path = tempfile.mkstemp(suffix=".pdf")
-        os.close(fd)
-        c = rl_canvas.Canvas(overlay_path, pagesize=A4)
-        c.setFont("Helvetica", 10)
-
-        # write simple text fields if coords exist
-        text_keys = [
-            "date", "date_show",
-            "name_cust", "cnic_cust", "cell_cust", "brand_cust", "model_cust", "engine_cust", "chassis_cust",
-            "name_show", "cnic_show", "cell_show", "brand_show", "model_show", "engine_show", "chassis_show",
-            "doc_text", "cert_cust_text", "cert_show_text"
-        ]
-        for key in text_keys:
-            pos = get_pos(key)
-            if pos:
-                val = data.get(key, "")
-                if val is None:
-                    val = ""
-                # multiline handling
-                if isinstance(val, str) and "\n" in val:
-                    yy = pos[1]
-                    for line in val.splitlines():
-                        c.drawString(pos[0], yy, line)
-                        yy -= 12
-                else:
-                    c.drawString(pos[0], pos[1], str(val))
-
-        # draw checkbox rectangles for cert boxes if coords present
-        # expected coords keys in JSON: "cert_cust_box", "cert_show_box"
-        for box_key, checked_flag in (("cert_cust_box", "cert_cust_checked"), ("cert_show_box", "cert_show_checked")):
-            pos = get_pos(box_key)
-            if pos:
-                bx, by = pos
-                # draw a small 12x12 box (if template doesn't already have it)
-                try:
-                    c.rect(bx, by, 12, 12, stroke=1, fill=0)
-                except Exception:
-                    pass
-                # draw check if checked
-                if data.get(checked_flag):
-                    # draw a simple check mark
-                    c.setFont("Helvetica-Bold", 12)
-                    # small offset so it looks centered
-                    c.drawString(bx + 2, by + 1, "✓")
-                    c.setFont("Helvetica", 10)
-
-        # If coords specify explicit checkbox positions for gate_pass or documents, handle similarly
-        # (backwards compatibility: check keys 'gate_pass_box' or 'docs_box')
-        extra_boxes = [
-            ("gate_pass_box", "gate_pass"),
-            ("docs_box", "documents_delivered"),
-        ]
-        for box_key, data_key in extra_boxes:
-            pos = get_pos(box_key)
-            if pos:
-                bx, by = pos
-                c.rect(bx, by, 12, 12, stroke=1, fill=0)
-                val = str(data.get(data_key, "")).lower()
-                if val in ("yes", "y", "true", "1"):
-                    c.setFont("Helvetica-Bold", 12)
-                    c.drawString(bx + 2, by + 1, "✓")
-                    c.setFont("Helvetica", 10)
-
-        c.save()
-
-        # merge overlay with template
-        reader = PdfReader(template_path)
-        overlay = PdfReader(overlay_path)
-        writer = PdfWriter()
-        page = reader.pages[0]
-        page.merge_page(overlay.pages[0])
-        writer.add_page(page)
-        # preserve other pages of template if any
-        for p in reader.pages[1:]:
-            writer.add_page(p)
-        with open(out_path, "wb") as f:
-            writer.write(f)
-
-        try:
-            os.remove(overlay_path)
-        except Exception:
-            pass
-
-        return out_path
+    def generate_documents(self):
+        """Gatepasses / invoices for the selected rows or a date range, in one go."""
+        def selected_rows():
+            return [self._rows[int(i)] for i in self.tree.selection() if int(i) in self._rows]
+
+        os.makedirs(INVOICES_DIR, exist_ok=True)
+        BatchDocsDialog(
+            self, self.db, self.worker,
+            kinds={
+                "Gatepasses": lambda rows: [("gatepass", gatepass_data(r), gatepass_path(r)) for r in rows],
+                "Invoices": lambda rows: [("invoice", invoice_data(r), invoice_path(r)) for r in rows],
+            },
+            selected_rows=selected_rows,
+            rows_between=lambda db, date_from, date_to: db.list_sold_bikes_between(date_from, date_to),
+            out_dir=GATEPASSES_DIR,
+        )
 
     # ---------------- NEW: toggle documents_delivered ----------------
     def toggle_documents_delivered(self):
@@ -372,10 +368,9 @@ class SoldBikesFrame(tk.Frame):
         cur_state = str(row.get("documents_delivered") or "").lower()
         new_state = "yes" if cur_state not in ("yes", "y", "true", "1") else "no"
         try:
-            cur = self.db.conn.cursor()
-            cur.execute("UPDATE sold_bikes SET documents_delivered = ? WHERE id = ?", (new_state, row["id"]))
-            self.db.conn.commit()
-            self.load()
+            with self.db.transaction() as cur:
+                cur.execute("UPDATE sold_bikes SET documents_delivered = ? WHERE id = ?", (new_state, row["id"]))
+                self.db.changed("sold_bikes", row["id"])
             messagebox.showinfo("Updated", f"Documents Delivered set to '{new_state}' for the selected bike.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update documents_delivered: {e}")
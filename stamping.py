@@ -0,0 +1,370 @@
+# stamping.py
+"""
+Template stamping for invoices, gatepasses and booking letters.
+
+render(template_id, data) draws the values in `data` on an overlay page at
+the positions from the template's coords JSON, merges it onto the first page
+of the template PDF and returns the finished PDF as bytes; render_to() streams
+it into any binary file object instead. Overlays never touch the disk.
+
+Each template PDF is parsed once and kept (with its coords) until the PDF or
+the coords file changes on disk, so a document costs only the overlay draw
+and the merge.
+
+ReportLab and PyPDF2 take longer to import than the rest of the app, so they
+are imported on first use (or by preload() in the background after login),
+never at startup.
+"""
+import importlib.util
+import io
+import json
+import os
+import threading
+
+from db import MONEY_COLUMNS, format_money
+
+# optional libs (ReportLab + PyPDF2) are required for PDF generation;
+# find_spec only looks for them, it does not import them
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
+PYPDF2_AVAILABLE = importlib.util.find_spec("PyPDF2") is not None
+
+
+def _reportlab():
+    """(canvas module, A4 page size), imported on first call."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    return canvas, A4
+
+
+def _pypdf2():
+    """(PdfReader, PdfWriter, PageObject), imported on first call."""
+    from PyPDF2 import PdfReader, PdfWriter, PageObject
+    return PdfReader, PdfWriter, PageObject
+
+
+def preload():
+    """Import the PDF libraries now, so the first document does not wait for them."""
+    if REPORTLAB_AVAILABLE:
+        _reportlab()
+    if PYPDF2_AVAILABLE:
+        _pypdf2()
+
+HERE = os.path.dirname(__file__)
+ASSETS_DIR = os.path.join(HERE, "assets")
+
+
+# ---------- DRAWING (one function per template) ----------
+def _draw_invoice(c, coords, data):
+    """Values only (the labels are on the template), defaults if coords are missing."""
+    width, height = _reportlab()[1]
+    defaults = {
+        "date": [width - 174, height - 50],
+        "invoice_no": [width - 144, height - 64],
+        "customer_name": [90, height - 130],
+        "customer_so": [470, height - 130],
+        "customer_cnic": [90, height - 148],
+        "customer_contact": [320, height - 148],
+        "customer_address": [104, height - 175],
+        "brand": [120, height - 330],
+        "model": [340, height - 330],
+        "colour": [120, height - 355],
+        "engine_no": [370, height - 355],
+        "chassis_no": [130, height - 380],
+        "listed_price": [120, height - 410],
+        "sold_price": [320, height - 410],
+        "gate_pass": [110, height - 438],
+        "documents_delivered": [440, height - 438],
+        "footer_left": [40, height - 520],
+        "footer_right": [360, height - 520]
+    }
+
+    def gpos(key):
+        v = coords.get(key)
+        if isinstance(v, (list, tuple)) and len(v) >= 2:
+            return float(v[0]), float(v[1])
+        d = defaults.get(key, (40, height - 200))
+        return float(d[0]), float(d[1])
+
+    c.setFont("Helvetica", 10)
+    c.setFillColorRGB(0, 0, 0)
+
+    def write_val(key, value, right_align=False, fontsize=10):
+        if value is None:
+            return
+        x, y = gpos(key)
+        c.setFont("Helvetica", fontsize)
+        if right_align:
+            c.drawRightString(x, y, str(value))
+        else:
+            c.drawString(x, y, str(value))
+
+    def write_multiline(key, text, fontsize=9, leading=12):
+        if not text:
+            return
+        x, y = gpos(key)
+        c.setFont("Helvetica", fontsize)
+        # top-down writing inside box: y is starting top
+        for line in str(text).splitlines():
+            c.drawString(x, y, line)
+            y -= leading
+
+    for key in ("date", "invoice_no", "customer_name", "customer_so", "customer_cnic", "customer_contact"):
+        write_val(key, data.get(key, ""))
+    write_multiline("customer_address", data.get("customer_address", ""))
+    for key in ("brand", "model", "colour", "engine_no", "chassis_no"):
+        write_val(key, data.get(key, ""))
+    write_val("sold_price", _money(data.get("sold_price")))
+
+    # gate pass / documents delivered: box, ticked when the value is yes-ish
+    for key in ("gate_pass", "documents_delivered"):
+        x, y = gpos(key)
+        c.rect(x, y, 12, 12, stroke=1, fill=0)
+        if str(data.get(key, "")).lower() in ("yes", "y", "true", "1"):
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(x + 2, y, "✓")
+
+
+def _money(val):
+    """An amount in paisa as shown on documents; anything else as given."""
+    try:
+        return format_money(val)
+    except (TypeError, ValueError):
+        return str(val)
+
+
+def _draw_gatepass(c, coords, data):
+    """
+    Customer and showroom copies. Text keys are written where coords exist;
+    cert_*_box / gate_pass_box / docs_box get a box, ticked from the data.
+    """
+    def get_pos(key):
+        v = coords.get(key)
+        if isinstance(v, (list, tuple)) and len(v) >= 2:
+            return float(v[0]), float(v[1])
+        return None
+
+    c.setFont("Helvetica", 10)
+    text_keys = [
+        "date", "date_show",
+        "name_cust", "cnic_cust", "cell_cust", "brand_cust", "model_cust", "engine_cust", "chassis_cust",
+        "name_show", "cnic_show", "cell_show", "brand_show", "model_show", "engine_show", "chassis_show",
+        "doc_text", "cert_cust_text", "cert_show_text"
+    ]
+    for key in text_keys:
+        pos = get_pos(key)
+        if pos:
+            val = data.get(key, "")
+            if val is None:
+                val = ""
+            if isinstance(val, str) and "\n" in val:
+                yy = pos[1]
+                for line in val.splitlines():
+                    c.drawString(pos[0], yy, line)
+                    yy -= 12
+            else:
+                c.drawString(pos[0], pos[1], str(val))
+
+    boxes = [
+        ("cert_cust_box", lambda: data.get("cert_cust_checked")),
+        ("cert_show_box", lambda: data.get("cert_show_checked")),
+        ("gate_pass_box", lambda: str(data.get("gate_pass", "")).lower() in ("yes", "y", "true", "1")),
+        ("docs_box", lambda: str(data.get("documents_delivered", "")).lower() in ("yes", "y", "true", "1")),
+    ]
+    for box_key, checked in boxes:
+        pos = get_pos(box_key)
+        if pos:
+            bx, by = pos
+            c.rect(bx, by, 12, 12, stroke=1, fill=0)
+            if checked():
+                c.setFont("Helvetica-Bold", 12)
+                c.drawString(bx + 2, by + 1, "✓")
+                c.setFont("Helvetica", 10)
+
+
+def _draw_booking(c, coords, data):
+    """Every key in the coords JSON; amounts (paisa) through format_money."""
+    c.setFont("Helvetica", 10)
+    for key, xy in coords.items():
+        if not isinstance(xy, (list, tuple)) or len(xy) != 2:
+            continue
+        x, y = xy
+        val = data.get(key, "")
+        if key in MONEY_COLUMNS["bookings"]:
+            val = _money(val)
+        else:
+            val = str(val) if val is not None else ""
+        c.drawString(float(x), float(y), val)
+
+
+# template id -> (template PDF, coords JSON, draw function)
+TEMPLATES = {
+    "invoice": (os.path.join(ASSETS_DIR, "invoice.pdf"),
+                os.path.join(ASSETS_DIR, "detected_coords.json"), _draw_invoice),
+    "gatepass": (os.path.join(ASSETS_DIR, "gatepass.pdf"),
+                 os.path.join(ASSETS_DIR, "gatepass_coords.json"), _draw_gatepass),
+    "booking": (os.path.join(ASSETS_DIR, "booking_letter.pdf"),
+                os.path.join(ASSETS_DIR, "booking_coords.json"), _draw_booking),
+}
+
+
+# ---------- PARSED TEMPLATE CACHE ----------
+class _Template:
+    def __init__(self, pdf_path, coords_path, key):
+        self.key = key
+        self.pages = _pypdf2()[0](pdf_path).pages
+        self.first = self.pages[0]
+        self.coords = {}
+        if os.path.exists(coords_path):
+            try:
+                with open(coords_path, "r", encoding="utf-8") as f:
+                    self.coords = json.load(f)
+            except Exception:
+                self.coords = {}
+        # PdfReader resolves objects lazily from its file: one merge at a time
+        self.lock = threading.Lock()
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def available(template_id: str) -> bool:
+    """True if the libraries and the template PDF for `template_id` are present."""
+    return REPORTLAB_AVAILABLE and PYPDF2_AVAILABLE and os.path.exists(TEMPLATES[template_id][0])
+
+
+def load_template(template_id: str) -> _Template:
+    """The parsed template, re-read only when its PDF or coords file changed."""
+    pdf_path, coords_path, _draw = TEMPLATES[template_id]
+    key = (_mtime(pdf_path), _mtime(coords_path))
+    with _cache_lock:
+        tpl = _cache.get(template_id)
+        if tpl is None or tpl.key != key:
+            if key[0] is None:
+                raise FileNotFoundError(f"Template PDF not found: {pdf_path}")
+            tpl = _cache[template_id] = _Template(pdf_path, coords_path, key)
+    return tpl
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ---------- RENDER ----------
+def render_to(template_id: str, data: dict, out) -> None:
+    """Stamp `data` onto template `template_id`, writing the PDF to `out` (binary file object)."""
+    if not REPORTLAB_AVAILABLE or not PYPDF2_AVAILABLE:
+        raise RuntimeError("ReportLab and PyPDF2 are required to generate PDFs.")
+    _pdf_path, _coords_path, draw = TEMPLATES[template_id]
+    rl_canvas, A4 = _reportlab()
+    PdfReader, PdfWriter, PageObject = _pypdf2()
+    tpl = load_template(template_id)
+
+    overlay_buf = io.BytesIO()
+    c = rl_canvas.Canvas(overlay_buf, pagesize=A4)
+    draw(c, tpl.coords, data)
+    c.save()
+    overlay_buf.seek(0)
+
+    with tpl.lock:
+        overlay = PdfReader(overlay_buf)
+        # merge onto a shallow copy: merge_page rewrites the page's
+        # /Contents and /Resources, the cached page must stay pristine
+        page = PageObject(tpl.first.pdf)
+        page.update(tpl.first)
+        page.merge_page(overlay.pages[0])
+        writer = PdfWriter()
+        writer.add_page(page)
+        # preserve other pages of the template if any
+        for p in tpl.pages[1:]:
+            writer.add_page(p)
+        writer.write(out)
+
+
+def render(template_id: str, data: dict) -> bytes:
+    """Stamp `data` onto template `template_id` and return the PDF bytes."""
+    out = io.BytesIO()
+    render_to(template_id, data, out)
+    return out.getvalue()
+
+
+def render_to_file(template_id: str, data: dict, out_path: str) -> str:
+    with open(out_path, "wb") as f:
+        render_to(template_id, data, f)
+    return out_path
+
+
+# ---------- BATCHES ----------
+# Below this many documents a process pool costs more to start than it saves.
+POOL_THRESHOLD = 8
+
+
+def _render_job(job):
+    template_id, data, out_path = job
+    render_to_file(template_id, data, out_path)
+    return out_path
+
+
+def render_batch(jobs, combine_path=None, progress=None, max_workers=None):
+    """
+    Render many (template_id, data, out_path) jobs, e.g. a month-end reprint.
+
+    ReportLab holds the GIL, so large batches are spread over a process pool
+    (each process keeps its own template cache). `data` must be picklable:
+    pass dicts, not sqlite3.Row. progress(done, total) is called from the
+    calling thread as documents finish. With combine_path, all documents are
+    also concatenated (in job order) into one print-ready PDF there.
+    Returns (paths written, [(out_path, error message), ...]).
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed  # multiprocessing is slow to import
+
+    jobs = list(jobs)
+    total = len(jobs)
+    failed = {}
+    done = 0
+    workers = max_workers or os.cpu_count() or 1
+
+    if total < POOL_THRESHOLD or workers == 1:
+        for job in jobs:
+            try:
+                _render_job(job)
+            except Exception as e:
+                failed[job[2]] = str(e)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_render_job, job): job for job in jobs}
+            for fut in as_completed(futures):
+                exc = fut.exception()
+                if exc is not None:
+                    failed[futures[fut][2]] = str(exc)
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+
+    paths = [job[2] for job in jobs if job[2] not in failed]
+    if combine_path and paths:
+        combine(paths, combine_path)
+    return paths, list(failed.items())
+
+
+def combine(paths, out_path):
+    """Concatenate the PDFs at `paths` into one file at `out_path`."""
+    PdfReader, PdfWriter, _PageObject = _pypdf2()
+    writer = PdfWriter()
+    for path in paths:
+        for page in PdfReader(path).pages:
+            writer.add_page(page)
+    with open(out_path, "wb") as f:
+        writer.write(f)
+    return out_path
@@ -0,0 +1,95 @@
+# startup_bench.py
+"""
+Startup time check: how long until the login window can show.
+
+Runs `python -X importtime -c "import main"` a few times in fresh processes and
+reports the median total import time and the slowest modules. Exits non-zero
+if the median is over the budget, or if a library that must stay deferred
+(PDF/imaging stacks, multiprocessing) got imported at startup.
+
+With a display, it also times `App()` until the login window is drawn.
+
+Usage:  python startup_bench.py [--runs 5] [--budget-ms 150] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# imported on first use only (see stamping.py / main.py)
+DEFERRED = ("reportlab", "PyPDF2", "PIL", "multiprocessing")
+
+WINDOW_SNIPPET = (
+    "import time; t = time.perf_counter(); import main; app = main.App(); app.update(); "
+    "print(time.perf_counter() - t); app.destroy()"
+)
+
+
+def import_profile():
+    """{module: cumulative microseconds} for one cold `import main`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"import main failed:\n{proc.stderr}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def window_time():
+    """Seconds from start to the login window drawn, or None without a display."""
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        return None
+    proc = subprocess.run([sys.executable, "-c", WINDOW_SNIPPET], cwd=HERE, capture_output=True, text=True)
+    try:
+        return float(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=150.0)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = [p.get("main", 0) / 1000 for p in profiles]
+    median_ms = statistics.median(totals)
+    last = profiles[-1]
+
+    print(f"import main: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f})")
+    print("slowest top-level imports:")
+    top = sorted(((us, name) for name, us in last.items() if name != "main" and "." not in name), reverse=True)
+    for us, name in top[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    secs = window_time()
+    if secs is not None:
+        print(f"login window drawn after {secs * 1000:.0f} ms")
+
+    failed = False
+    eager = sorted(name for name in last if name.split(".")[0] in DEFERRED and "." not in name)
+    if eager:
+        print(f"FAIL: imported at startup, should be deferred: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: median import time {median_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
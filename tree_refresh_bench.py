@@ -0,0 +1,160 @@
+# tree_refresh_bench.py
+"""
+Incremental tree refresh check: Tk calls per refresh after a small change.
+
+Feeds ScrollableTreeview.sync_rows() a list of --rows rows, then the same
+list after one edit, one insert, one delete, a swap and no change at all,
+and counts the Treeview calls each refresh makes (insert / item / move /
+detach / delete) next to the old delete-all + insert-all refresh. Exits
+non-zero if a one-row change costs more than a few calls, or if the tree
+does not end up showing exactly the rows given.
+
+With a display the real widget is used (and timed); without one the tree
+is a model of ttk.Treeview's item order and values, so the call counts
+can still be checked headless.
+
+Usage:  python tree_refresh_bench.py [--rows 5000] [--max-calls 4]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from widgets.scrollable_treeview import ScrollableTreeview
+
+COUNTED = ("insert", "item", "move", "detach", "delete")
+
+
+class ModelTree:
+    """Top-level items of a ttk.Treeview: their order and values, nothing drawn."""
+
+    def __init__(self):
+        self.items = []
+        self.values = {}
+
+    def get_children(self, item=""):
+        return tuple(self.items)
+
+    def insert(self, parent, index, iid, values):
+        self.items.insert(index, iid)
+        self.values[iid] = tuple(values)
+
+    def item(self, iid, values=None):
+        if values is None:
+            return {"values": list(self.values[iid])}
+        self.values[iid] = tuple(values)
+
+    def move(self, iid, parent, index):
+        if iid in self.items:
+            self.items.remove(iid)
+        self.items.insert(index, iid)
+
+    def _unlink(self, iids):
+        gone = set(iids)
+        self.items = [i for i in self.items if i not in gone]
+
+    def detach(self, *iids):
+        self._unlink(iids)
+
+    def delete(self, *iids):
+        self._unlink(iids)
+        for iid in iids:
+            del self.values[iid]
+
+
+def widget():
+    """(ScrollableTreeview, Tk root or None); headless without a display."""
+    if not (sys.platform.startswith("linux") and not os.environ.get("DISPLAY")):
+        import tkinter as tk
+        root = tk.Tk()
+        scroll = ScrollableTreeview(root, columns=("a", "b", "c"))
+        scroll.pack()
+        return scroll, root
+    scroll = object.__new__(ScrollableTreeview)
+    # the state __init__ gives a non-virtual, unsorted tree
+    scroll.__dict__.update(tree=ModelTree(), virtual=False, _values={}, _order=[], _sort=(), _server=None,
+                           _busy=False, _reveal=None)
+    return scroll, None
+
+
+def counting(tree):
+    """Wrap the tree's COUNTED methods; returns the {name: calls} they add to."""
+    calls = dict.fromkeys(COUNTED, 0)
+    for name in COUNTED:
+        method = getattr(tree, name)
+
+        def wrapper(*args, _name=name, _method=method, **kwargs):
+            calls[_name] += 1
+            return _method(*args, **kwargs)
+        setattr(tree, name, wrapper)
+    return calls
+
+
+def shows(tree, rows):
+    if [str(iid) for iid, _values in rows] != list(tree.get_children()):
+        return False
+    return all(tuple(str(v) for v in tree.item(str(iid))["values"]) == tuple(str(v) for v in values)
+               for iid, values in rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--max-calls", type=int, default=4, help="allowed Tk calls for a one-row change")
+    args = ap.parse_args()
+
+    scroll, root = widget()
+    tree = scroll.tree
+    calls = counting(tree)
+    n = args.rows
+    rows = [(i, (i, f"Brand{i % 20}", i * 10)) for i in range(n, 0, -1)]
+    failed = False
+
+    def refresh(label, rows, small=False):
+        nonlocal failed
+        for name in calls:
+            calls[name] = 0
+        t = time.perf_counter()
+        scroll.sync_rows(list(rows))
+        if root is not None:
+            root.update_idletasks()
+        ms = (time.perf_counter() - t) * 1000
+        total = sum(calls.values())
+        detail = ", ".join(f"{k} {v}" for k, v in calls.items() if v)
+        ok = shows(tree, rows) and (not small or total <= args.max_calls)
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label:16} {total:7d} Tk calls  {ms:8.1f} ms  {detail}")
+
+    print(f"{n} rows, {'Tk' if root is not None else 'headless model tree'}; "
+          f"delete-all + insert-all would make {2 * n} calls per refresh")
+    refresh("initial load", rows)
+    rows[n // 3] = (rows[n // 3][0], (0, "edited", 1))
+    refresh("edit one row", rows, small=True)
+    rows.insert(0, (n + 1, (n + 1, "new", 0)))
+    refresh("add one row", rows, small=True)
+    del rows[n // 2]
+    refresh("delete one row", rows, small=True)
+    rows[10], rows[n // 2] = rows[n // 2], rows[10]
+    refresh("swap two rows", rows, small=True)
+    refresh("no change", rows, small=True)
+
+    # arbitrary reorders, removals and additions still end up exact
+    random.seed(0)
+    for k in range(10):
+        rows = random.sample(rows, random.randint(1, len(rows)))
+        rows += [(10 ** 7 + k * 100 + j, (j, "added", j)) for j in range(random.randint(0, 5))]
+        random.shuffle(rows)
+        scroll.sync_rows(list(rows))
+        if not shows(tree, rows):
+            print(f"FAIL random refresh {k}: tree does not match the rows")
+            failed = True
+
+    if root is not None:
+        root.destroy()
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# wal_stress.py
+"""
+Multi-terminal stress check: concurrent readers and writers as separate processes.
+
+Stands in for several counters sharing one showroom database: --writers
+processes each add and then sell bikes (DB.add_bike + DB.sell_bike, i.e.
+the single writer connection and its transaction), while --readers
+processes keep paging the sold list and listing stock through the read
+pool. Each DB.PROFILES profile is run against a fresh database file.
+
+Reports per-process throughput, "database is locked" errors and the
+slowest read, then checks the counts add up. Exits non-zero on any locked
+error, any other failure, or wrong counts.
+
+Usage:  python wal_stress.py [--writers 2] [--readers 4] [--sales 500] [--reads 300]
+                             [--profile local] [--profile network]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from db import DB, PROFILES
+
+STOCK = 5000   # bikes in stock before the run
+
+
+def _locked(exc):
+    return isinstance(exc, sqlite3.OperationalError) and "locked" in str(exc)
+
+
+def writer(path, profile, worker, sales):
+    """Add and sell `sales` bikes; (sales done, locked errors, seconds)."""
+    db = DB(path, PROFILES[profile])
+    done = locked = 0
+    t = time.perf_counter()
+    for i in range(sales):
+        try:
+            bike = db.add_bike("Honda", "CD70", "Red", "", "Bike", "70cc",
+                               f"W{worker}E{i}", f"W{worker}C{i}", 15000000, "in stock")
+            db.sell_bike(bike, f"Customer {i}", f"{worker:02d}{i:011d}", sold_price=14500000)
+            done += 1
+        except sqlite3.OperationalError as e:
+            if not _locked(e):
+                raise
+            locked += 1
+    elapsed = time.perf_counter() - t
+    db.close()
+    return done, locked, elapsed
+
+
+def reader(path, profile, reads):
+    """`reads` rounds of list queries; (rounds done, locked errors, slowest round in seconds)."""
+    db = DB(path, PROFILES[profile])
+    done = locked = 0
+    worst = 0.0
+    for _ in range(reads):
+        t = time.perf_counter()
+        try:
+            db.page_sold_bikes()
+            db.list_inventory()
+            done += 1
+        except sqlite3.OperationalError as e:
+            if not _locked(e):
+                raise
+            locked += 1
+        worst = max(worst, time.perf_counter() - t)
+    db.close()
+    return done, locked, worst
+
+
+def run(profile, args, tmp):
+    path = os.path.join(tmp, f"{profile}.db")
+    db = DB(path, PROFILES[profile])
+    with db.transaction() as cur:
+        cur.executemany(
+            "INSERT INTO inventory (brand, model, engine_no, chassis_no, listed_price, status) "
+            "VALUES ('Yamaha', 'YBR', ?, ?, 20000000, 'in stock')",
+            ((f"S{i}", f"SC{i}") for i in range(STOCK)))
+    db.close()
+
+    with multiprocessing.Pool(args.writers + args.readers) as pool:
+        t = time.perf_counter()
+        writers = [pool.apply_async(writer, (path, profile, w, args.sales)) for w in range(args.writers)]
+        readers = [pool.apply_async(reader, (path, profile, args.reads)) for _ in range(args.readers)]
+        writes = [r.get() for r in writers]
+        reads = [r.get() for r in readers]
+        elapsed = time.perf_counter() - t
+
+    locked = sum(w[1] for w in writes) + sum(r[1] for r in reads)
+    print(f"{profile}: {elapsed:.1f} s, {args.writers} writers x {args.sales} sales, "
+          f"{args.readers} readers x {args.reads} rounds")
+    for done, errors, secs in writes:
+        print(f"  writer  {done:6d} sales  {done / secs:7.0f} sales/s  {errors} locked")
+    for done, errors, worst in reads:
+        print(f"  reader  {done:6d} rounds  slowest {worst * 1000:6.1f} ms  {errors} locked")
+
+    db = DB(path, PROFILES[profile])
+    sold = db.conn.execute("SELECT COUNT(*) FROM sold_bikes").fetchone()[0]
+    stock = db.conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
+    db.close()
+    expected = sum(w[0] for w in writes)
+    ok = locked == 0 and sold == expected and stock == STOCK
+    if not ok:
+        print(f"  FAIL: {locked} locked errors, {sold} sold (expected {expected}), "
+              f"{stock} in stock (expected {STOCK})")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--writers", type=int, default=2)
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--sales", type=int, default=500)
+    ap.add_argument("--reads", type=int, default=300)
+    ap.add_argument("--profile", action="append", choices=sorted(PROFILES))
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="wal_stress")
+    try:
+        failed = False
+        for profile in args.profile or sorted(PROFILES):
+            failed |= not run(profile, args, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
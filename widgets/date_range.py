@@ -0,0 +1,47 @@
+# widgets/date_range.py
+import datetime
+from tkinter import ttk, messagebox
+
+
+class DateRangeBar(ttk.Frame):
+    """
+    From / To date entries (YYYY-MM-DD, either may be left blank) with Apply
+    and Clear. on_change(date_from, date_to) gets ISO strings or None.
+    """
+
+    def __init__(self, master, on_change, date_from="", date_to="", **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_change = on_change
+        ttk.Label(self, text="From").pack(side="left")
+        self.from_entry = ttk.Entry(self, width=12)
+        self.from_entry.insert(0, date_from)
+        self.from_entry.pack(side="left", padx=(4, 6))
+        ttk.Label(self, text="To").pack(side="left")
+        self.to_entry = ttk.Entry(self, width=12)
+        self.to_entry.insert(0, date_to)
+        self.to_entry.pack(side="left", padx=(4, 6))
+        ttk.Button(self, text="Apply", command=self.apply).pack(side="left")
+        ttk.Button(self, text="Clear", command=self.clear).pack(side="left", padx=(4, 0))
+        for entry in (self.from_entry, self.to_entry):
+            entry.bind("<Return>", lambda e: self.apply())
+
+    def get(self):
+        """(date_from, date_to) as YYYY-MM-DD or None; raises ValueError on a bad date."""
+        values = []
+        for entry in (self.from_entry, self.to_entry):
+            text = entry.get().strip()
+            values.append(datetime.date.fromisoformat(text).isoformat() if text else None)
+        return tuple(values)
+
+    def apply(self):
+        try:
+            date_from, date_to = self.get()
+        except ValueError:
+            messagebox.showwarning("Dates", "Dates must be YYYY-MM-DD", parent=self)
+            return
+        self.on_change(date_from, date_to)
+
+    def clear(self):
+        self.from_entry.delete(0, "end")
+        self.to_entry.delete(0, "end")
+        self.on_change(None, None)
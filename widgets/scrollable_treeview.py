@@ -1,22 +1,169 @@
 # widgets/scrollable_treeview.py
-import tkinter as tk
+import bisect
 from tkinter import ttk
 
+def _increasing_run(iids, pos):
+    """Largest subset of `iids` (in order) whose pos[] values strictly increase (LIS)."""
+    keys = [pos[iid] for iid in iids]
+    if all(a < b for a, b in zip(keys, keys[1:])):
+        return set(iids)
+    tail_keys = []          # tail_keys[k]: smallest last key of an increasing run of length k+1
+    tails = []              # index into keys of that last element
+    prev = [-1] * len(keys)
+    for i, k in enumerate(keys):
+        j = bisect.bisect_left(tail_keys, k)
+        if j > 0:
+            prev[i] = tails[j - 1]
+        if j == len(tails):
+            tail_keys.append(k)
+            tails.append(i)
+        else:
+            tail_keys[j] = k
+            tails[j] = i
+    keep = set()
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        keep.add(iids[i])
+        i = prev[i]
+    return keep
+
+
+def _text_key(value):
+    return str(value).casefold()
+
+
+def _sorted_rows(rows, sort, value_of, keys):
+    """
+    `rows` ((iid, values) pairs) ordered by `sort` ((column, desc), ...), first
+    column first. One stable pass per column, last column first, so ties keep
+    the previous order. value_of(row, column) gives the raw value, keys maps a
+    column to fn(value) -> sort key (None: blank); blanks always come last.
+    """
+    rows = list(rows)
+    for column, desc in reversed(sort):
+        key = keys.get(column, _text_key)
+        present, blanks = [], []
+        for row in rows:
+            value = value_of(row, column)
+            try:
+                k = None if value is None or value == "" else key(value)
+            except (TypeError, ValueError):
+                k = None
+            if k is None:
+                blanks.append(row)
+            else:
+                present.append((k, row))
+        present.sort(key=lambda kr: kr[0], reverse=desc)
+        rows = [row for _k, row in present] + blanks
+    return rows
+
+
+class WindowedSource:
+    """
+    Row source for virtual mode backed by a paged query (e.g. a DB cursor window).
+    count() -> total rows; fetch(start, stop) -> list of (iid, values);
+    locate(iid) -> the row's position or None (optional, e.g. a COUNT(*) of the
+    rows before it). Rows are fetched in blocks and cached until invalidate().
+    """
+
+    def __init__(self, count, fetch, block=256, locate=None):
+        self._count = count
+        self._fetch = fetch
+        self._locate = locate
+        self.block = block
+        self._len = None
+        self._blocks = {}
+
+    def invalidate(self):
+        self._len = None
+        self._blocks.clear()
+
+    def __len__(self):
+        if self._len is None:
+            self._len = int(self._count())
+        return self._len
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            rows = self[key:key + 1]
+            if not rows:
+                raise IndexError(key)
+            return rows[0]
+        start, stop, _ = key.indices(len(self))
+        out = []
+        for b in range(start // self.block, (stop - 1) // self.block + 1 if stop > start else 0):
+            rows = self._blocks.get(b)
+            if rows is None:
+                rows = self._blocks[b] = list(self._fetch(b * self.block, (b + 1) * self.block))
+            lo = max(start - b * self.block, 0)
+            hi = min(stop - b * self.block, len(rows))
+            out.extend(rows[lo:hi])
+        return out
+
+    def index_of(self, iid):
+        """Position of row `iid`: from the fetched blocks, else locate(); None if unknown."""
+        iid = str(iid)
+        for b, rows in self._blocks.items():
+            for i, (row_iid, _values) in enumerate(rows):
+                if str(row_iid) == iid:
+                    return b * self.block + i
+        return None if self._locate is None else self._locate(iid)
+
+
 class ScrollableTreeview(ttk.Frame):
     """
     Small wrapper Frame that contains a Treeview plus vertical & horizontal scrollbars.
     Also adds mouse-wheel support (vertical scrolling) and Shift+wheel for horizontal.
     Use .get_tree() to access the actual ttk.Treeview instance.
+
+    virtual=True: the tree only holds a fixed pool of items (one per visible line)
+    that are recycled while scrolling; rows come from set_rows(source), where source
+    is a list of (iid, values) or any object with len(), slicing and index_of(iid)
+    -> position or None (WindowedSource). The scrollbar reflects the full source
+    size. Use .selection() / .select(iid) instead of the tree's own selection,
+    since pool item ids are not row ids.
+
+    on_end: called (when idle) whenever the last row is in view, e.g. to fetch
+    the next page of an infinitely scrolling list.
+
+    enable_sorting(): sort by clicking a column heading (see there).
     """
 
-    def __init__(self, master, columns=(), show="headings", height=15, **tree_kwargs):
+    def __init__(self, master, columns=(), show="headings", height=15, virtual=False, on_end=None,
+                 **tree_kwargs):
         super().__init__(master)
         self.tree = ttk.Treeview(self, columns=columns, show=show, height=height, **tree_kwargs)
+        self.virtual = virtual
+        self.on_end = on_end
+        self._end_pending = False
 
         # Scrollbars
         self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
         self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=self.vsb.set, xscrollcommand=self.hsb.set)
+        self.tree.configure(yscrollcommand=self._yscroll, xscrollcommand=self.hsb.set)
+
+        # rows last written by sync_rows: iid -> its values tuple (compared
+        # whole, so a change is never missed; usually the caller's own tuple,
+        # not a copy), and their order
+        self._values = {}
+        self._order = []
+        self._loading = None
+        self._busy = False       # a load shown by set_loading() is in progress
+        self._reveal = None      # (iid, on_missing) waiting for that load: see reveal()
+        self._sort = ()          # ((column, desc), ...) picked by heading clicks
+        self._server = None      # (columns, reload) when the DB does the sorting
+
+        if virtual:
+            self._source = []
+            self._offset = 0
+            self._pool = []          # pool item iids, top to bottom
+            self._pool_rows = {}     # pool iid -> row iid currently shown (or None)
+            self._selected = set()   # selected row iids (survive scrolling)
+            self._resize_pool(height)
+            self.vsb.configure(command=self._virtual_yview)
+            self.tree.configure(yscrollcommand=lambda *a: None)
+            self.tree.bind("<Configure>", self._on_configure)
+            self.tree.bind("<<TreeviewSelect>>", self._on_pool_select, add="+")
 
         # Layout: tree left/top, hsb bottom, vsb right
         self.vsb.pack(side="right", fill="y")
@@ -29,6 +176,319 @@ class ScrollableTreeview(ttk.Frame):
     def get_tree(self):
         return self.tree
 
+    def _yscroll(self, first, last):
+        self.vsb.set(first, last)
+        if float(last) >= 1.0:
+            self._reached_end()
+
+    def _reached_end(self):
+        if self.on_end is None or self._end_pending:
+            return
+        self._end_pending = True
+
+        def fire():
+            self._end_pending = False
+            self.on_end()
+        self.after_idle(fire)
+
+    def set_loading(self, loading, text="Loading…"):
+        """Show/hide a 'Loading…' label over the tree (rows stay visible underneath)."""
+        self._busy = loading
+        if loading:
+            if self._loading is None:
+                self._loading = ttk.Label(self, text=text, padding=8)
+            self._loading.configure(text=text)
+            self._loading.place(relx=0.5, rely=0.5, anchor="center")
+            self._loading.lift()
+        elif self._loading is not None:
+            self._loading.place_forget()
+
+    # -------- selection helpers (work in both modes) --------
+    def selection(self):
+        """Selected row iids."""
+        if not self.virtual:
+            return self.tree.selection()
+        return tuple(self._selected)
+
+    def select(self, iid):
+        """Select row `iid` and scroll it into view. Returns False if not found."""
+        iid = str(iid)
+        if not self.virtual:
+            if not self.tree.exists(iid):
+                return False
+            self.tree.selection_set(iid)
+            self.tree.see(iid)
+            return True
+        index = self._index_of(iid)
+        if index is None:
+            return False
+        self._selected = {iid}
+        if not (self._offset <= index < self._offset + len(self._pool)):
+            self._offset = index
+        self._render()
+        return True
+
+    def reveal(self, iid, on_missing=None):
+        """
+        select(iid) now, or once the load in progress (set_loading) has
+        handed its rows to sync_rows() / set_rows(); on_missing(iid) is
+        called if they do not include it. A later reveal() replaces one still
+        waiting.
+        """
+        self._reveal = (str(iid), on_missing)
+        self._select_pending()
+
+    def _select_pending(self):
+        if self._reveal is None or self._busy:
+            return
+        iid, on_missing = self._reveal
+        self._reveal = None
+        if not self.select(iid) and on_missing is not None:
+            on_missing(iid)
+
+    # -------- incremental refresh --------
+    def sync_rows(self, rows):
+        """
+        Make the tree show `rows` (ordered (iid, values) pairs) by diffing against
+        what it shows now: removed rows are deleted, new rows inserted in place,
+        changed rows updated with item() and out-of-order rows moved. Unchanged
+        rows cost no Tk calls, so selection and scroll position are kept.
+        In virtual mode this is just set_rows().
+        """
+        if self.virtual:
+            self.set_rows(rows)
+            return
+        if self._sort and self._server is None:
+            rows = self._sorted(rows)
+        old = self._values
+        new = {}
+        order = []
+        changed = {}
+        for iid, values in rows:
+            iid = str(iid)
+            values = tuple(values)
+            new[iid] = values
+            order.append(iid)
+            if old.get(iid) != values:
+                changed[iid] = values
+
+        removed = [iid for iid in old if iid not in new]
+        if removed:
+            self.tree.delete(*removed)
+        self._arrange(order, changed)
+        self._values = new
+        self._select_pending()
+
+    def _arrange(self, order, changed):
+        """
+        Put the items in `order`: rows new to the tree are inserted and
+        `changed` ones ({iid: values}) updated; the rest are only moved.
+        """
+        tree = self.tree
+        old = self._values
+        # rows whose old positions already increase along the new order stay
+        # where they are; every other surviving row is detached and re-placed
+        pos = {iid: i for i, iid in enumerate(self._order)}
+        survivors = [iid for iid in order if iid in old]
+        keep = _increasing_run(survivors, pos)
+        moved = [iid for iid in survivors if iid not in keep]
+        if moved:
+            tree.detach(*moved)
+
+        for i, iid in enumerate(order):
+            if iid not in old:
+                tree.insert("", i, iid=iid, values=changed[iid])
+                continue
+            if iid not in keep:
+                tree.move(iid, "", i)
+            if iid in changed:
+                tree.item(iid, values=changed[iid])
+        self._order = order
+
+    def patch_rows(self, rows, removed=()):
+        """
+        Row-level update (not in virtual mode): new values for `rows` ((iid,
+        values) pairs already shown) and `removed` iids deleted; every other
+        row is left alone. An in-memory sort is kept (patched rows may move).
+        """
+        gone = {str(iid) for iid in removed} & self._values.keys()
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self._values[iid]
+            self._order = [iid for iid in self._order if iid not in gone]
+        for iid, values in rows:
+            iid = str(iid)
+            values = tuple(values)
+            if iid in self._values and self._values[iid] != values:
+                self.tree.item(iid, values=values)
+                self._values[iid] = values
+        if self._sort and self._server is None:
+            self._arrange([iid for iid, _values in self._sorted([(iid, None) for iid in self._order])], {})
+
+    # -------- heading-click sorting --------
+    def enable_sorting(self, row_of=None, keys=None, server=None):
+        """
+        Sort by clicking a column heading; clicking it again reverses it and
+        shift-click adds the column as a further key (multi-column sort).
+
+        In memory (default), for lists holding all their rows: row_of(iid)
+        gives the row's raw values {column: value} (the frame's row cache;
+        default: the shown values) and keys maps typed columns to a sort key
+        fn(value), e.g. int for paisa or parse_date (else text, ignoring case).
+        Sorts are stable and blanks come last. The order sticks through later
+        sync_rows() / set_rows(), and rows are reordered with tree.move.
+
+        server=(columns, reload), for paged or windowed lists, which hold only
+        some of their rows: only `columns` (indexed ones) can be clicked, one
+        at a time, and reload(sort) must load the list again ordered by sort,
+        ((column, desc),).
+        """
+        self._row_of = row_of
+        self._sort_keys = keys or {}
+        self._server = server
+        self._headings = {c: self.tree.heading(c, "text") for c in self.tree["columns"]}
+        for c in (server[0] if server else self.tree["columns"]):
+            self.tree.heading(c, command=lambda c=c: self.sort_by(c))
+        if server is None:
+            self.tree.bind("<Shift-Button-1>", self._on_shift_click, add="+")
+
+    def _on_shift_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "heading":
+            return None
+        shown = self.tree["displaycolumns"]
+        if tuple(shown) in (("#all",), ()):
+            shown = self.tree["columns"]
+        index = int(self.tree.identify_column(event.x)[1:]) - 1
+        if 0 <= index < len(shown):
+            self.sort_by(shown[index], add=True)
+        return "break"   # not a plain heading click as well
+
+    def sort_by(self, column, add=False):
+        """Sort by `column` (reversed if it already is); add=True keeps the other sort keys."""
+        sort = list(self._sort)
+        desc = dict(sort).get(column)
+        if add and self._server is None:
+            if desc is None:
+                sort.append((column, False))
+            else:
+                sort[[c for c, _d in sort].index(column)] = (column, not desc)
+        else:
+            sort = [(column, desc is False)]
+        self._sort = tuple(sort)
+
+        for c, text in self._headings.items():
+            self.tree.heading(c, text=text)
+        for i, (c, desc) in enumerate(self._sort, 1):
+            mark = ("▼" if desc else "▲") + (str(i) if len(self._sort) > 1 else "")
+            self.tree.heading(c, text=f"{self._headings[c]} {mark}")
+
+        if self._server is not None:
+            self._server[1](self._sort)
+        elif self.virtual:
+            self.set_rows(self._source)
+        else:
+            # same values in a new order: items are only moved
+            self._arrange([iid for iid, _values in self._sorted([(iid, None) for iid in self._order])], {})
+
+    def _sorted(self, rows):
+        if self._row_of is not None:
+            value_of = lambda row, column: (self._row_of(row[0]) or {}).get(column)
+        else:
+            index = {c: i for i, c in enumerate(self.tree["columns"])}
+            value_of = lambda row, column: (row[1][index[column]] if row[1] is not None
+                                            else self.tree.set(row[0], column))
+        return _sorted_rows(rows, self._sort, value_of, self._sort_keys)
+
+    # -------- virtual mode --------
+    def set_rows(self, source):
+        """Replace the row source (virtual mode). Keeps the scroll position."""
+        if self._sort and self._server is None and isinstance(source, list):
+            source = self._sorted(source)
+        self._source = source
+        self._render()
+        self._select_pending()
+
+    def _index_of(self, iid):
+        if isinstance(self._source, list):
+            for i, (row_iid, _values) in enumerate(self._source):
+                if str(row_iid) == iid:
+                    return i
+            return None
+        # never slice through the whole source to look: that would fetch it all
+        index_of = getattr(self._source, "index_of", None)
+        return index_of(iid) if callable(index_of) else None
+
+    def _resize_pool(self, n):
+        n = max(1, n)
+        while len(self._pool) < n:
+            pid = self.tree.insert("", "end", values=())
+            self._pool.append(pid)
+            self._pool_rows[pid] = None
+        while len(self._pool) > n:
+            pid = self._pool.pop()
+            self._pool_rows.pop(pid, None)
+            self.tree.delete(pid)
+
+    def _on_configure(self, event):
+        # one pool item per visible line: header offset and row height from the first item
+        bbox = self.tree.bbox(self._pool[0]) if self._pool else ""
+        if bbox:
+            _x, top, _w, row_h = bbox
+            rows = max(1, (event.height - top) // max(1, row_h))
+        else:
+            rows = int(self.tree.cget("height"))
+        if rows != len(self._pool):
+            self._resize_pool(rows)
+            self._render()
+
+    def _render(self):
+        total = len(self._source)
+        n = len(self._pool)
+        self._offset = max(0, min(self._offset, total - n))
+        rows = self._source[self._offset:self._offset + n]
+        shown = []
+        for i, pid in enumerate(self._pool):
+            if i < len(rows):
+                row_iid, values = rows[i]
+                row_iid = str(row_iid)
+                self._pool_rows[pid] = row_iid
+                self.tree.item(pid, values=values)
+                self.tree.move(pid, "", i)
+                if row_iid in self._selected:
+                    shown.append(pid)
+            else:
+                self._pool_rows[pid] = None
+                self.tree.detach(pid)
+        self.tree.selection_set(shown)
+        if total:
+            self.vsb.set(self._offset / total, min(1.0, (self._offset + n) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
+        if self._offset + n >= total:
+            self._reached_end()
+
+    def _on_pool_select(self, event=None):
+        visible = {r for r in self._pool_rows.values() if r is not None}
+        picked = {self._pool_rows[p] for p in self.tree.selection() if self._pool_rows.get(p)}
+        if str(self.tree.cget("selectmode")) == "browse" and picked:
+            self._selected = picked
+        else:
+            self._selected = (self._selected - visible) | picked
+
+    def _scroll_rows(self, delta):
+        self._offset += delta
+        self._render()
+
+    def _virtual_yview(self, *args):
+        n = len(self._pool)
+        if args[0] == "moveto":
+            self._offset = int(float(args[1]) * len(self._source))
+            self._render()
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self._scroll_rows(step * n if args[2] == "pages" else step)
+
     # -------- mouse wheel handling --------
     def _on_mousewheel(self, event):
         """
@@ -48,7 +508,10 @@ class ScrollableTreeview(ttk.Frame):
                 elif event.num == 5:
                     delta = 1
         # scroll faster: 3 units per wheel "click"
-        self.tree.yview_scroll(delta * 3, "units")
+        if self.virtual:
+            self._scroll_rows(delta * 3)
+        else:
+            self.tree.yview_scroll(delta * 3, "units")
 
     def _on_shift_mousewheel(self, event):
         """Shift + wheel -> horizontal scroll"""